@@ -15,3 +15,80 @@ STRIPE_PRO_PRICE_ID = os.getenv("STRIPE_PRO_PRICE_ID", "price_pro_placeholder")
 STRIPE_BUSINESS_PRICE_ID = os.getenv("STRIPE_BUSINESS_PRICE_ID", "price_biz_placeholder")
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY", "")
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@videomind.ai")
+LLM_CACHE_PATH = os.path.join(DATA_DIR, "llm_cache.db")
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "604800"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_ASYNC_MAX_CONNECTIONS = int(os.getenv("OPENAI_ASYNC_MAX_CONNECTIONS", "1000"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "30"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "120"))
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "10"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "0"))
+OPENAI_LIMITER_PATH = os.path.join(DATA_DIR, "openai_limiter.db")
+OPENAI_MODEL_LIMITS = os.getenv("OPENAI_MODEL_LIMITS", "")
+OPENAI_LIMIT_HEADROOM = float(os.getenv("OPENAI_LIMIT_HEADROOM", "0.9"))
+OPENAI_THROTTLE_RECOVERY_PER_MINUTE = float(os.getenv("OPENAI_THROTTLE_RECOVERY_PER_MINUTE", "0.1"))
+OPENAI_RETRY_ATTEMPTS = int(os.getenv("OPENAI_RETRY_ATTEMPTS", "5"))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "1.0"))
+OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "60"))
+VISION_CONCURRENCY = int(os.getenv("VISION_CONCURRENCY", "8"))
+VISION_FRAME_TIMEOUT_SECONDS = float(os.getenv("VISION_FRAME_TIMEOUT_SECONDS", "30"))
+VISION_FRAME_RETRIES = int(os.getenv("VISION_FRAME_RETRIES", "1"))
+VISION_BATCH_SIZE = int(os.getenv("VISION_BATCH_SIZE", "1"))
+VISION_MAX_DIMENSION = int(os.getenv("VISION_MAX_DIMENSION", "512"))
+VISION_JPEG_QUALITY = int(os.getenv("VISION_JPEG_QUALITY", "80"))
+VISION_ADAPTIVE_DETAIL = os.getenv("VISION_ADAPTIVE_DETAIL", "true").lower() == "true"
+VISION_HIGH_DETAIL_MAX_DIMENSION = int(os.getenv("VISION_HIGH_DETAIL_MAX_DIMENSION", "1024"))
+VISION_TEXT_MIN_SCORE = float(os.getenv("VISION_TEXT_MIN_SCORE", "0.03"))
+VISION_TOKEN_BUDGET = int(os.getenv("VISION_TOKEN_BUDGET", "50000"))
+FRAME_MAX_WIDTH = int(os.getenv("FRAME_MAX_WIDTH", "1280"))
+FRAME_SAMPLING_MODE = os.getenv("FRAME_SAMPLING_MODE", "interval")
+FRAME_SCENE_THRESHOLD = float(os.getenv("FRAME_SCENE_THRESHOLD", "0.3"))
+FRAME_SCENE_MIN_GAP_SECONDS = float(os.getenv("FRAME_SCENE_MIN_GAP_SECONDS", "2"))
+FRAME_MAX_COUNT = int(os.getenv("FRAME_MAX_COUNT", "300"))
+FRAME_EXTRACTION_MODE = os.getenv("FRAME_EXTRACTION_MODE", "files")
+FRAME_KEYFRAME_MIN_DURATION_SECONDS = float(os.getenv("FRAME_KEYFRAME_MIN_DURATION_SECONDS", "3600"))
+FRAME_STORAGE_FORMAT = os.getenv("FRAME_STORAGE_FORMAT", "webp")
+FRAME_ANALYSIS_MAX_DIMENSION = int(os.getenv("FRAME_ANALYSIS_MAX_DIMENSION", "768"))
+FRAME_THUMB_WIDTH = int(os.getenv("FRAME_THUMB_WIDTH", "160"))
+FRAME_WEBP_QUALITY = int(os.getenv("FRAME_WEBP_QUALITY", "75"))
+FRAME_SPRITE_COLUMNS = int(os.getenv("FRAME_SPRITE_COLUMNS", "10"))
+FRAME_SPRITE_ROWS = int(os.getenv("FRAME_SPRITE_ROWS", "10"))
+FRAME_FILTER_ENABLED = os.getenv("FRAME_FILTER_ENABLED", "true").lower() == "true"
+FRAME_FILTER_MIN_VARIANCE = float(os.getenv("FRAME_FILTER_MIN_VARIANCE", "10"))
+FRAME_FILTER_MIN_EDGE_DENSITY = float(os.getenv("FRAME_FILTER_MIN_EDGE_DENSITY", "0.001"))
+FRAME_FILTER_MIN_ENTROPY = float(os.getenv("FRAME_FILTER_MIN_ENTROPY", "3.0"))
+# Mean absolute Laplacian (0-255 scale) below which an edgeless frame counts
+# as blurred, and the mean luminance below which such a frame is a dark fade
+FRAME_FILTER_MIN_SHARPNESS = float(os.getenv("FRAME_FILTER_MIN_SHARPNESS", "1.5"))
+FRAME_FILTER_DARK_LUMINANCE = float(os.getenv("FRAME_FILTER_DARK_LUMINANCE", "32"))
+FRAME_BUDGET_OVERSAMPLE = int(os.getenv("FRAME_BUDGET_OVERSAMPLE", "2"))
+FRAME_HASH_WORKERS = int(os.getenv("FRAME_HASH_WORKERS", "0"))
+FRAME_HASH_PARALLEL_MIN = int(os.getenv("FRAME_HASH_PARALLEL_MIN", "200"))
+VISION_CACHE_PATH = os.path.join(DATA_DIR, "vision_cache.db")
+VISION_CACHE_ENABLED = os.getenv("VISION_CACHE_ENABLED", "true").lower() == "true"
+# Perceptual-hash matches (exact, or within this distance) are only reused
+# within one user's or job's frames; other users only share byte-identical
+# frames. Near matches are never used for high-detail frames, and
+# text-bearing frames only reuse byte-identical ones
+VISION_CACHE_MAX_DISTANCE = int(os.getenv("VISION_CACHE_MAX_DISTANCE", "0"))
+RETRIEVAL_WINDOW_SECONDS = float(os.getenv("RETRIEVAL_WINDOW_SECONDS", "30"))
+RETRIEVAL_WINDOW_CHARS = int(os.getenv("RETRIEVAL_WINDOW_CHARS", "800"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+RETRIEVAL_EMBEDDINGS = os.getenv("RETRIEVAL_EMBEDDINGS", "false").lower() == "true"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float16")
+EMBEDDING_LOCAL_DIM = int(os.getenv("EMBEDDING_LOCAL_DIM", "256"))
+QA_CACHE_ENABLED = os.getenv("QA_CACHE_ENABLED", "true").lower() == "true"
+QA_CACHE_SIMILARITY = float(os.getenv("QA_CACHE_SIMILARITY", "0"))
+QA_BATCH_MAX_QUESTIONS = int(os.getenv("QA_BATCH_MAX_QUESTIONS", "10"))
+QA_BATCH_MAX_PASSAGES = int(os.getenv("QA_BATCH_MAX_PASSAGES", "24"))
+BLOG_SECTIONED_MIN_CHARS = int(os.getenv("BLOG_SECTIONED_MIN_CHARS", "8000"))
+BLOG_SECTION_MAX_CHARS = int(os.getenv("BLOG_SECTION_MAX_CHARS", "6000"))
+BLOG_SECTION_MAX_TOKENS = int(os.getenv("BLOG_SECTION_MAX_TOKENS", "900"))
+# Background posts still pending/processing after this long are treated as
+# interrupted (e.g. by a restart) and may be queued again
+BLOG_JOB_STALE_SECONDS = int(os.getenv("BLOG_JOB_STALE_SECONDS", "900"))
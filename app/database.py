@@ -8,6 +8,14 @@ def get_connection(db_path=None):
     conn.row_factory = sqlite3.Row
     return conn
 
+def _add_missing_columns(conn, table, columns):
+    """Add columns introduced after a database was first created."""
+    existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, definition in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+    conn.commit()
+
 def init_db(db_path=None):
     path = db_path or DATABASE_URL
     os.makedirs(os.path.dirname(path) if os.path.dirname(path) else ".", exist_ok=True)
@@ -31,12 +39,16 @@ def init_db(db_path=None):
             chapters TEXT DEFAULT '[]',
             subtitles_srt TEXT DEFAULT '',
             visual_analysis TEXT DEFAULT '[]',
+            stage_metrics TEXT DEFAULT '{}',
             error_message TEXT DEFAULT '',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             completed_at TIMESTAMP
         )
     """)
     conn.commit()
+    _add_missing_columns(conn, "jobs", {
+        "stage_metrics": "TEXT DEFAULT '{}'",
+    })
     conn.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id TEXT PRIMARY KEY,
@@ -50,5 +62,77 @@ def init_db(db_path=None):
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_passages (
+            job_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            start_time REAL NOT NULL,
+            end_time REAL NOT NULL,
+            text TEXT NOT NULL,
+            frame_path TEXT DEFAULT '',
+            terms TEXT DEFAULT '{}',
+            length INTEGER DEFAULT 0,
+            PRIMARY KEY (job_id, position)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_embeddings (
+            job_id TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            dtype TEXT DEFAULT 'float32',
+            matrix BLOB NOT NULL
+        )
+    """)
+    _add_missing_columns(conn, "job_embeddings", {
+        "dtype": "TEXT DEFAULT 'float32'",
+    })
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS qa_cache (
+            job_id TEXT NOT NULL,
+            question_key TEXT NOT NULL,
+            question TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            embedding BLOB,
+            embedding_model TEXT DEFAULT '',
+            hits INTEGER DEFAULT 0,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (job_id, question_key)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS blog_posts (
+            id TEXT PRIMARY KEY,
+            job_id TEXT NOT NULL,
+            style TEXT NOT NULL,
+            include_images INTEGER NOT NULL,
+            status TEXT DEFAULT 'pending',
+            title TEXT DEFAULT '',
+            content_markdown TEXT DEFAULT '',
+            image_suggestions TEXT DEFAULT '[]',
+            error_message TEXT DEFAULT '',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            UNIQUE (job_id, style, include_images)
+        )
+    """)
+    _add_missing_columns(conn, "blog_posts", {
+        "updated_at": "TIMESTAMP",
+    })
+    # Cross-job full-text search. user_id and job_id are indexed so queries
+    # and deletes can be scoped inside the MATCH expression.
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            text,
+            user_id,
+            job_id,
+            kind UNINDEXED,
+            start_time UNINDEXED,
+            frame_path UNINDEXED,
+            tokenize = 'porter unicode61'
+        )
+    """)
     conn.commit()
     conn.close()
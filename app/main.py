@@ -1,8 +1,9 @@
 from fastapi import FastAPI
 from app.database import init_db
-from app.routers import analyze, results, ask, blog, auth, stripe_webhook, usage, admin
+from app.routers import analyze, results, ask, blog, auth, stripe_webhook, usage, admin, search
 from app.middleware.auth import APIKeyMiddleware
 from app.middleware.rate_limit import RateLimitMiddleware
+from app.services.openai_client import close_openai_clients, close_async_openai_client
 
 app = FastAPI(
     title="VideoMind API",
@@ -20,11 +21,17 @@ app.include_router(auth.router)
 app.include_router(stripe_webhook.router)
 app.include_router(usage.router)
 app.include_router(admin.router)
+app.include_router(search.router)
 
 @app.on_event("startup")
 def startup():
     init_db()
 
+@app.on_event("shutdown")
+async def shutdown():
+    close_openai_clients()
+    await close_async_openai_client()
+
 @app.get("/api/v1/health")
 def health_check():
     return {
@@ -1,6 +1,7 @@
 # app/middleware/auth.py
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import JSONResponse
 from app.config import API_KEYS, DATABASE_URL
 from app.models import get_user_by_api_key
@@ -35,7 +36,7 @@ class APIKeyMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
 
         # Check database-backed keys
-        user = get_user_by_api_key(DATABASE_URL, api_key)
+        user = await run_in_threadpool(get_user_by_api_key, DATABASE_URL, api_key)
         if user is None:
             if is_public:
                 return await call_next(request)
@@ -4,12 +4,12 @@ import hashlib
 import secrets
 from app.database import get_connection
 
-def create_job(db_path, url, options):
+def create_job(db_path, url, options, user_id=""):
     job_id = f"job_{uuid.uuid4().hex[:12]}"
     conn = get_connection(db_path)
     conn.execute(
-        "INSERT INTO jobs (id, url, options) VALUES (?, ?, ?)",
-        (job_id, url, json.dumps(options))
+        "INSERT INTO jobs (id, user_id, url, options) VALUES (?, ?, ?, ?)",
+        (job_id, user_id, url, json.dumps(options))
     )
     conn.commit()
     conn.close()
@@ -23,6 +23,15 @@ def get_job(db_path, job_id):
         return None
     return dict(row)
 
+def get_job_columns(db_path, job_id, columns):
+    """Fetch only the given jobs columns. Names must come from a fixed whitelist."""
+    conn = get_connection(db_path)
+    row = conn.execute(f"SELECT {', '.join(columns)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    if row is None:
+        return None
+    return dict(row)
+
 def update_job_status(db_path, job_id, status=None, progress=None, step=None, **kwargs):
     conn = get_connection(db_path)
     updates = []
@@ -115,9 +124,9 @@ def update_user_plan(db_path, api_key, plan=None, stripe_customer_id=None):
 
 
 PLAN_LIMITS = {
-    "free": {"videos_per_day": 3, "requests_per_hour": 10},
-    "pro": {"videos_per_day": 30, "requests_per_hour": 100},
-    "business": {"videos_per_day": 150, "requests_per_hour": 500},
+    "free": {"videos_per_day": 3, "requests_per_hour": 10, "frames_per_video": 60},
+    "pro": {"videos_per_day": 30, "requests_per_hour": 100, "frames_per_video": 300},
+    "business": {"videos_per_day": 150, "requests_per_hour": 500, "frames_per_video": 1000},
 }
 
 
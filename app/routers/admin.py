@@ -3,6 +3,8 @@ from fastapi import APIRouter, Request, HTTPException
 from app.config import DATABASE_URL
 from app.services.health import check_system_health
 from app.services.report import generate_daily_stats
+from app.services.llm_cache import get_cache_stats
+from app.services.vision_cache import get_vision_cache_stats
 
 router = APIRouter()
 
@@ -19,4 +21,6 @@ def get_admin_stats(request: Request):
     return {
         "health": health,
         "stats": stats,
+        "llm_cache": get_cache_stats(),
+        "vision_cache": get_vision_cache_stats(),
     }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional
 from app.models import create_job
@@ -12,18 +12,21 @@ class AnalyzeRequest(BaseModel):
     options: Optional[dict] = None
 
 @router.post("/api/v1/analyze")
-def analyze_video(request: AnalyzeRequest, background_tasks: BackgroundTasks):
+def analyze_video(request: AnalyzeRequest, background_tasks: BackgroundTasks, http_request: Request):
     if not request.url:
         raise HTTPException(status_code=400, detail="URL is required")
 
-    options = request.options or {
+    options = dict(request.options or {
         "transcript": True,
         "summary": True,
         "chapters": True,
         "subtitles": True,
-    }
+    })
+    # The frame budget follows the caller's plan; never trust a client-supplied value
+    user = getattr(http_request.state, "user", None) or {}
+    options["plan"] = user.get("plan", "free")
 
-    job_id = create_job(DATABASE_URL, url=request.url, options=options)
+    job_id = create_job(DATABASE_URL, url=request.url, options=options, user_id=user.get("id", ""))
     background_tasks.add_task(process_video, job_id, DATABASE_URL)
 
     return {
@@ -1,9 +1,16 @@
 # app/routers/ask.py
 import json
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List
 from app.models import get_job
-from app.services.qa import answer_question
+from app.services.qa import answer_question_async, stream_answer
+from app.services.retrieval import retrieve_for_job
+from app.services.answer_cache import cached_answer, stream_cached_answer
+from app.services.qa_batch import answer_batch
+from app.services.streaming import sse_stream, SSE_HEADERS
 from app.config import DATABASE_URL
 
 router = APIRouter()
@@ -12,25 +19,65 @@ router = APIRouter()
 class AskRequest(BaseModel):
     job_id: str
     question: str
+    use_cache: Optional[bool] = True
+    stream: Optional[bool] = False
 
 
-@router.post("/api/v1/ask")
-def ask_about_video(request: AskRequest):
-    job = get_job(DATABASE_URL, request.job_id)
+class AskBatchRequest(BaseModel):
+    job_id: str
+    questions: List[str] = Field(min_length=1, max_length=20)
+    use_cache: Optional[bool] = True
+
+
+async def _completed_job(job_id: str) -> dict:
+    job = await run_in_threadpool(get_job, DATABASE_URL, job_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
     if job["status"] != "completed":
         raise HTTPException(status_code=400, detail="Video processing not yet completed")
+    return job
+
+
+@router.post("/api/v1/ask")
+async def ask_about_video(request: AskRequest):
+    job = await _completed_job(request.job_id)
+
+    if request.stream:
+        async def events():
+            passages = await run_in_threadpool(retrieve_for_job, DATABASE_URL, job, request.question)
+            async for event in stream_answer(
+                question=request.question,
+                transcript=job["transcript_text"],
+                visual_analysis=json.loads(job["visual_analysis"] or "[]"),
+                chapters=json.loads(job["chapters"] or "[]"),
+                use_cache=request.use_cache,
+                passages=passages
+            ):
+                yield event
+
+        return StreamingResponse(
+            sse_stream(stream_cached_answer(DATABASE_URL, job["id"], request.question, events, request.use_cache)),
+            media_type="text/event-stream", headers=SSE_HEADERS
+        )
+
+    async def compute():
+        passages = await run_in_threadpool(retrieve_for_job, DATABASE_URL, job, request.question)
+        return await answer_question_async(
+            question=request.question,
+            transcript=job["transcript_text"],
+            visual_analysis=json.loads(job["visual_analysis"] or "[]"),
+            chapters=json.loads(job["chapters"] or "[]"),
+            use_cache=request.use_cache,
+            passages=passages
+        )
 
-    visual_analysis = json.loads(job["visual_analysis"] or "[]")
-    chapters = json.loads(job["chapters"] or "[]")
+    # Repeated and concurrent questions about the same job share one answer
+    return await cached_answer(DATABASE_URL, job["id"], request.question, compute, request.use_cache)
 
-    result = answer_question(
-        question=request.question,
-        transcript=job["transcript_text"],
-        visual_analysis=visual_analysis,
-        chapters=chapters
-    )
 
-    return result
+@router.post("/api/v1/ask/batch")
+async def ask_batch(request: AskBatchRequest):
+    job = await _completed_job(request.job_id)
+    result = await answer_batch(DATABASE_URL, job, request.questions, request.use_cache)
+    return {"job_id": job["id"], **result}
@@ -1,10 +1,16 @@
 # app/routers/blog.py
-import json
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from app.models import get_job
-from app.services.blog_writer import generate_blog
+from app.services.blog_writer import generate_blog_async
+from app.services.blog_jobs import (
+    find_blog_post, get_blog_post, create_blog_post, save_blog, blog_args, blog_result,
+    run_blog_job, stream_and_store, replay_blog, is_stale
+)
+from app.services.streaming import sse_stream, SSE_HEADERS
 from app.config import DATABASE_URL
 
 router = APIRouter()
@@ -14,26 +20,66 @@ class BlogRequest(BaseModel):
     job_id: str
     style: Optional[str] = "article"
     include_images: Optional[bool] = True
+    use_cache: Optional[bool] = True
+    stream: Optional[bool] = False
+    background: Optional[bool] = False
 
 
 @router.post("/api/v1/to-blog")
-def video_to_blog(request: BlogRequest):
-    job = get_job(DATABASE_URL, request.job_id)
+async def video_to_blog(request: BlogRequest, background_tasks: BackgroundTasks):
+    job = await run_in_threadpool(get_job, DATABASE_URL, request.job_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
     if job["status"] != "completed":
         raise HTTPException(status_code=400, detail="Video processing not yet completed")
 
-    visual_analysis = json.loads(job["visual_analysis"] or "[]") if request.include_images else []
-    chapters = json.loads(job["chapters"] or "[]")
+    style = request.style or "article"
+    include_images = bool(request.include_images)
 
-    result = generate_blog(
-        transcript=job["transcript_text"],
-        summary=job["summary_short"],
-        chapters=chapters,
-        visual_analysis=visual_analysis,
-        style=request.style
-    )
+    # Finished articles are stored per job, style and image variant
+    post = await run_in_threadpool(find_blog_post, DATABASE_URL, job["id"], style, include_images)
+    stored = post is not None and post["status"] == "completed" and request.use_cache
 
-    return result
+    if request.stream:
+        events = replay_blog(post) if stored else stream_and_store(
+            DATABASE_URL, job, style, include_images, request.use_cache
+        )
+        return StreamingResponse(sse_stream(events), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    if stored:
+        return {"blog_id": post["id"], "status": "completed", **blog_result(post)}
+
+    if request.background:
+        blog_id, queued = await run_in_threadpool(create_blog_post, DATABASE_URL, job["id"], style, include_images)
+        if not queued:
+            return {"blog_id": blog_id, "status": "processing", "message": "Blog generation in progress"}
+        background_tasks.add_task(run_blog_job, blog_id, DATABASE_URL, request.use_cache)
+        return {"blog_id": blog_id, "status": "processing", "message": "Blog generation queued"}
+
+    result = await generate_blog_async(**blog_args(job, style, include_images, request.use_cache))
+    blog_id = await run_in_threadpool(save_blog, DATABASE_URL, job["id"], style, include_images, result)
+
+    return {"blog_id": blog_id, "status": "completed", **result}
+
+
+@router.get("/api/v1/to-blog/{blog_id}")
+def get_blog_status(blog_id: str):
+    post = get_blog_post(DATABASE_URL, blog_id)
+    if post is None:
+        raise HTTPException(status_code=404, detail="Blog post not found")
+
+    response = {
+        "blog_id": post["id"],
+        "job_id": post["job_id"],
+        "style": post["style"],
+        "include_images": bool(post["include_images"]),
+        "status": "processing" if post["status"] == "pending" else post["status"],
+    }
+    if post["status"] == "completed":
+        response.update(blog_result(post))
+    elif post["status"] == "failed":
+        response["error"] = post["error_message"]
+    elif is_stale(post):
+        response.update(status="failed", error="Blog generation was interrupted; request it again")
+    return response
@@ -1,10 +1,51 @@
 import json
 from fastapi import APIRouter, HTTPException
-from app.models import get_job
+from typing import Optional
+from app.models import get_job, get_job_columns
 from app.config import DATABASE_URL
 
 router = APIRouter()
 
+# Result field -> (jobs column, JSON default or None for plain text).
+# Dotted names are nested in the response; order is response order.
+RESULT_FIELDS = {
+    "video.title": ("video_title", None),
+    "video.duration": ("video_duration", None),
+    "video.source": ("video_source", None),
+    "transcript.full_text": ("transcript_text", None),
+    "transcript.segments": ("transcript_segments", "[]"),
+    "summary.short": ("summary_short", None),
+    "summary.detailed": ("summary_detailed", None),
+    "chapters": ("chapters", "[]"),
+    "subtitles_srt": ("subtitles_srt", None),
+    "visual_analysis": ("visual_analysis", "[]"),
+    "metrics": ("stage_metrics", "{}"),
+}
+STATUS_COLUMNS = ["id", "status", "progress", "step", "error_message"]
+
+
+def _expand(names: str) -> list:
+    """Resolve a comma-separated field list; a group name such as "summary" selects all its fields."""
+    selected = []
+    for name in (n.strip() for n in names.split(",")):
+        if not name:
+            continue
+        matches = [f for f in RESULT_FIELDS if f == name or f.startswith(name + ".")]
+        if not matches:
+            valid = sorted({f.split(".")[0] for f in RESULT_FIELDS} | set(RESULT_FIELDS))
+            raise HTTPException(status_code=400, detail=f"Unknown field '{name}'. Valid fields: {', '.join(valid)}")
+        selected.extend(m for m in matches if m not in selected)
+    return selected
+
+
+def select_fields(fields: Optional[str] = None, exclude: Optional[str] = None) -> list:
+    """Result fields to return, in response order."""
+    wanted = set(_expand(fields)) if fields else set(RESULT_FIELDS)
+    if exclude:
+        wanted -= set(_expand(exclude))
+    return [f for f in RESULT_FIELDS if f in wanted]
+
+
 @router.get("/api/v1/status/{job_id}")
 def get_status(job_id: str):
     job = get_job(DATABASE_URL, job_id)
@@ -19,8 +60,10 @@ def get_status(job_id: str):
     }
 
 @router.get("/api/v1/result/{job_id}")
-def get_result(job_id: str):
-    job = get_job(DATABASE_URL, job_id)
+def get_result(job_id: str, fields: Optional[str] = None, exclude: Optional[str] = None):
+    """Job results; `fields` / `exclude` (comma-separated) limit which columns are read and parsed."""
+    selected = select_fields(fields, exclude)
+    job = get_job_columns(DATABASE_URL, job_id, STATUS_COLUMNS + [RESULT_FIELDS[f][0] for f in selected])
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
@@ -40,23 +83,13 @@ def get_result(job_id: str):
             "error": job["error_message"]
         }
 
-    return {
-        "job_id": job["id"],
-        "status": "completed",
-        "video": {
-            "title": job["video_title"],
-            "duration": job["video_duration"],
-            "source": job["video_source"]
-        },
-        "transcript": {
-            "full_text": job["transcript_text"],
-            "segments": json.loads(job["transcript_segments"] or "[]")
-        },
-        "summary": {
-            "short": job["summary_short"],
-            "detailed": job["summary_detailed"]
-        },
-        "chapters": json.loads(job["chapters"] or "[]"),
-        "subtitles_srt": job["subtitles_srt"],
-        "visual_analysis": json.loads(job["visual_analysis"] or "[]")
-    }
+    result = {"job_id": job["id"], "status": "completed"}
+    for field in selected:
+        column, json_default = RESULT_FIELDS[field]
+        value = job[column] if json_default is None else json.loads(job[column] or json_default)
+        group, _, key = field.partition(".")
+        if key:
+            result.setdefault(group, {})[key] = value
+        else:
+            result[group] = value
+    return result
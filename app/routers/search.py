@@ -0,0 +1,18 @@
+# app/routers/search.py
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.services.search import search_jobs, build_match_query
+from app.config import DATABASE_URL
+
+router = APIRouter()
+
+
+@router.get("/api/v1/search")
+def search(request: Request, q: str, limit: int = Query(20, ge=1, le=100)):
+    user = getattr(request.state, "user", None)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if build_match_query(q) is None:
+        raise HTTPException(status_code=400, detail="Query must contain at least one word")
+
+    results = search_jobs(DATABASE_URL, user["id"], q, limit=limit)
+    return {"query": q, "count": len(results), "results": results}
@@ -0,0 +1,184 @@
+# app/services/answer_cache.py
+import re
+import json
+import time
+import asyncio
+import hashlib
+import numpy as np
+from app.config import QA_CACHE_ENABLED, QA_CACHE_SIMILARITY
+from app.database import get_connection
+from app.services.embeddings import embed_texts, model_name, top_k
+from app.logging_config import setup_logging
+
+logger = setup_logging("answer_cache")
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# (job_id, question_key) -> Future for answers currently being computed
+_inflight = {}
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _PUNCTUATION_RE.sub(" ", question.lower())
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def question_key(question: str) -> str:
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+
+def _question_vector(question: str) -> np.ndarray:
+    return embed_texts([normalize_question(question)])[0]
+
+
+def get_cached_answer(db_path, job_id: str, question: str):
+    """Cached answer for a job and question, or None.
+
+    Exact matches on the normalized question are looked up first; when
+    QA_CACHE_SIMILARITY is set, a cached question whose embedding is at
+    least that cosine-similar also counts as a match.
+    """
+    key = question_key(question)
+    conn = get_connection(db_path)
+    try:
+        row = conn.execute(
+            "SELECT question_key, answer FROM qa_cache WHERE job_id = ? AND question_key = ?", (job_id, key)
+        ).fetchone()
+        if row is None and QA_CACHE_SIMILARITY > 0:
+            row = _similar_answer(conn, job_id, question)
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE qa_cache SET hits = hits + 1 WHERE job_id = ? AND question_key = ?",
+            (job_id, row["question_key"])
+        )
+        conn.commit()
+        return json.loads(row["answer"])
+    finally:
+        conn.close()
+
+
+def _similar_answer(conn, job_id: str, question: str):
+    rows = conn.execute(
+        "SELECT question_key, answer, embedding FROM qa_cache WHERE job_id = ? AND embedding_model = ?",
+        (job_id, model_name())
+    ).fetchall()
+    if not rows:
+        return None
+    matrix = np.vstack([np.frombuffer(row["embedding"], dtype=np.float32) for row in rows])
+    best, scores = top_k(matrix, _question_vector(question), 1)
+    if scores[0] < QA_CACHE_SIMILARITY:
+        return None
+    return rows[int(best[0])]
+
+
+def store_answer(db_path, job_id: str, question: str, answer: dict):
+    embedding = None
+    embedding_model = ""
+    if QA_CACHE_SIMILARITY > 0:
+        embedding = _question_vector(question).astype(np.float32).tobytes()
+        embedding_model = model_name()
+    conn = get_connection(db_path)
+    try:
+        conn.execute(
+            """INSERT OR REPLACE INTO qa_cache
+               (job_id, question_key, question, answer, embedding, embedding_model, hits, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, 0, ?)""",
+            (job_id, question_key(question), normalize_question(question), json.dumps(answer),
+             embedding, embedding_model, time.time())
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def invalidate_job_answers(db_path, job_id: str) -> int:
+    """Drop every cached answer for a job, e.g. before it is reprocessed."""
+    conn = get_connection(db_path)
+    try:
+        cursor = conn.execute("DELETE FROM qa_cache WHERE job_id = ?", (job_id,))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+
+def lookup_answer(db_path, job_id: str, question: str):
+    """get_cached_answer that logs and returns None instead of raising."""
+    try:
+        return get_cached_answer(db_path, job_id, question)
+    except Exception as e:
+        logger.warning(f"Answer cache lookup failed for {job_id}: {e}")
+        return None
+
+
+def remember_answer(db_path, job_id: str, question: str, answer: dict):
+    """store_answer that logs instead of raising."""
+    try:
+        store_answer(db_path, job_id, question, answer)
+    except Exception as e:
+        logger.warning(f"Answer cache store failed for {job_id}: {e}")
+
+
+async def cached_answer(db_path, job_id: str, question: str, compute, use_cache: bool = True) -> dict:
+    """Return a cached answer or await compute() for it.
+
+    Concurrent calls for the same job and normalized question share a single
+    compute() call; the others wait for its result.
+    """
+    if not (use_cache and QA_CACHE_ENABLED):
+        return await compute()
+
+    inflight_key = (job_id, question_key(question))
+    pending = _inflight.get(inflight_key)
+    if pending is not None:
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # The request computing the answer went away; start over
+            return await cached_answer(db_path, job_id, question, compute, use_cache)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[inflight_key] = future
+    try:
+        answer = await asyncio.to_thread(lookup_answer, db_path, job_id, question)
+        if answer is None:
+            answer = await compute()
+            await asyncio.to_thread(remember_answer, db_path, job_id, question, answer)
+        future.set_result(answer)
+        return answer
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception retrieved so it is not logged when nobody else was waiting
+        future.exception()
+        raise
+    finally:
+        del _inflight[inflight_key]
+
+
+async def stream_cached_answer(db_path, job_id: str, question: str, stream, use_cache: bool = True):
+    """Streaming counterpart of cached_answer.
+
+    `stream()` returns a ("delta", text) ... ("done", result) generator. A
+    cached answer is replayed as one delta; a fresh one is stored when its
+    stream finishes. Streams are not coalesced.
+    """
+    use_cache = use_cache and QA_CACHE_ENABLED
+    if use_cache:
+        answer = await asyncio.to_thread(lookup_answer, db_path, job_id, question)
+        if answer is not None:
+            yield "delta", answer["answer"]
+            yield "done", answer
+            return
+
+    async for kind, payload in stream():
+        if kind == "done" and use_cache:
+            await asyncio.to_thread(remember_answer, db_path, job_id, question, payload)
+        yield kind, payload
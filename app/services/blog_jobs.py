@@ -0,0 +1,176 @@
+# app/services/blog_jobs.py
+import json
+import uuid
+import asyncio
+from datetime import datetime, timezone
+from app.config import BLOG_JOB_STALE_SECONDS
+from app.database import get_connection
+from app.models import get_job
+from app.services.blog_writer import generate_blog_async, stream_blog
+from app.logging_config import setup_logging
+
+logger = setup_logging("blog_jobs")
+
+
+def get_blog_post(db_path, blog_id: str):
+    conn = get_connection(db_path)
+    try:
+        row = conn.execute("SELECT * FROM blog_posts WHERE id = ?", (blog_id,)).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+
+def find_blog_post(db_path, job_id: str, style: str, include_images: bool):
+    """The stored post for a job/style/variant, whatever its status, or None."""
+    conn = get_connection(db_path)
+    try:
+        row = conn.execute(
+            "SELECT * FROM blog_posts WHERE job_id = ? AND style = ? AND include_images = ?",
+            (job_id, style, int(include_images))
+        ).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+
+def create_blog_post(db_path, job_id: str, style: str, include_images: bool) -> tuple:
+    """Queue a post for a job/style/variant. Returns (blog_id, queued).
+
+    A finished or failed previous attempt is reset to pending, and so is one
+    left pending or processing for longer than BLOG_JOB_STALE_SECONDS (its
+    task died with the process). A post that is still in progress is left
+    alone and queued is False, so concurrent requests start one generation.
+    """
+    conn = get_connection(db_path)
+    try:
+        cursor = conn.execute(
+            """INSERT INTO blog_posts (id, job_id, style, include_images) VALUES (?, ?, ?, ?)
+               ON CONFLICT(job_id, style, include_images) DO UPDATE SET
+                   status = 'pending', error_message = '', completed_at = NULL,
+                   updated_at = CURRENT_TIMESTAMP
+               WHERE blog_posts.status NOT IN ('pending', 'processing')
+                  OR COALESCE(blog_posts.updated_at, blog_posts.created_at) < datetime('now', ?)""",
+            (f"blog_{uuid.uuid4().hex[:12]}", job_id, style, int(include_images),
+             f"-{BLOG_JOB_STALE_SECONDS} seconds")
+        )
+        conn.commit()
+        queued = cursor.rowcount > 0
+        blog_id = conn.execute(
+            "SELECT id FROM blog_posts WHERE job_id = ? AND style = ? AND include_images = ?",
+            (job_id, style, int(include_images))
+        ).fetchone()["id"]
+    finally:
+        conn.close()
+    return blog_id, queued
+
+
+def update_blog_post(db_path, blog_id: str, status: str, **fields):
+    updates = ["status = ?", "updated_at = CURRENT_TIMESTAMP"]
+    values = [status]
+    for key, value in fields.items():
+        updates.append(f"{key} = ?")
+        values.append(value if isinstance(value, str) else json.dumps(value))
+    if status in ("completed", "failed"):
+        updates.append("completed_at = CURRENT_TIMESTAMP")
+    values.append(blog_id)
+    conn = get_connection(db_path)
+    try:
+        conn.execute(f"UPDATE blog_posts SET {', '.join(updates)} WHERE id = ?", values)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def is_stale(post: dict) -> bool:
+    """Whether a pending or processing post has outlived BLOG_JOB_STALE_SECONDS."""
+    if post["status"] not in ("pending", "processing"):
+        return False
+    stamp = datetime.strptime(post["updated_at"] or post["created_at"], "%Y-%m-%d %H:%M:%S")
+    age = datetime.now(timezone.utc) - stamp.replace(tzinfo=timezone.utc)
+    return age.total_seconds() > BLOG_JOB_STALE_SECONDS
+
+
+def invalidate_job_blogs(db_path, job_id: str) -> int:
+    """Drop stored posts for a job, e.g. before it is reprocessed."""
+    conn = get_connection(db_path)
+    try:
+        cursor = conn.execute("DELETE FROM blog_posts WHERE job_id = ?", (job_id,))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+
+def blog_result(post: dict) -> dict:
+    """A completed post in the /to-blog response shape."""
+    return {
+        "title": post["title"],
+        "content_markdown": post["content_markdown"],
+        "image_suggestions": json.loads(post["image_suggestions"] or "[]"),
+    }
+
+
+def blog_args(job: dict, style: str, include_images: bool, use_cache: bool = True) -> dict:
+    """generate_blog keyword arguments for a completed job."""
+    return dict(
+        transcript=job["transcript_text"],
+        summary=job["summary_short"],
+        chapters=json.loads(job["chapters"] or "[]"),
+        visual_analysis=json.loads(job["visual_analysis"] or "[]") if include_images else [],
+        style=style,
+        use_cache=use_cache,
+        segments=json.loads(job["transcript_segments"] or "[]")
+    )
+
+
+def store_blog_result(db_path, blog_id: str, result: dict):
+    update_blog_post(
+        db_path, blog_id, "completed",
+        title=result["title"],
+        content_markdown=result["content_markdown"],
+        image_suggestions=json.dumps(result["image_suggestions"])
+    )
+
+
+def save_blog(db_path, job_id: str, style: str, include_images: bool, result: dict) -> str:
+    """Store a finished article for a job/style/variant. Returns the post id."""
+    blog_id, _ = create_blog_post(db_path, job_id, style, include_images)
+    store_blog_result(db_path, blog_id, result)
+    return blog_id
+
+
+async def stream_and_store(db_path, job: dict, style: str, include_images: bool, use_cache: bool = True):
+    """stream_blog, storing the article once the final event arrives."""
+    async for kind, payload in stream_blog(**blog_args(job, style, include_images, use_cache)):
+        if kind == "done":
+            blog_id = await asyncio.to_thread(save_blog, db_path, job["id"], style, include_images, payload)
+            payload = dict(payload, blog_id=blog_id)
+        yield kind, payload
+
+
+async def replay_blog(post: dict):
+    """A stored post as a stream: the whole body as one delta, then the result."""
+    result = dict(blog_result(post), blog_id=post["id"])
+    yield "delta", result["content_markdown"]
+    yield "done", result
+
+
+async def run_blog_job(blog_id: str, db_path: str = None, use_cache: bool = True):
+    """Generate a queued post and store the article or the error."""
+    from app.config import DATABASE_URL
+    db = db_path or DATABASE_URL
+
+    post = await asyncio.to_thread(get_blog_post, db, blog_id)
+    if post is None:
+        return
+    try:
+        job = await asyncio.to_thread(get_job, db, post["job_id"])
+        if job is None or job["status"] != "completed":
+            raise ValueError("Video is no longer available")
+        await asyncio.to_thread(update_blog_post, db, blog_id, "processing")
+        result = await generate_blog_async(**blog_args(job, post["style"], bool(post["include_images"]), use_cache))
+        await asyncio.to_thread(store_blog_result, db, blog_id, result)
+    except Exception as e:
+        logger.warning(f"Blog generation failed for {blog_id}: {e}")
+        await asyncio.to_thread(update_blog_post, db, blog_id, "failed", error_message=str(e))
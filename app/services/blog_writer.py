@@ -1,19 +1,48 @@
 # app/services/blog_writer.py
 import json
-import openai
-from app.config import OPENAI_API_KEY
+import asyncio
+from app.config import BLOG_SECTIONED_MIN_CHARS, BLOG_SECTION_MAX_CHARS, BLOG_SECTION_MAX_TOKENS
+from app.services.openai_client import get_openai_client, get_async_openai_client
+from app.services.llm_cache import (
+    cached_chat_completion, cached_chat_completion_async, stream_chat_completion_async
+)
+from app.services.streaming import METADATA_MARKER, split_metadata, parse_metadata
+from app.logging_config import setup_logging
 
+logger = setup_logging("blog_writer")
 
-def generate_blog(
-    transcript: str,
-    summary: str,
-    chapters: list,
-    visual_analysis: list,
-    style: str = "article"
-) -> dict:
-    """Convert video content into a blog article."""
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
+IMAGE_SUGGESTIONS_SPEC = (
+    '"image_suggestions": Array of objects with "timestamp" (float), "caption" (string), '
+    'and "insert_after" (markdown heading where the image fits best). '
+    "Only suggest images where visual frames were available.\n"
+)
 
+
+def _system_prompt(style: str, stream: bool) -> str:
+    if stream:
+        return (
+            f"You convert video transcripts into well-structured blog articles in '{style}' style. "
+            "Write the full article body in markdown, using the transcript content to write a comprehensive "
+            "article with headers, paragraphs, code blocks if relevant, and lists. Do not include the title. "
+            f"Then write {METADATA_MARKER} on its own line, followed by a JSON object with:\n"
+            '- "title": A compelling blog title\n'
+            f"- {IMAGE_SUGGESTIONS_SPEC}"
+            "Write nothing after the JSON."
+        )
+    return (
+        f"You convert video transcripts into well-structured blog articles in '{style}' style. "
+        "Return a JSON object with:\n"
+        '- "title": A compelling blog title\n'
+        '- "content_markdown": The full article in markdown format, using the transcript content '
+        "to write a comprehensive article with headers, paragraphs, code blocks if relevant, and lists.\n"
+        f"- {IMAGE_SUGGESTIONS_SPEC}"
+        "Return ONLY valid JSON, no markdown wrapping."
+    )
+
+
+def _build_messages(
+    transcript: str, summary: str, chapters: list, visual_analysis: list, style: str, stream: bool = False
+) -> list:
     chapter_text = ""
     if chapters:
         chapter_lines = [f"- {ch.get('start', '')} to {ch.get('end', '')}: {ch.get('title', '')}" for ch in chapters]
@@ -24,37 +53,20 @@ def generate_blog(
         visual_lines = [f"- [{v.get('timestamp', 0)}s] {v.get('description', '')}" for v in visual_analysis]
         visual_text = "\n\nVisual scenes:\n" + "\n".join(visual_lines)
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    f"You convert video transcripts into well-structured blog articles in '{style}' style. "
-                    "Return a JSON object with:\n"
-                    '- "title": A compelling blog title\n'
-                    '- "content_markdown": The full article in markdown format, using the transcript content '
-                    "to write a comprehensive article with headers, paragraphs, code blocks if relevant, and lists.\n"
-                    '- "image_suggestions": Array of objects with "timestamp" (float), "caption" (string), '
-                    'and "insert_after" (markdown heading where the image fits best). '
-                    "Only suggest images where visual frames were available.\n"
-                    "Return ONLY valid JSON, no markdown wrapping."
-                )
-            },
-            {
-                "role": "user",
-                "content": (
-                    f"Summary: {summary}\n\n"
-                    f"Transcript:\n{transcript[:8000]}"
-                    f"{chapter_text}{visual_text}"
-                )
-            }
-        ],
-        temperature=0.4,
-        max_tokens=3000
-    )
+    return [
+        {"role": "system", "content": _system_prompt(style, stream)},
+        {
+            "role": "user",
+            "content": (
+                f"Summary: {summary}\n\n"
+                f"Transcript:\n{transcript[:8000]}"
+                f"{chapter_text}{visual_text}"
+            )
+        }
+    ]
+
 
-    raw = response.choices[0].message.content.strip()
+def _parse_blog(raw: str) -> dict:
     if raw.startswith("```"):
         raw = raw.split("\n", 1)[1].rsplit("```", 1)[0]
 
@@ -65,3 +77,341 @@ def generate_blog(
         "content_markdown": data.get("content_markdown", ""),
         "image_suggestions": data.get("image_suggestions", [])
     }
+
+
+def _timestamp_seconds(value):
+    """Parse "m:ss" / "h:mm:ss" chapter timestamps; None if unparseable."""
+    try:
+        seconds = 0
+        for part in str(value).strip().split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    except ValueError:
+        return None
+
+
+def _chapter_ranges(chapters: list) -> list:
+    """(start, end) seconds per chapter, or [] if chapter starts are missing or out of order.
+
+    Ranges tile the whole timeline: each chapter runs until the next one
+    starts, the first from 0 and the last to the end, so every transcript
+    segment belongs to exactly one chapter whatever the chapters' own `end`s say.
+    """
+    starts = [_timestamp_seconds(ch.get("start", "")) for ch in chapters]
+    if not starts or None in starts or starts != sorted(starts):
+        return []
+    ends = starts[1:] + [float("inf")]
+    return [(min(start, 0.0) if i == 0 else start, end) for i, (start, end) in enumerate(zip(starts, ends))]
+
+
+def _section_ranges(sections: list, chapters: list, segments: list) -> list:
+    """(start, end) seconds of transcript for each outlined section, or [] to write in one call.
+
+    Chapters the outline skips are folded into the section before them, so
+    no segment is left out. Sections must follow the chapters in order, and
+    every section needs some transcript of its own.
+    """
+    numbers = [int(section["chapter"]) for section in sections]
+    chapter_ranges = _chapter_ranges(chapters)
+    if not numbers or not chapter_ranges or numbers != sorted(numbers):
+        return []
+    distinct = sorted(set(numbers))
+    bounds = {
+        number: (chapter_ranges[0][0] if i == 0 else chapter_ranges[number - 1][0],
+                 chapter_ranges[distinct[i + 1] - 1][0] if i + 1 < len(distinct) else float("inf"))
+        for i, number in enumerate(distinct)
+    }
+    ranges = [bounds[number] for number in numbers]
+    if any(not any(start <= seg["start"] < end for seg in segments) for start, end in ranges):
+        return []
+    return ranges
+
+
+def _split_range(chapter_range: tuple, segments: list, max_chars: int = None) -> list:
+    """Split a section's (start, end) into consecutive parts of at most max_chars of transcript.
+
+    Cuts fall on segment starts, so the parts still cover the whole range.
+    Only a single segment longer than max_chars can exceed it.
+    """
+    max_chars = max_chars or BLOG_SECTION_MAX_CHARS
+    start, end = chapter_range
+    bounds, size = [start], 0
+    for seg in sorted((s for s in segments if start <= s["start"] < end), key=lambda s: s["start"]):
+        length = len(seg["text"].strip()) + 1
+        if size and size + length > max_chars and seg["start"] > bounds[-1]:
+            bounds.append(seg["start"])
+            size = 0
+        size += length
+    bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _use_sections(transcript: str, chapters: list, segments: list) -> bool:
+    return bool(segments) and len(transcript) > BLOG_SECTIONED_MIN_CHARS and bool(_chapter_ranges(chapters))
+
+
+def _build_outline_messages(summary: str, chapters: list, style: str) -> list:
+    chapter_lines = [f"{i}. {ch.get('start', '')} to {ch.get('end', '')}: {ch.get('title', '')}"
+                     for i, ch in enumerate(chapters, 1)]
+    return [
+        {
+            "role": "system",
+            "content": (
+                f"You plan blog articles in '{style}' style from a video's summary and chapters. "
+                "Return a JSON object with:\n"
+                '- "title": A compelling blog title\n'
+                '- "introduction": A 2-3 sentence opening paragraph in markdown\n'
+                '- "sections": Array of objects with "chapter" (the chapter number the section is based on), '
+                '"heading" (section heading, no # marks) and "points" (array of key points to cover), '
+                "in reading order\n"
+                "Return ONLY valid JSON, no markdown wrapping."
+            )
+        },
+        {
+            "role": "user",
+            "content": f"Summary: {summary}\n\nChapters:\n" + "\n".join(chapter_lines)
+        }
+    ]
+
+
+def _build_section_messages(
+    title: str, section: dict, segments: list, visual_analysis: list, chapter_range: tuple, style: str,
+    part: int = 1, parts: int = 1
+) -> list:
+    start, end = chapter_range
+    text = " ".join(seg["text"].strip() for seg in segments if start <= seg["start"] < end)
+    visual_lines = [f"- [{v.get('timestamp', 0)}s] {v.get('description', '')}"
+                    for v in visual_analysis if start <= v.get("timestamp", 0) < end]
+    visual_text = "\n\nVisual scenes:\n" + "\n".join(visual_lines) if visual_lines else ""
+    points = "\n".join(f"- {point}" for point in section.get("points", []))
+    continuation = (
+        f"This is part {part} of {parts} of the section: cover only this part of the transcript, "
+        "continuing from the previous part without repeating it.\n" if parts > 1 else ""
+    )
+
+    return [
+        {
+            "role": "system",
+            "content": (
+                f"You write one section of a blog article in '{style}' style titled '{title}'. "
+                "Return a JSON object with:\n"
+                '- "content_markdown": The section body in markdown, without the section heading '
+                "(use ### for sub-headings), with paragraphs, code blocks if relevant, and lists.\n"
+                '- "image_suggestions": Array of objects with "timestamp" (float) and "caption" (string). '
+                "Only suggest images where visual frames were available.\n"
+                "Return ONLY valid JSON, no markdown wrapping."
+            )
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Section: {section.get('heading', '')}\n"
+                f"{continuation}"
+                f"Key points:\n{points}\n\n"
+                f"Transcript for this part:\n{text[:BLOG_SECTION_MAX_CHARS]}"
+                f"{visual_text}"
+            )
+        }
+    ]
+
+
+def _parse_json(raw: str) -> dict:
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[1].rsplit("```", 1)[0]
+    return json.loads(raw)
+
+
+async def _outline(client, summary: str, chapters: list, style: str, use_cache: bool) -> dict:
+    outline = await cached_chat_completion_async(
+        client,
+        model="gpt-4o",
+        messages=_build_outline_messages(summary, chapters, style),
+        temperature=0.4,
+        max_tokens=800,
+        use_cache=use_cache,
+        parse=_parse_json
+    )
+    outline["sections"] = [
+        s for s in outline.get("sections", [])
+        if isinstance(s, dict) and str(s.get("chapter", "")).isdigit() and 1 <= int(s["chapter"]) <= len(chapters)
+    ]
+    return outline
+
+
+async def _write_section(
+    client, title: str, section: dict, segments: list, visual_analysis: list,
+    chapter_range: tuple, style: str, use_cache: bool, part: int = 1, parts: int = 1
+) -> dict:
+    data = await cached_chat_completion_async(
+        client,
+        model="gpt-4o",
+        messages=_build_section_messages(
+            title, section, segments, visual_analysis, chapter_range, style, part, parts
+        ),
+        temperature=0.4,
+        max_tokens=BLOG_SECTION_MAX_TOKENS,
+        use_cache=use_cache,
+        parse=_parse_json
+    )
+    heading = f"## {section.get('heading', '')}"
+    body = data.get("content_markdown", "").strip()
+    return {
+        # Later parts of a long section continue under the first part's heading
+        "markdown": f"{heading}\n\n{body}" if part == 1 else body,
+        "image_suggestions": [
+            dict(image, insert_after=image.get("insert_after") or heading)
+            for image in data.get("image_suggestions", [])
+        ],
+    }
+
+
+async def _write_sectioned(
+    client, summary: str, chapters: list, visual_analysis: list, segments: list, style: str, use_cache: bool
+):
+    """Write an article as an outline plus concurrent calls per section.
+
+    A section with more than BLOG_SECTION_MAX_CHARS of transcript is written
+    in several consecutive parts rather than truncated.
+
+    Returns (blocks, result): the introduction and section markdown blocks in
+    reading order, and the assembled result. Returns None when the article
+    should go through the single-call writer instead: the outline or a section
+    failed, or the outline cannot be mapped onto the transcript.
+    """
+    tasks = []
+    try:
+        outline = await _outline(client, summary, chapters, style, use_cache)
+        ranges = _section_ranges(outline["sections"], chapters, segments)
+        if not ranges:
+            return None
+        for section, chapter_range in zip(outline["sections"], ranges):
+            part_ranges = _split_range(chapter_range, segments)
+            tasks += [
+                asyncio.ensure_future(_write_section(
+                    client, outline.get("title", ""), section, segments, visual_analysis, part_range, style,
+                    use_cache, part, len(part_ranges)
+                ))
+                for part, part_range in enumerate(part_ranges, 1)
+            ]
+        sections = await asyncio.gather(*tasks)
+    except Exception as e:
+        logger.warning(f"Sectioned blog writing failed, falling back to a single call: {e}")
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    blocks = [outline["introduction"].strip()] if outline.get("introduction") else []
+    blocks += [section["markdown"] for section in sections]
+    return blocks, {
+        "title": outline.get("title", ""),
+        "content_markdown": "\n\n".join(blocks),
+        "image_suggestions": [image for section in sections for image in section["image_suggestions"]]
+    }
+
+
+def generate_blog(
+    transcript: str,
+    summary: str,
+    chapters: list,
+    visual_analysis: list,
+    style: str = "article",
+    use_cache: bool = True
+) -> dict:
+    """Convert video content into a blog article."""
+    client = get_openai_client()
+
+    return cached_chat_completion(
+        client,
+        model="gpt-4o",
+        messages=_build_messages(transcript, summary, chapters, visual_analysis, style),
+        temperature=0.4,
+        max_tokens=3000,
+        use_cache=use_cache,
+        parse=_parse_blog
+    )
+
+
+async def generate_blog_async(
+    transcript: str,
+    summary: str,
+    chapters: list,
+    visual_analysis: list,
+    style: str = "article",
+    use_cache: bool = True,
+    segments: list = None
+) -> dict:
+    """Async variant of generate_blog for use from async routes.
+
+    Long transcripts with timed chapters and `segments` are written in two
+    phases: a short outline call, then concurrent calls per section (several
+    for long chapters), each given only its own part of the transcript.
+    Latency follows the slowest call instead of the whole article. If that
+    fails, the article is written in a single call.
+    """
+    client = get_async_openai_client()
+    if _use_sections(transcript, chapters, segments):
+        sectioned = await _write_sectioned(client, summary, chapters, visual_analysis, segments, style, use_cache)
+        if sectioned:
+            return sectioned[1]
+
+    return await cached_chat_completion_async(
+        client,
+        model="gpt-4o",
+        messages=_build_messages(transcript, summary, chapters, visual_analysis, style),
+        temperature=0.4,
+        max_tokens=3000,
+        use_cache=use_cache,
+        parse=_parse_blog
+    )
+
+
+async def stream_blog(
+    transcript: str,
+    summary: str,
+    chapters: list,
+    visual_analysis: list,
+    style: str = "article",
+    use_cache: bool = True,
+    segments: list = None
+):
+    """Stream an article: yields ("delta", markdown) as tokens arrive, then ("done", result).
+
+    The title and image suggestions come after the body, so they are only in
+    the final result, which has the same shape as generate_blog's. Long videos
+    use the sectioned writer and stream whole sections in order once all of
+    them are written, so a failed section can still fall back to the
+    single-call stream without half an article having been sent.
+    """
+    client = get_async_openai_client()
+    if _use_sections(transcript, chapters, segments):
+        sectioned = await _write_sectioned(client, summary, chapters, visual_analysis, segments, style, use_cache)
+        if sectioned:
+            blocks, result = sectioned
+            for i, block in enumerate(blocks):
+                yield "delta", ("\n\n" if i else "") + block
+            yield "done", result
+            return
+
+    chunks = stream_chat_completion_async(
+        client,
+        model="gpt-4o",
+        messages=_build_messages(transcript, summary, chapters, visual_analysis, style, stream=True),
+        temperature=0.4,
+        max_tokens=3000,
+        use_cache=use_cache
+    )
+
+    parts = []
+    async for kind, text in split_metadata(chunks):
+        if kind == "text":
+            parts.append(text)
+            yield "delta", text
+        else:
+            metadata = parse_metadata(text)
+
+    yield "done", {
+        "title": metadata.get("title", ""),
+        "content_markdown": "".join(parts).strip(),
+        "image_suggestions": metadata.get("image_suggestions", [])
+    }
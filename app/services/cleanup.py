@@ -2,6 +2,7 @@
 import os
 import time
 import shutil
+from app.services.frame_storage import job_storage_bytes, last_modified
 from app.logging_config import setup_logging
 
 logger = setup_logging("cleanup")
@@ -30,10 +31,14 @@ def cleanup_temp_files(temp_dir, max_age_seconds=3600):
 
 
 def cleanup_old_frames(frames_dir, max_age_days=30):
-    """Delete frame directories older than max_age_days. Returns count of deleted dirs."""
+    """Delete job frame directories (all storage tiers) not modified in max_age_days.
+
+    Returns count of deleted dirs and bytes freed.
+    """
     deleted_dirs = 0
+    freed_bytes = 0
     if not os.path.exists(frames_dir):
-        return {"deleted_dirs": 0}
+        return {"deleted_dirs": 0, "freed_bytes": 0}
 
     now = time.time()
     max_age_seconds = max_age_days * 86400
@@ -41,13 +46,15 @@ def cleanup_old_frames(frames_dir, max_age_days=30):
     for entry in os.listdir(frames_dir):
         dir_path = os.path.join(frames_dir, entry)
         if os.path.isdir(dir_path):
-            mtime = os.path.getmtime(dir_path)
+            mtime = last_modified(dir_path)
             if now - mtime > max_age_seconds:
+                size = job_storage_bytes(dir_path)
                 try:
                     shutil.rmtree(dir_path)
                     deleted_dirs += 1
+                    freed_bytes += size
                     logger.info(f"Deleted old frames dir: {dir_path}")
                 except OSError as e:
                     logger.warning(f"Failed to delete {dir_path}: {e}")
 
-    return {"deleted_dirs": deleted_dirs}
+    return {"deleted_dirs": deleted_dirs, "freed_bytes": freed_bytes}
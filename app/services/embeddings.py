@@ -0,0 +1,134 @@
+# app/services/embeddings.py
+import re
+import hashlib
+import numpy as np
+from app.config import EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_DTYPE, EMBEDDING_LOCAL_DIM
+from app.database import get_connection
+from app.services.openai_client import get_openai_client
+from app.services.openai_limiter import call_with_retry
+
+# Inputs per embeddings request
+EMBEDDING_BATCH = 100
+DTYPES = {"float16": np.float16, "float32": np.float32}
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def model_name() -> str:
+    """Identifier stored with each matrix so vectors from different backends never mix."""
+    if EMBEDDING_BACKEND == "local":
+        return f"local-hash-{EMBEDDING_LOCAL_DIM}"
+    return EMBEDDING_MODEL
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _openai_embed(texts: list) -> np.ndarray:
+    client = get_openai_client()
+    vectors = []
+    for start in range(0, len(texts), EMBEDDING_BATCH):
+        batch = texts[start:start + EMBEDDING_BATCH]
+        response = call_with_retry(
+            lambda: client.embeddings.create(model=EMBEDDING_MODEL, input=batch),
+            EMBEDDING_MODEL, sum(len(t) for t in batch) // 4
+        )
+        vectors.extend(item.embedding for item in response.data)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _feature_index(feature: str, dim: int) -> tuple:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+
+def _local_embed(texts: list, dim: int = None) -> np.ndarray:
+    """Deterministic offline embedding: signed feature hashing of words and word pairs.
+
+    Texts sharing vocabulary land close together, which is enough for tests
+    and offline use; it carries no semantics beyond word overlap.
+    """
+    dim = dim or EMBEDDING_LOCAL_DIM
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        words = _TOKEN_RE.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            column, sign = _feature_index(feature, dim)
+            matrix[row, column] += sign
+    return matrix
+
+
+def embed_texts(texts: list) -> np.ndarray:
+    """Embed texts with the configured backend as L2-normalised float32 rows."""
+    if not texts:
+        return np.zeros((0, EMBEDDING_LOCAL_DIM), dtype=np.float32)
+    matrix = _local_embed(texts) if EMBEDDING_BACKEND == "local" else _openai_embed(texts)
+    return _normalize(matrix)
+
+
+def store_job_embeddings(db_path, job_id: str, texts: list):
+    """Embed a job's passages and store them as one matrix blob, row i = passage i."""
+    matrix = embed_texts(texts).astype(DTYPES[EMBEDDING_DTYPE])
+    conn = get_connection(db_path)
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO job_embeddings (job_id, model, dim, dtype, matrix) VALUES (?, ?, ?, ?, ?)",
+            (job_id, model_name(), matrix.shape[1], EMBEDDING_DTYPE, matrix.tobytes())
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def clear_job_embeddings(db_path, job_id: str) -> int:
+    """Drop a job's stored matrix, e.g. before it is reprocessed."""
+    conn = get_connection(db_path)
+    try:
+        cursor = conn.execute("DELETE FROM job_embeddings WHERE job_id = ?", (job_id,))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+
+def _load_matrix(db_path, job_id: str):
+    """A job's stored matrix for the current model, or None."""
+    conn = get_connection(db_path)
+    try:
+        row = conn.execute(
+            "SELECT dim, dtype, matrix FROM job_embeddings WHERE job_id = ? AND model = ?", (job_id, model_name())
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return np.frombuffer(row["matrix"], dtype=DTYPES[row["dtype"]]).reshape(-1, row["dim"])
+
+
+def top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> tuple:
+    """Indices and cosine scores of the k best rows, best first, from one matrix product."""
+    scores = matrix.astype(np.float32, copy=False) @ query.astype(np.float32, copy=False)
+    k = min(k, len(scores))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64), scores[:0]
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    return best, scores[best]
+
+
+def rank_job_passages(db_path, job_id: str, question: str, expected_rows: int = None) -> list:
+    """Passage indices of a job ordered by cosine similarity to the question.
+
+    Raises ValueError when expected_rows is given and the stored matrix has a
+    different number of rows, i.e. it was built for another set of passages.
+    """
+    matrix = _load_matrix(db_path, job_id)
+    if matrix is None:
+        return []
+    if expected_rows is not None and len(matrix) != expected_rows:
+        raise ValueError(f"stored embeddings have {len(matrix)} rows for {expected_rows} passages")
+    best, _ = top_k(matrix, embed_texts([question])[0], len(matrix))
+    return [int(i) for i in best]
@@ -0,0 +1,45 @@
+# app/services/frame_budget.py
+import math
+from app.models import PLAN_LIMITS
+from app.config import FRAME_BUDGET_OVERSAMPLE
+
+BASE_INTERVAL = 5
+
+
+def plan_frame_budget(duration: float, plan: str = None, max_frames: int = None) -> dict:
+    """Decide how many frames a job may analyze and how densely to sample.
+
+    The cap is the plan's frames_per_video, lowered by a per-request
+    `max_frames`. Sampling is stretched beyond the base 5s interval so long
+    videos extract roughly FRAME_BUDGET_OVERSAMPLE times the cap, leaving
+    headroom for deduplication and filtering without decoding thousands of
+    frames. Given the duration, extraction spaces scene-mode samples the same
+    way, so neither mode stops at extract_limit before the end of the video.
+    """
+    plan = plan if plan in PLAN_LIMITS else "free"
+    cap = PLAN_LIMITS[plan]["frames_per_video"]
+    if max_frames:
+        cap = max(1, min(cap, int(max_frames)))
+
+    extract_limit = cap * FRAME_BUDGET_OVERSAMPLE
+    interval = BASE_INTERVAL
+    if duration and float(duration) / BASE_INTERVAL > extract_limit:
+        interval = math.ceil(float(duration) / extract_limit)
+
+    return {"plan": plan, "max_frames": cap, "interval": interval, "extract_limit": extract_limit}
+
+
+def select_frames(frames: list, max_frames: int) -> list:
+    """Keep at most `max_frames` frames, spread evenly across the video's scenes.
+
+    After deduplication each frame stands for a distinct scene, so picking
+    evenly spaced positions in the time-ordered list covers the whole video
+    instead of just its beginning.
+    """
+    if len(frames) <= max_frames:
+        return list(frames)
+    ordered = sorted(frames, key=lambda f: f["timestamp"])
+    if max_frames == 1:
+        return [ordered[len(ordered) // 2]]
+    step = (len(ordered) - 1) / (max_frames - 1)
+    return [ordered[round(i * step)] for i in range(max_frames)]
@@ -0,0 +1,126 @@
+# app/services/frame_filter.py
+import numpy as np
+from PIL import Image
+from app.config import (
+    FRAME_FILTER_ENABLED, FRAME_FILTER_MIN_VARIANCE, FRAME_FILTER_MIN_EDGE_DENSITY,
+    FRAME_FILTER_MIN_ENTROPY, FRAME_FILTER_MIN_SHARPNESS, FRAME_FILTER_DARK_LUMINANCE
+)
+from app.logging_config import setup_logging
+
+logger = setup_logging("frame_filter")
+
+# Frames are scored on a small grayscale copy; a neighbouring-pixel step above
+# EDGE_THRESHOLD (0-255 scale) counts as an edge.
+SCORE_SIZE = 256
+EDGE_THRESHOLD = 32
+
+
+# Slides, code and terminals sit on a near-uniform background: at least this
+# share of pixels within BACKGROUND_TOLERANCE of the most common grey level.
+TEXT_BACKGROUND_FRACTION = 0.5
+BACKGROUND_TOLERANCE = 12
+
+
+def _load_gray(frame_path: str) -> np.ndarray:
+    with Image.open(frame_path) as img:
+        img.draft("L", (SCORE_SIZE, SCORE_SIZE))
+        img = img.convert("L")
+        img.thumbnail((SCORE_SIZE, SCORE_SIZE))
+        return np.asarray(img, dtype=np.float32)
+
+
+def _edge_density(pixels: np.ndarray) -> float:
+    dx = np.abs(np.diff(pixels, axis=1))[:-1, :]
+    dy = np.abs(np.diff(pixels, axis=0))[:, :-1]
+    return float(((dx + dy) > EDGE_THRESHOLD).mean()) if dx.size else 0.0
+
+
+def _sharpness(pixels: np.ndarray) -> float:
+    """Mean absolute Laplacian: fine detail that blur removes, whatever the tonal range."""
+    if pixels.shape[0] < 3 or pixels.shape[1] < 3:
+        return 0.0
+    laplacian = (4 * pixels[1:-1, 1:-1] - pixels[:-2, 1:-1] - pixels[2:, 1:-1]
+                 - pixels[1:-1, :-2] - pixels[1:-1, 2:])
+    return float(np.abs(laplacian).mean())
+
+
+def _histogram(pixels: np.ndarray) -> np.ndarray:
+    return np.bincount(pixels.astype(np.uint8).ravel(), minlength=256) / pixels.size
+
+
+def score_frame(frame_path: str) -> dict:
+    """Luminance mean and variance, edge density, sharpness and histogram entropy of a frame."""
+    pixels = _load_gray(frame_path)
+    histogram = _histogram(pixels)
+    p = histogram[histogram > 0]
+    return {
+        "brightness": float(pixels.mean()),
+        "variance": float(pixels.var()),
+        "edge_density": _edge_density(pixels),
+        "sharpness": _sharpness(pixels),
+        "entropy": float(-(p * np.log2(p)).sum()),
+    }
+
+
+def text_score(frame_path: str) -> float:
+    """Estimate how text-heavy a frame is, from 0 (no text structure) upwards.
+
+    Text renders as dense, sharp edges over a flat background, so the score is
+    the edge density of frames with a dominant background level and 0 otherwise.
+    Busy natural scenes have plenty of edges but no such background.
+    """
+    pixels = _load_gray(frame_path)
+    histogram = _histogram(pixels)
+    mode = int(histogram.argmax())
+    background = histogram[max(0, mode - BACKGROUND_TOLERANCE):mode + BACKGROUND_TOLERANCE + 1].sum()
+    if background < TEXT_BACKGROUND_FRACTION:
+        return 0.0
+    return _edge_density(pixels)
+
+
+def classify_scores(scores: dict):
+    """Return None for an informative frame, else why it should be skipped.
+
+    A frame is kept if it has edge structure (text, UI, outlines), or if it
+    has no strong edges but keeps fine detail and a rich tonal range, like a
+    soft photograph. Otherwise it is "blank" (black, solid colour, dark fade)
+    or "low_detail" (heavy blur). Blur and gradients keep their tonal range,
+    so entropy alone cannot tell them from a photograph; sharpness can.
+    """
+    if scores["edge_density"] >= FRAME_FILTER_MIN_EDGE_DENSITY:
+        return None
+    if scores["variance"] < FRAME_FILTER_MIN_VARIANCE:
+        return "blank"
+    if scores["sharpness"] < FRAME_FILTER_MIN_SHARPNESS:
+        return "blank" if scores["brightness"] < FRAME_FILTER_DARK_LUMINANCE else "low_detail"
+    if scores["entropy"] < FRAME_FILTER_MIN_ENTROPY:
+        return "low_detail"
+    return None
+
+
+def filter_informative(frames: list, metrics: dict = None) -> list:
+    """Drop blank and low-detail frames before they are sent for vision analysis.
+
+    Frames that cannot be scored are kept. When `metrics` is given it receives
+    the number of skipped frames by reason.
+    """
+    skipped = {"blank": 0, "low_detail": 0}
+    kept = []
+    for frame in frames:
+        if FRAME_FILTER_ENABLED:
+            try:
+                reason = classify_scores(score_frame(frame["path"]))
+            except OSError as e:
+                logger.warning(f"Could not score {frame['path']}: {e}")
+                reason = None
+            if reason is not None:
+                skipped[reason] += 1
+                continue
+        kept.append(frame)
+
+    if metrics is not None:
+        metrics.update({
+            "skipped_blank": skipped["blank"],
+            "skipped_low_detail": skipped["low_detail"],
+        })
+    return kept
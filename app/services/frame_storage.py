@@ -0,0 +1,172 @@
+# app/services/frame_storage.py
+import os
+import json
+import posixpath
+from PIL import Image
+from app.config import (
+    FRAME_ANALYSIS_MAX_DIMENSION, FRAME_THUMB_WIDTH, FRAME_WEBP_QUALITY,
+    FRAME_SPRITE_COLUMNS, FRAME_SPRITE_ROWS
+)
+from app.logging_config import setup_logging
+
+logger = setup_logging("frame_storage")
+
+# Layout of FRAMES_DIR/<job_id>/ once frames are compacted
+ANALYSIS_DIR = "analysis"
+THUMBS_DIR = "thumbs"
+SPRITES_DIR = "sprites"
+SPRITE_INDEX = "index.json"
+
+
+def _save_webp(img, path: str) -> int:
+    img.save(path, format="WEBP", quality=FRAME_WEBP_QUALITY, method=4)
+    return os.path.getsize(path)
+
+
+def _compact_frame(frame: dict, job_dir: str, name: str) -> tuple:
+    """Write the analysis and thumbnail tiers for one frame and drop the source file.
+
+    Returns the new frame entry, the thumbnail image and the bytes written per tier.
+    """
+    with Image.open(frame["path"]) as img:
+        img.draft("RGB", (FRAME_ANALYSIS_MAX_DIMENSION, FRAME_ANALYSIS_MAX_DIMENSION))
+        img = img.convert("RGB")
+    img.thumbnail((FRAME_ANALYSIS_MAX_DIMENSION, FRAME_ANALYSIS_MAX_DIMENSION))
+    analysis_path = posixpath.join(job_dir, ANALYSIS_DIR, f"{name}.webp")
+    analysis_bytes = _save_webp(img, analysis_path)
+
+    thumb = img.copy()
+    thumb.thumbnail((FRAME_THUMB_WIDTH, FRAME_THUMB_WIDTH * 4))
+    thumb_path = posixpath.join(job_dir, THUMBS_DIR, f"{name}.webp")
+    thumb_bytes = _save_webp(thumb, thumb_path)
+
+    if os.path.abspath(frame["path"]) != os.path.abspath(analysis_path):
+        os.remove(frame["path"])
+    entry = {"path": analysis_path, "thumbnail": thumb_path, "timestamp": frame["timestamp"]}
+    return entry, thumb, (analysis_bytes, thumb_bytes)
+
+
+def build_sprite_sheets(thumbs: list, timestamps: list, job_dir: str) -> dict:
+    """Tile thumbnails into sprite sheets and write a JSON index for timeline previews.
+
+    Returns the index, which maps each timestamp to a sheet and tile offset.
+    """
+    sprites_dir = os.path.join(job_dir, SPRITES_DIR)
+    os.makedirs(sprites_dir, exist_ok=True)
+    tile_width = max((t.width for t in thumbs), default=FRAME_THUMB_WIDTH)
+    tile_height = max((t.height for t in thumbs), default=0)
+    per_sheet = FRAME_SPRITE_COLUMNS * FRAME_SPRITE_ROWS
+
+    index = {"tile_width": tile_width, "tile_height": tile_height, "sheets": [], "frames": []}
+    for start in range(0, len(thumbs), per_sheet):
+        tiles = thumbs[start:start + per_sheet]
+        columns = min(FRAME_SPRITE_COLUMNS, len(tiles))
+        rows = -(-len(tiles) // FRAME_SPRITE_COLUMNS)
+        sheet = Image.new("RGB", (columns * tile_width, rows * tile_height))
+        sheet_name = f"sprite_{start // per_sheet + 1:03d}.webp"
+        for i, (tile, timestamp) in enumerate(zip(tiles, timestamps[start:start + per_sheet])):
+            x, y = i % FRAME_SPRITE_COLUMNS * tile_width, i // FRAME_SPRITE_COLUMNS * tile_height
+            sheet.paste(tile, (x, y))
+            index["frames"].append({"timestamp": timestamp, "sheet": sheet_name, "x": x, "y": y})
+        _save_webp(sheet, os.path.join(sprites_dir, sheet_name))
+        index["sheets"].append(sheet_name)
+
+    with open(os.path.join(sprites_dir, SPRITE_INDEX), "w") as f:
+        json.dump(index, f)
+    return index
+
+
+def remove_unused_frames(job_dir: str, keep: list) -> int:
+    """Delete extracted JPEGs at the top of job_dir whose paths are not in `keep`.
+
+    Extraction writes every sampled frame there; the ones dropped by dedup,
+    filtering or the frame budget are never referenced again. Returns the
+    number of files removed.
+    """
+    if not os.path.isdir(job_dir):
+        return 0
+    keep = {os.path.abspath(path) for path in keep}
+    removed = 0
+    for name in os.listdir(job_dir):
+        path = os.path.join(job_dir, name)
+        if name.endswith(".jpg") and os.path.isfile(path) and os.path.abspath(path) not in keep:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def compact_frames(frames: list, job_dir: str, metrics: dict = None) -> list:
+    """Replace extracted frames with WebP tiers plus sprite sheets.
+
+    Each frame becomes an analysis-size WebP (used for vision and results) and
+    a small thumbnail; thumbnails are also tiled into sprite sheets. Frames
+    that cannot be read are passed through unchanged. Extracted frames not in
+    `frames` are deleted. Returns the frame list with `path` pointing at the
+    analysis tier and a `thumbnail` key added.
+    """
+    os.makedirs(os.path.join(job_dir, ANALYSIS_DIR), exist_ok=True)
+    os.makedirs(os.path.join(job_dir, THUMBS_DIR), exist_ok=True)
+
+    compacted = []
+    thumbs = []
+    timestamps = []
+    analysis_bytes = 0
+    thumbnail_bytes = 0
+    for i, frame in enumerate(frames, 1):
+        try:
+            entry, thumb, (a_bytes, t_bytes) = _compact_frame(frame, job_dir, f"frame_{i:04d}")
+        except OSError as e:
+            logger.warning(f"Could not compact {frame['path']}: {e}")
+            compacted.append(dict(frame))
+            continue
+        compacted.append(entry)
+        thumbs.append(thumb)
+        timestamps.append(entry["timestamp"])
+        analysis_bytes += a_bytes
+        thumbnail_bytes += t_bytes
+
+    build_sprite_sheets(thumbs, timestamps, job_dir)
+    removed = remove_unused_frames(job_dir, [frame["path"] for frame in compacted])
+
+    if metrics is not None:
+        metrics.update({
+            "format": "webp",
+            "removed_frames": removed,
+            "analysis_bytes": analysis_bytes,
+            "thumbnail_bytes": thumbnail_bytes,
+            "sprite_bytes": _dir_bytes(os.path.join(job_dir, SPRITES_DIR)),
+            "total_bytes": job_storage_bytes(job_dir),
+        })
+    return compacted
+
+
+def _dir_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def job_storage_bytes(job_dir: str) -> int:
+    """Bytes on disk for a job's frames, across every storage tier."""
+    return _dir_bytes(job_dir)
+
+
+def last_modified(job_dir: str) -> float:
+    """Newest mtime in a job's frame tree.
+
+    Writing into the tier subdirectories does not touch the job directory's
+    own mtime, so age has to be taken from the whole tree.
+    """
+    newest = os.path.getmtime(job_dir)
+    for root, dirs, files in os.walk(job_dir):
+        for name in dirs + files:
+            try:
+                newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+            except OSError:
+                pass
+    return newest
@@ -1,46 +1,395 @@
 # app/services/frames.py
 import os
+import re
+import math
+import shutil
+import tempfile
+import multiprocessing
 import posixpath
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
 from PIL import Image
-import imagehash
+from app.config import (
+    FRAME_MAX_WIDTH, FRAME_SAMPLING_MODE, FRAME_SCENE_THRESHOLD,
+    FRAME_SCENE_MIN_GAP_SECONDS, FRAME_MAX_COUNT, FRAME_HASH_WORKERS, FRAME_HASH_PARALLEL_MIN,
+    FRAME_KEYFRAME_MIN_DURATION_SECONDS
+)
+from app.logging_config import setup_logging
 
+logger = setup_logging("frames")
 
-def extract_frames(video_path: str, output_dir: str, interval: int = 5) -> list:
-    """Extract one frame every `interval` seconds from a video using FFmpeg."""
+
+SAMPLING_MODES = ("interval", "scene")
+
+KEYFRAME_ACCURACY_NOTE = (
+    "Keyframe-only decoding: frames snap to the next keyframe, so gaps between "
+    "frames can exceed the sampling interval by up to one GOP (typically 2-10s) "
+    "and short scenes without a keyframe may be missed."
+)
+
+# showinfo logs one line per frame that reaches it: "n:   3 pts:  45045 pts_time:15.015 ..."
+_SHOWINFO_RE = re.compile(r"\bn:\s*(\d+)\s+pts:\s*(-?\d+)\s+pts_time:\s*(-?[\d.]+(?:e[+-]?\d+)?)")
+# ...preceded by its input link: "config in time_base: 1/30000, frame_rate: 30000/1001"
+_SHOWINFO_CONFIG_RE = re.compile(r"config in time_base:\s*(\d+)/(\d+),\s*frame_rate:\s*(\d+)/(\d+)")
+# Assumed when showinfo does not report a frame rate (variable-rate streams)
+DEFAULT_FRAME_RATE = 30.0
+
+
+def _select_filter(mode: str, interval: float, scene_threshold: float, min_gap: float) -> str:
+    """Build the ffmpeg select expression for a sampling mode.
+
+    Both modes pick real decoded frames (unlike the fps filter, which resamples
+    onto a fixed grid), so the PTS reported by showinfo is the frame's own.
+    """
+    first = "isnan(prev_selected_t)"
+    if mode == "scene":
+        return f"select='{first}+gt(scene,{scene_threshold})*gte(t-prev_selected_t,{min_gap})'"
+    return f"select='{first}+gte(t-prev_selected_t,{interval})'"
+
+
+def _input_args(video_path: str, keyframes_only: bool) -> list:
+    # -skip_frame is a decoder option, so it must come before -i
+    skip = ["-skip_frame", "nokey"] if keyframes_only else []
+    return ["ffmpeg", "-hide_banner", *skip, "-i", video_path]
+
+
+def choose_keyframes_only(duration: float, requested: bool = None) -> bool:
+    """Use keyframe-only decoding when asked to, or by default for long videos."""
+    if requested is not None:
+        return bool(requested)
+    return bool(duration) and float(duration) >= FRAME_KEYFRAME_MIN_DURATION_SECONDS
+
+
+def _resolve_sampling(mode, interval, scene_threshold, min_gap, max_frames, duration) -> tuple:
+    """Fill in sampling defaults.
+
+    With a known `duration`, the interval and the scene-mode minimum gap are
+    stretched so at most `max_frames` frames fit across the whole video;
+    otherwise the -frames:v cap would stop extraction early and drop its end.
+    """
+    mode = mode or FRAME_SAMPLING_MODE
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown frame sampling mode: {mode}")
+    scene_threshold = scene_threshold if scene_threshold is not None else FRAME_SCENE_THRESHOLD
+    min_gap = min_gap if min_gap is not None else FRAME_SCENE_MIN_GAP_SECONDS
+    max_frames = max_frames or FRAME_MAX_COUNT
+    if duration:
+        # Rounded up to the millisecond so the spacing never falls below the span
+        span = math.ceil(float(duration) / max_frames * 1000) / 1000
+        interval = max(interval, span)
+        min_gap = max(min_gap, span)
+    return mode, interval, scene_threshold, min_gap, max_frames
+
+
+def _parse_showinfo(stderr: str) -> tuple:
+    """Return ({showinfo frame index: presentation time}, frame rate or None).
+
+    ffmpeg before 7.0 prints pts_time with six significant digits (1234.57
+    for 1234.5667), so when showinfo reports the link time base the time is
+    computed from the exact integer pts instead.
+    """
+    config = _SHOWINFO_CONFIG_RE.search(stderr or "")
+    time_base = int(config.group(1)) / int(config.group(2)) if config and int(config.group(2)) else None
+    frame_rate = int(config.group(3)) / int(config.group(4)) if config and int(config.group(4)) else None
+    times = {
+        int(n): int(pts) * time_base if time_base else float(pts_time)
+        for n, pts, pts_time in _SHOWINFO_RE.findall(stderr or "")
+    }
+    return times, frame_rate or None
+
+
+def _parse_pts_times(stderr: str) -> dict:
+    """Map showinfo frame index to its presentation time in seconds."""
+    return {n: round(t, 3) for n, t in _parse_showinfo(stderr)[0].items()}
+
+
+def extract_frames(
+    video_path: str, output_dir: str, interval: int = 5, max_width: int = None,
+    mode: str = None, scene_threshold: float = None, min_gap: float = None, max_frames: int = None,
+    keyframes_only: bool = False, duration: float = None
+) -> list:
+    """Extract frames from a video using FFmpeg.
+
+    In "interval" mode one frame is taken every `interval` seconds; in "scene"
+    mode a frame is taken whenever the content-change score exceeds
+    `scene_threshold`, at most once per `min_gap` seconds. At most `max_frames`
+    frames are written, and frames wider than `max_width` are scaled down.
+    Pass the video's `duration` so sparser sampling keeps those frames spread
+    over the whole video instead of stopping at the cap. With `keyframes_only`
+    the decoder skips non-key frames entirely, which is much cheaper on long
+    videos but only samples at keyframe positions.
+
+    Returns a list of {"path", "timestamp"} dicts, where timestamp is the
+    frame's presentation time as reported by the decoder.
+    """
+    mode, interval, scene_threshold, min_gap, max_frames = _resolve_sampling(
+        mode, interval, scene_threshold, min_gap, max_frames, duration
+    )
     os.makedirs(output_dir, exist_ok=True)
+    max_width = max_width or FRAME_MAX_WIDTH
 
-    subprocess.run(
+    video_filter = ",".join([
+        _select_filter(mode, interval, scene_threshold, min_gap),
+        "showinfo",
+        f"scale='min({max_width},iw)':-2",
+    ])
+    result = subprocess.run(
         [
-            "ffmpeg", "-i", video_path,
-            "-vf", f"fps=1/{interval}",
+            *_input_args(video_path, keyframes_only),
+            "-vf", video_filter,
+            "-vsync", "vfr",
+            "-frames:v", str(max_frames),
             "-q:v", "2",
             "-y",
             os.path.join(output_dir, "frame_%04d.jpg")
         ],
         check=True,
-        capture_output=True
+        capture_output=True,
+        text=True
     )
+    pts_times = _parse_pts_times(getattr(result, "stderr", ""))
 
     frame_files = sorted(
         f for f in os.listdir(output_dir) if f.startswith("frame_") and f.endswith(".jpg")
     )
-    return [posixpath.join(output_dir, f) for f in frame_files]
+    frames = []
+    for i, f in enumerate(frame_files):
+        # Fall back to the nominal sampling time if ffmpeg's log could not be read
+        timestamp = pts_times.get(i, float(i * interval))
+        frames.append({"path": posixpath.join(output_dir, f), "timestamp": timestamp})
+    return frames
+
+
+HASH_SIZE = 8
+# JPEG draft mode decodes at 1/2, 1/4 or 1/8 scale; ask for a size comfortably
+# above the hash grid so the final resize still averages real pixels.
+DRAFT_SIZE = (HASH_SIZE * 8, HASH_SIZE * 8)
+_BIT_WEIGHTS = 1 << np.arange(HASH_SIZE * HASH_SIZE - 1, -1, -1, dtype=np.uint64)
+
+
+def _load_thumbnail(path: str) -> np.ndarray:
+    with Image.open(path) as img:
+        img.draft("L", DRAFT_SIZE)
+        small = img.convert("L").resize((HASH_SIZE, HASH_SIZE), Image.Resampling.BOX)
+        return np.asarray(small, dtype=np.float32).reshape(-1)
+
+
+def _hash_chunk(paths: list) -> list:
+    """Average-hash a chunk of frames in one vectorised pass."""
+    if not paths:
+        return []
+    return _hash_rows(np.stack([_load_thumbnail(path) for path in paths]))
+
+
+def _hash_rows(pixels: np.ndarray) -> list:
+    """Average-hash each row of an (N, HASH_SIZE**2) grayscale array."""
+    bits = (pixels > pixels.mean(axis=1, keepdims=True)).astype(np.uint64)
+    return [int(value) for value in bits @ _BIT_WEIGHTS]
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
 
+def compute_hashes(frame_paths: list, workers: int = None) -> list:
+    """64-bit average hashes for frame_paths, in order.
 
-def deduplicate_frames(frame_paths: list, threshold: int = 5) -> list:
-    """Remove near-duplicate frames using perceptual hashing."""
+    Large batches are split across a process pool since decoding is CPU-bound.
+    Workers are started with forkserver (spawn where unavailable): the caller
+    runs inside a threaded worker, and forking a threaded process can copy
+    held locks into the child and deadlock it.
+    """
+    workers = workers or FRAME_HASH_WORKERS or os.cpu_count() or 1
+    if workers <= 1 or len(frame_paths) < FRAME_HASH_PARALLEL_MIN:
+        return _hash_chunk(frame_paths)
+
+    chunk_size = -(-len(frame_paths) // workers)
+    chunks = [frame_paths[i:i + chunk_size] for i in range(0, len(frame_paths), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=_pool_context()) as executor:
+        return [value for chunk in executor.map(_hash_chunk, chunks) for value in chunk]
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _bk_insert(tree: list, value: int):
+    """Insert into a BK-tree whose nodes are [hash, {distance: child}]."""
+    node = tree
+    while True:
+        distance = _hamming(value, node[0])
+        child = node[1].get(distance)
+        if child is None:
+            node[1][distance] = [value, {}]
+            return
+        node = child
+
+
+def _bk_has_within(tree: list, value: int, radius: int) -> bool:
+    """True if any hash in the tree is within `radius` bits of value."""
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        distance = _hamming(value, node[0])
+        if distance <= radius:
+            return True
+        # Triangle inequality: only children at distance d with |d - distance| <= radius can match
+        stack.extend(
+            child for d, child in node[1].items() if distance - radius <= d <= distance + radius
+        )
+    return False
+
+
+def deduplicate_frames(frame_paths: list, threshold: int = 5, workers: int = None) -> list:
+    """Remove near-duplicate frames using perceptual hashing.
+
+    Each frame is compared against every frame kept so far, so a scene that
+    reappears later (slide A, slide B, slide A) is only kept once.
+    """
     if not frame_paths:
         return []
 
-    kept = [frame_paths[0]]
-    last_hash = imagehash.average_hash(Image.open(frame_paths[0]))
+    hashes = compute_hashes(frame_paths, workers=workers)
+    return [frame_paths[i] for i in _unique_indices(hashes, threshold)]
 
-    for path in frame_paths[1:]:
-        current_hash = imagehash.average_hash(Image.open(path))
-        diff = last_hash - current_hash
-        if diff > threshold:
-            kept.append(path)
-            last_hash = current_hash
 
+def _unique_indices(hashes: list, threshold: int) -> list:
+    """Indices of hashes not within `threshold` bits of any earlier kept hash."""
+    if not hashes:
+        return []
+    tree = [hashes[0], {}]
+    kept = [0]
+    for i, current_hash in enumerate(hashes[1:], 1):
+        if not _bk_has_within(tree, current_hash, threshold):
+            kept.append(i)
+            _bk_insert(tree, current_hash)
     return kept
+
+
+# Raw thumbnails streamed for in-memory hashing; a multiple of HASH_SIZE so
+# the hash grid is an exact block average.
+PIPE_THUMB_SIZE = HASH_SIZE * 4
+
+
+def _pipe_hashes(raw: bytes) -> list:
+    """Average-hash the gray PIPE_THUMB_SIZE² frames in an ffmpeg rawvideo stream."""
+    frame_bytes = PIPE_THUMB_SIZE * PIPE_THUMB_SIZE
+    count = len(raw) // frame_bytes
+    if count == 0:
+        return []
+    block = PIPE_THUMB_SIZE // HASH_SIZE
+    pixels = np.frombuffer(raw[:count * frame_bytes], dtype=np.uint8).astype(np.float32)
+    pixels = pixels.reshape(count, HASH_SIZE, block, HASH_SIZE, block).mean(axis=(2, 4))
+    return _hash_rows(pixels.reshape(count, -1))
+
+
+def extract_unique_frames(
+    video_path: str, output_dir: str, interval: int = 5, max_width: int = None,
+    mode: str = None, scene_threshold: float = None, min_gap: float = None,
+    max_frames: int = None, threshold: int = 5, metrics: dict = None, keyframes_only: bool = False,
+    duration: float = None
+) -> list:
+    """Extract and deduplicate frames without writing the duplicates to disk.
+
+    A first ffmpeg pass streams small grayscale thumbnails of the sampled
+    frames over a pipe; they are hashed and deduplicated in memory. Then a
+    full-quality JPEG is encoded for each surviving timestamp by seeking to it.
+    Sampling options and the return value match extract_frames; when
+    `metrics` is given it receives the sampled and unique frame counts.
+    """
+    mode, interval, scene_threshold, min_gap, max_frames = _resolve_sampling(
+        mode, interval, scene_threshold, min_gap, max_frames, duration
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    max_width = max_width or FRAME_MAX_WIDTH
+
+    sample_filter = ",".join([
+        _select_filter(mode, interval, scene_threshold, min_gap),
+        "showinfo",
+        f"scale={PIPE_THUMB_SIZE}:{PIPE_THUMB_SIZE},format=gray",
+    ])
+    result = subprocess.run(
+        [
+            *_input_args(video_path, keyframes_only),
+            "-vf", sample_filter,
+            "-vsync", "vfr",
+            "-frames:v", str(max_frames),
+            "-f", "rawvideo",
+            "pipe:1"
+        ],
+        check=True,
+        capture_output=True
+    )
+    pts_times, frame_rate = _parse_showinfo(result.stderr.decode("utf-8", errors="replace"))
+    hashes = _pipe_hashes(result.stdout)
+    timestamps = [pts_times.get(i, float(i * interval)) for i in range(len(hashes))]
+    survivors = [timestamps[i] for i in _unique_indices(hashes, threshold)]
+
+    if metrics is not None:
+        metrics["extracted"] = len(hashes)
+        metrics["unique"] = len(survivors)
+    if not survivors:
+        return []
+
+    # Half a frame interval matches each survivor's own frame and no neighbour
+    tolerance = 0.5 / (frame_rate or DEFAULT_FRAME_RATE)
+    frames = _encode_at(video_path, output_dir, survivors, tolerance, max_width, keyframes_only)
+    if len(frames) != len(survivors):
+        logger.warning(
+            f"Encoded {len(frames)} of {len(survivors)} unique frames from {video_path}; "
+            "the rest could not be decoded"
+        )
+    return frames
+
+
+def _encode_at(
+    video_path: str, output_dir: str, timestamps: list, tolerance: float, max_width: int, keyframes_only: bool
+) -> list:
+    """Encode the frames at ascending `timestamps` as frame_NNNN.jpg, one input seek each.
+
+    With -ss before -i, ffmpeg seeks to the keyframe before each timestamp and
+    decodes only from there, so the cost follows the number of survivors
+    rather than the length of the video. Seeking to half a frame before the
+    timestamp makes the first frame decoded the survivor itself. Seeks run a
+    few at a time into a fresh directory; a seek that fails or yields no
+    frame is skipped, so stale files in output_dir are never picked up.
+    Returns the encoded frames in order.
+    """
+    encode_dir = tempfile.mkdtemp(prefix=".encode_", dir=output_dir)
+    skip = ["-skip_frame", "nokey"] if keyframes_only else []
+
+    def encode(k: int):
+        name = f"frame_{k + 1:04d}.jpg"
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-hide_banner", *skip,
+                    "-ss", f"{max(timestamps[k] - tolerance, 0.0):.6f}",
+                    "-i", video_path,
+                    "-frames:v", "1",
+                    "-vf", f"scale='min({max_width},iw)':-2",
+                    "-q:v", "2",
+                    "-y",
+                    os.path.join(encode_dir, name)
+                ],
+                check=True,
+                capture_output=True
+            )
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"Could not encode the frame at {timestamps[k]:.3f}s of {video_path}: {e}")
+            return None
+        source = os.path.join(encode_dir, name)
+        if not os.path.exists(source):
+            return None
+        path = posixpath.join(output_dir, name)
+        os.replace(source, path)
+        return {"path": path, "timestamp": round(timestamps[k], 3)}
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(len(timestamps), os.cpu_count() or 1)) as executor:
+            frames = list(executor.map(encode, range(len(timestamps))))
+    finally:
+        shutil.rmtree(encode_dir, ignore_errors=True)
+    return [frame for frame in frames if frame]
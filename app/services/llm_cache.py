@@ -0,0 +1,335 @@
+# app/services/llm_cache.py
+import os
+import json
+import asyncio
+import time
+import hashlib
+import sqlite3
+from app.config import LLM_CACHE_PATH, LLM_CACHE_ENABLED, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES
+from app.database import get_connection
+from app.services.openai_limiter import call_with_retry, call_with_retry_async, estimate_tokens
+from app.logging_config import setup_logging
+
+logger = setup_logging("llm_cache")
+
+_initialized_paths = set()
+
+
+def _connect(db_path=None):
+    path = db_path or LLM_CACHE_PATH
+    if path not in _initialized_paths:
+        os.makedirs(os.path.dirname(path) if os.path.dirname(path) else ".", exist_ok=True)
+    conn = get_connection(path)
+    if path not in _initialized_paths:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                total_tokens INTEGER DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER DEFAULT 0
+            )
+        """)
+        conn.commit()
+        _initialized_paths.add(path)
+    return conn
+
+
+def _bump_stats(conn, **counters):
+    for name, amount in counters.items():
+        conn.execute(
+            """INSERT INTO llm_cache_stats (name, value) VALUES (?, ?)
+               ON CONFLICT(name) DO UPDATE SET value = value + excluded.value""",
+            (name, amount)
+        )
+
+
+def make_cache_key(model: str, messages: list, params: dict) -> str:
+    """Hash model + messages + sampling params into a stable cache key."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_response(key: str, db_path=None):
+    """Return the cached entry for key, or None if missing or expired."""
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT * FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is not None and now - row["created_at"] > LLM_CACHE_TTL_SECONDS:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            row = None
+
+        if row is None:
+            _bump_stats(conn, misses=1)
+            conn.commit()
+            return None
+
+        conn.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key))
+        _bump_stats(conn, hits=1, tokens_saved=row["total_tokens"])
+        conn.commit()
+        return dict(row)
+    finally:
+        conn.close()
+
+
+def store_response(key: str, model: str, content: str, total_tokens: int = 0, db_path=None):
+    """Store a response and evict least-recently-used entries beyond the size bound."""
+    conn = _connect(db_path)
+    try:
+        now = time.time()
+        conn.execute(
+            """INSERT OR REPLACE INTO llm_cache (key, model, content, total_tokens, created_at, last_used_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (key, model, content, total_tokens, now, now)
+        )
+        count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > LLM_CACHE_MAX_ENTRIES:
+            conn.execute(
+                """DELETE FROM llm_cache WHERE key IN (
+                       SELECT key FROM llm_cache ORDER BY last_used_at ASC LIMIT ?
+                   )""",
+                (count - LLM_CACHE_MAX_ENTRIES,)
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def delete_response(key: str, db_path=None):
+    """Remove a single cached entry."""
+    conn = _connect(db_path)
+    try:
+        conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def record_upstream_usage(total_tokens: int = 0, db_path=None):
+    """Count a completion that actually went to the provider, cached or not."""
+    conn = _connect(db_path)
+    try:
+        _bump_stats(conn, upstream_calls=1, upstream_tokens=total_tokens)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def purge_expired(db_path=None) -> dict:
+    """Delete entries older than the TTL. Returns count of deleted entries."""
+    conn = _connect(db_path)
+    try:
+        cursor = conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - LLM_CACHE_TTL_SECONDS,)
+        )
+        conn.commit()
+        return {"deleted": cursor.rowcount}
+    finally:
+        conn.close()
+
+
+def get_cache_stats(db_path=None) -> dict:
+    """Return entry count plus hit/miss and saved-token counters."""
+    conn = _connect(db_path)
+    try:
+        entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        counters = {row["name"]: row["value"] for row in conn.execute("SELECT * FROM llm_cache_stats")}
+    finally:
+        conn.close()
+
+    hits = counters.get("hits", 0)
+    misses = counters.get("misses", 0)
+    lookups = hits + misses
+    return {
+        "enabled": LLM_CACHE_ENABLED,
+        "entries": entries,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        "tokens_saved": counters.get("tokens_saved", 0),
+        "upstream_calls": counters.get("upstream_calls", 0),
+        "upstream_tokens": counters.get("upstream_tokens", 0),
+    }
+
+
+def _total_tokens(response) -> int:
+    usage = getattr(response, "usage", None)
+    tokens = getattr(usage, "total_tokens", 0)
+    return tokens if isinstance(tokens, int) else 0
+
+
+def _lookup(key: str):
+    try:
+        return get_cached_response(key)
+    except sqlite3.Error as e:
+        logger.warning(f"LLM cache lookup failed: {e}")
+        return None
+
+
+def _record_call(key: str, model: str, content: str, total_tokens: int, store: bool):
+    try:
+        record_upstream_usage(total_tokens)
+        if store:
+            store_response(key, model, content, total_tokens)
+    except sqlite3.Error as e:
+        logger.warning(f"LLM cache store failed: {e}")
+
+
+def _discard(key: str):
+    try:
+        delete_response(key)
+    except sqlite3.Error as e:
+        logger.warning(f"LLM cache delete failed: {e}")
+
+
+def _parse_cached(key: str, cached: dict, parse):
+    """Parse a cache hit; an entry that no longer parses is dropped and treated as a miss."""
+    if parse is None:
+        return True, cached["content"]
+    try:
+        return True, parse(cached["content"])
+    except Exception as e:
+        logger.warning(f"Discarding unparseable LLM cache entry {key[:12]}: {e}")
+        _discard(key)
+        return False, None
+
+
+def _request_options(timeout: float = None, deadline: float = None) -> dict:
+    if deadline is not None:
+        remaining = max(0.0, deadline - time.monotonic())
+        timeout = remaining if timeout is None else min(timeout, remaining)
+    return {"timeout": timeout} if timeout is not None else {}
+
+
+def cached_chat_completion(
+    client, model: str, messages: list, use_cache: bool = True, timeout: float = None, parse=None,
+    deadline: float = None, **params
+):
+    """Run a chat completion through the response cache and return the message content.
+
+    `timeout` is a per-request transport option and is not part of the cache key.
+    `deadline` (time.monotonic() seconds) bounds the call including rate-limit
+    waits and retries; each attempt's timeout is cut to the time left.
+    With `parse`, the parsed content is returned instead, and a response is
+    only cached once it parses, so a malformed reply is retried on the next
+    call instead of being served until it expires.
+    """
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    key = make_cache_key(model, messages, params)
+
+    if use_cache:
+        cached = _lookup(key)
+        if cached is not None:
+            ok, result = _parse_cached(key, cached, parse)
+            if ok:
+                logger.info(f"LLM cache hit ({model}, {cached['total_tokens']} tokens saved)")
+                return result
+
+    response = call_with_retry(
+        lambda: client.chat.completions.create(
+            model=model, messages=messages, **_request_options(timeout, deadline), **params
+        ),
+        model, estimate_tokens(messages, params.get("max_tokens")), deadline=deadline
+    )
+    content = response.choices[0].message.content.strip()
+
+    try:
+        result = parse(content) if parse else content
+    except Exception:
+        _record_call(key, model, content, _total_tokens(response), store=False)
+        raise
+    _record_call(key, model, content, _total_tokens(response), store=use_cache)
+
+    return result
+
+
+async def cached_chat_completion_async(
+    client, model: str, messages: list, use_cache: bool = True, timeout: float = None, parse=None,
+    deadline: float = None, metrics: dict = None, **params
+):
+    """Async variant of cached_chat_completion for an AsyncOpenAI client.
+
+    Cache reads and writes are SQLite calls, so they run in a worker thread to
+    keep the event loop free. If `metrics` is given, its "upstream_calls"
+    count is incremented for each completion actually sent to the provider.
+    """
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    key = make_cache_key(model, messages, params)
+
+    if use_cache:
+        cached = await asyncio.to_thread(_lookup, key)
+        if cached is not None:
+            ok, result = await asyncio.to_thread(_parse_cached, key, cached, parse)
+            if ok:
+                logger.info(f"LLM cache hit ({model}, {cached['total_tokens']} tokens saved)")
+                return result
+
+    response = await call_with_retry_async(
+        lambda: client.chat.completions.create(
+            model=model, messages=messages, **_request_options(timeout, deadline), **params
+        ),
+        model, estimate_tokens(messages, params.get("max_tokens")), deadline=deadline
+    )
+    if metrics is not None:
+        metrics["upstream_calls"] = metrics.get("upstream_calls", 0) + 1
+    content = response.choices[0].message.content.strip()
+
+    try:
+        result = parse(content) if parse else content
+    except Exception:
+        await asyncio.to_thread(_record_call, key, model, content, _total_tokens(response), False)
+        raise
+    await asyncio.to_thread(_record_call, key, model, content, _total_tokens(response), use_cache)
+
+    return result
+
+
+async def stream_chat_completion_async(
+    client, model: str, messages: list, use_cache: bool = True, timeout: float = None, **params
+):
+    """Yield the completion text in chunks as the provider streams it.
+
+    A cache hit is yielded as one chunk. The assembled text is cached under
+    the same key as cached_chat_completion_async once the stream finishes.
+    """
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    key = make_cache_key(model, messages, params)
+
+    if use_cache:
+        cached = await asyncio.to_thread(_lookup, key)
+        if cached is not None:
+            logger.info(f"LLM cache hit ({model}, {cached['total_tokens']} tokens saved)")
+            yield cached["content"]
+            return
+
+    stream = await call_with_retry_async(
+        lambda: client.chat.completions.create(
+            model=model, messages=messages, stream=True,
+            stream_options={"include_usage": True}, **_request_options(timeout), **params
+        ),
+        model, estimate_tokens(messages, params.get("max_tokens"))
+    )
+    parts = []
+    total_tokens = 0
+    async for chunk in stream:
+        total_tokens = _total_tokens(chunk) or total_tokens
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if text:
+            parts.append(text)
+            yield text
+
+    await asyncio.to_thread(_record_call, key, model, "".join(parts).strip(), total_tokens, use_cache)
@@ -0,0 +1,76 @@
+# app/services/openai_client.py
+import asyncio
+import threading
+import weakref
+import httpx
+import openai
+from app.config import (
+    OPENAI_API_KEY, OPENAI_MAX_CONNECTIONS, OPENAI_ASYNC_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS, OPENAI_TIMEOUT_SECONDS, OPENAI_CONNECT_TIMEOUT_SECONDS,
+    OPENAI_MAX_RETRIES
+)
+
+_lock = threading.Lock()
+_sync_client = None
+# httpx async pools are bound to the event loop that opened their connections
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _limits(max_connections: int = None) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections or OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY_SECONDS
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS)
+
+
+def get_openai_client() -> openai.OpenAI:
+    """Return the process-wide sync OpenAI client with a pooled keep-alive connection pool."""
+    global _sync_client
+    if _sync_client is None:
+        with _lock:
+            if _sync_client is None:
+                _sync_client = openai.OpenAI(
+                    api_key=OPENAI_API_KEY,
+                    timeout=_timeout(),
+                    max_retries=OPENAI_MAX_RETRIES,
+                    http_client=openai.DefaultHttpxClient(limits=_limits(), timeout=_timeout())
+                )
+    return _sync_client
+
+
+def get_async_openai_client() -> openai.AsyncOpenAI:
+    """Return the async OpenAI client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            timeout=_timeout(),
+            max_retries=OPENAI_MAX_RETRIES,
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=_limits(OPENAI_ASYNC_MAX_CONNECTIONS), timeout=_timeout()
+            )
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def close_openai_clients():
+    """Close the shared sync client. Async clients are closed with their event loop."""
+    global _sync_client
+    with _lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+
+
+async def close_async_openai_client():
+    """Close the async client belonging to the running event loop, if any."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
@@ -0,0 +1,265 @@
+# app/services/openai_limiter.py
+import os
+import math
+import time
+import random
+import asyncio
+import openai
+from app.config import (
+    OPENAI_LIMITER_PATH, OPENAI_MODEL_LIMITS, OPENAI_LIMIT_HEADROOM,
+    OPENAI_THROTTLE_RECOVERY_PER_MINUTE, OPENAI_RETRY_ATTEMPTS,
+    OPENAI_RETRY_BASE_DELAY, OPENAI_RETRY_MAX_DELAY
+)
+from app.database import get_connection
+from app.logging_config import setup_logging
+
+logger = setup_logging("openai_limiter")
+
+# Requests and tokens per minute. A limit of 0 means unlimited.
+DEFAULT_MODEL_LIMITS = {
+    "gpt-4o": {"rpm": 500, "tpm": 30000},
+    "whisper-1": {"rpm": 50, "tpm": 0},
+    "text-embedding-3-small": {"rpm": 3000, "tpm": 1000000},
+}
+FALLBACK_LIMITS = {"rpm": 500, "tpm": 30000}
+
+# Fraction of the configured rate kept after each 429, and the floor it can drop to
+THROTTLE_BACKOFF_FACTOR = 0.5
+MIN_THROTTLE_SCALE = 0.1
+
+# Flat token estimates per image part, by detail level, for images of unknown size
+IMAGE_TOKEN_ESTIMATES = {"low": 85, "high": 765, "auto": 765}
+
+# High detail is billed per 512px tile once the image is fitted within
+# 2048x2048 and its short side scaled down to 768
+HIGH_DETAIL_MAX_SIDE = 2048
+HIGH_DETAIL_SHORT_SIDE = 768
+HIGH_DETAIL_TILE_SIZE = 512
+HIGH_DETAIL_TILE_TOKENS = 170
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+_initialized_paths = set()
+
+
+class DeadlineExceeded(TimeoutError):
+    """A call could not be made or retried before the caller's deadline."""
+
+
+def _parse_model_limits(raw: str) -> dict:
+    """Parse "model=rpm:tpm,model=rpm:tpm" overrides on top of the defaults."""
+    limits = {model: dict(values) for model, values in DEFAULT_MODEL_LIMITS.items()}
+    for entry in raw.split(","):
+        if "=" not in entry:
+            continue
+        model, values = entry.strip().split("=", 1)
+        rpm, _, tpm = values.partition(":")
+        limits[model] = {"rpm": int(rpm or 0), "tpm": int(tpm or 0)}
+    return limits
+
+
+MODEL_LIMITS = _parse_model_limits(OPENAI_MODEL_LIMITS)
+
+
+def _connect(db_path=None):
+    path = db_path or OPENAI_LIMITER_PATH
+    if path not in _initialized_paths:
+        os.makedirs(os.path.dirname(path) if os.path.dirname(path) else ".", exist_ok=True)
+    conn = get_connection(path)
+    conn.isolation_level = None
+    if path not in _initialized_paths:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                model TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                level REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (model, kind)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS throttle (
+                model TEXT PRIMARY KEY,
+                scale REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        _initialized_paths.add(path)
+    return conn
+
+
+def _current_scale(conn, model: str, now: float) -> float:
+    row = conn.execute("SELECT scale, updated_at FROM throttle WHERE model = ?", (model,)).fetchone()
+    if row is None:
+        return 1.0
+    recovered = (now - row["updated_at"]) / 60 * OPENAI_THROTTLE_RECOVERY_PER_MINUTE
+    return min(1.0, row["scale"] + recovered)
+
+
+def estimate_tokens(messages: list, max_tokens: int = None) -> int:
+    """Rough pre-flight token cost: ~4 chars per token for text, flat cost per image."""
+    chars = 0
+    image_tokens = 0
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, str):
+            chars += len(content)
+            continue
+        for part in content:
+            if part.get("type") == "text":
+                chars += len(part.get("text", ""))
+            elif part.get("type") == "image_url":
+                detail = part.get("image_url", {}).get("detail", "auto")
+                image_tokens += IMAGE_TOKEN_ESTIMATES.get(detail, IMAGE_TOKEN_ESTIMATES["auto"])
+    return chars // 4 + image_tokens + (max_tokens or 0)
+
+
+def image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """Prompt tokens for a width x height image part: 85 at low detail, 85 + 170 per tile at high."""
+    base = IMAGE_TOKEN_ESTIMATES["low"]
+    if detail == "low" or not (width and height):
+        return base
+    scale = min(1.0, HIGH_DETAIL_MAX_SIDE / max(width, height))
+    scale *= min(1.0, HIGH_DETAIL_SHORT_SIDE / (min(width, height) * scale))
+    tiles = math.ceil(width * scale / HIGH_DETAIL_TILE_SIZE) * math.ceil(height * scale / HIGH_DETAIL_TILE_SIZE)
+    return base + HIGH_DETAIL_TILE_TOKENS * tiles
+
+
+def acquire(model: str, tokens: int = 0, db_path=None) -> float:
+    """Reserve one request and `tokens` tokens for model.
+
+    Buckets are shared through SQLite so every worker process draws from the
+    same budget. Reservations may drive a bucket negative; the return value is
+    how long the caller must wait for the debt to refill.
+    """
+    limits = MODEL_LIMITS.get(model, FALLBACK_LIMITS)
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        scale = _current_scale(conn, model, now)
+        wait = 0.0
+        for kind, cost in (("rpm", 1), ("tpm", tokens)):
+            if not limits.get(kind):
+                continue
+            capacity = limits[kind] * OPENAI_LIMIT_HEADROOM * scale
+            refill_per_second = capacity / 60
+            row = conn.execute(
+                "SELECT level, updated_at FROM buckets WHERE model = ? AND kind = ?", (model, kind)
+            ).fetchone()
+            if row is None:
+                level = capacity
+            else:
+                level = min(capacity, row["level"] + (now - row["updated_at"]) * refill_per_second)
+            level -= min(cost, capacity)
+            if level < 0:
+                wait = max(wait, -level / refill_per_second)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (model, kind, level, updated_at) VALUES (?, ?, ?, ?)",
+                (model, kind, level, now)
+            )
+        conn.execute("COMMIT")
+        return wait
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def record_rate_limited(model: str, db_path=None):
+    """Shrink the model's effective rate after a 429 so all workers slow down."""
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        scale = max(MIN_THROTTLE_SCALE, _current_scale(conn, model, now) * THROTTLE_BACKOFF_FACTOR)
+        conn.execute(
+            "INSERT OR REPLACE INTO throttle (model, scale, updated_at) VALUES (?, ?, ?)",
+            (model, scale, now)
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    logger.warning(f"Rate limited on {model}, throttling to {scale:.0%} of configured limits")
+
+
+def _retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def retry_delay(error, attempt: int) -> float:
+    """Honour Retry-After when present, otherwise full-jitter exponential backoff."""
+    retry_after = _retry_after_seconds(error)
+    if retry_after is not None:
+        return min(OPENAI_RETRY_MAX_DELAY, retry_after) + random.uniform(0, OPENAI_RETRY_BASE_DELAY)
+    return random.uniform(0, min(OPENAI_RETRY_MAX_DELAY, OPENAI_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _check_deadline(deadline, delay: float, model: str):
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        raise DeadlineExceeded(f"{model} call would wait {delay:.1f}s, past its deadline")
+
+
+def call_with_retry(fn, model: str, estimated_tokens: int = 0, deadline: float = None):
+    """Call fn() once the shared buckets allow it, retrying transient OpenAI errors.
+
+    With a `deadline` (time.monotonic() seconds), no wait or retry starts that
+    would run past it; the last error is raised instead.
+    """
+    for attempt in range(OPENAI_RETRY_ATTEMPTS + 1):
+        wait = acquire(model, estimated_tokens)
+        if wait > 0:
+            _check_deadline(deadline, wait, model)
+            time.sleep(wait)
+        try:
+            return fn()
+        except RETRYABLE_ERRORS as e:
+            if attempt == OPENAI_RETRY_ATTEMPTS:
+                raise
+            if isinstance(e, openai.RateLimitError):
+                record_rate_limited(model)
+            delay = retry_delay(e, attempt)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            logger.warning(f"{model} call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+async def call_with_retry_async(fn, model: str, estimated_tokens: int = 0, deadline: float = None):
+    """Async variant of call_with_retry; fn returns an awaitable."""
+    for attempt in range(OPENAI_RETRY_ATTEMPTS + 1):
+        wait = await asyncio.to_thread(acquire, model, estimated_tokens)
+        if wait > 0:
+            _check_deadline(deadline, wait, model)
+            await asyncio.sleep(wait)
+        try:
+            return await fn()
+        except RETRYABLE_ERRORS as e:
+            if attempt == OPENAI_RETRY_ATTEMPTS:
+                raise
+            if isinstance(e, openai.RateLimitError):
+                await asyncio.to_thread(record_rate_limited, model)
+            delay = retry_delay(e, attempt)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            logger.warning(f"{model} call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
@@ -1,52 +1,108 @@
 # app/services/qa.py
 import json
-import openai
-from app.config import OPENAI_API_KEY
+import asyncio
+from app.services.openai_client import get_openai_client, get_async_openai_client
+from app.services.llm_cache import (
+    cached_chat_completion, cached_chat_completion_async, stream_chat_completion_async
+)
+from app.services.streaming import METADATA_MARKER, split_metadata, parse_metadata
+from app.logging_config import setup_logging
 
+logger = setup_logging("qa")
 
-def answer_question(question: str, transcript: str, visual_analysis: list, chapters: list) -> dict:
-    """Answer a question about a processed video using transcript and visual context."""
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
+SYSTEM_PROMPT = (
+    "You answer questions about videos based on their transcript and visual analysis. "
+    "Return a JSON object with:\n"
+    '- "answer": Your answer to the question (2-3 sentences)\n'
+    '- "relevant_timestamps": Array of relevant timestamp strings (e.g., ["5:02", "5:15"])\n'
+    '- "relevant_frames": Array of frame paths if visual frames are relevant, else empty array\n'
+    "Return ONLY valid JSON, no markdown."
+)
 
-    # Build context from visual analysis
-    visual_context = ""
-    if visual_analysis:
-        visual_lines = []
-        for frame in visual_analysis:
-            ts = frame.get("timestamp", 0)
-            desc = frame.get("description", "")
-            visual_lines.append(f"[{_seconds_to_timestamp(ts)}] {desc}")
-        visual_context = "\n\nVisual observations:\n" + "\n".join(visual_lines)
+STREAM_SYSTEM_PROMPT = (
+    "You answer questions about videos based on their transcript and visual analysis. "
+    "First write your answer to the question as plain text (2-3 sentences). "
+    f"Then write {METADATA_MARKER} on its own line, followed by a JSON object with:\n"
+    '- "relevant_timestamps": Array of relevant timestamp strings (e.g., ["5:02", "5:15"])\n'
+    '- "relevant_frames": Array of frame paths if visual frames are relevant, else empty array\n'
+    "Write nothing after the JSON."
+)
+
+
+BATCH_SYSTEM_PROMPT = (
+    "You answer several questions about one video based on its transcript and visual analysis. "
+    'Return a JSON object with "answers": an array with one object per question, in the order asked, each with:\n'
+    '- "question": The question number\n'
+    '- "answer": Your answer to the question (2-3 sentences)\n'
+    '- "relevant_timestamps": Array of relevant timestamp strings (e.g., ["5:02", "5:15"])\n'
+    '- "relevant_frames": Array of frame paths if visual frames are relevant, else empty array\n'
+    "Return ONLY valid JSON, no markdown."
+)
+# Completion tokens reserved per question in a batched call
+BATCH_TOKENS_PER_QUESTION = 300
+
+
+def _passage_context(passages: list) -> str:
+    lines = []
+    for p in passages:
+        if p["kind"] == "visual":
+            frame = f" (frame: {p['frame_path']})" if p.get("frame_path") else ""
+            lines.append(f"[{_seconds_to_timestamp(p['start'])}] On screen{frame}: {p['text']}")
+        else:
+            lines.append(f"[{_seconds_to_timestamp(p['start'])}-{_seconds_to_timestamp(p['end'])}] {p['text']}")
+    return "Relevant excerpts:\n" + "\n".join(lines)
+
+
+def _context(transcript: str, visual_analysis: list, chapters: list, passages: list = None) -> str:
+    if passages is not None:
+        # Retrieved passages already include the relevant visual observations
+        context = _passage_context(passages)
+    else:
+        context = f"Transcript:\n{transcript[:6000]}"
+        # Build context from visual analysis
+        if visual_analysis:
+            visual_lines = []
+            for frame in visual_analysis:
+                ts = frame.get("timestamp", 0)
+                desc = frame.get("description", "")
+                visual_lines.append(f"[{_seconds_to_timestamp(ts)}] {desc}")
+            context += "\n\nVisual observations:\n" + "\n".join(visual_lines)
 
-    chapter_context = ""
     if chapters:
         chapter_lines = [f"- {ch.get('start', '')} to {ch.get('end', '')}: {ch.get('title', '')}" for ch in chapters]
-        chapter_context = "\n\nChapters:\n" + "\n".join(chapter_lines)
+        context += "\n\nChapters:\n" + "\n".join(chapter_lines)
+    return context
+
+
+def _build_messages(
+    question: str, transcript: str, visual_analysis: list, chapters: list, passages: list = None,
+    stream: bool = False
+) -> list:
+    context = _context(transcript, visual_analysis, chapters, passages)
+    return [
+        {"role": "system", "content": STREAM_SYSTEM_PROMPT if stream else SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": f"{context}\n\nQuestion: {question}"
+        }
+    ]
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You answer questions about videos based on their transcript and visual analysis. "
-                    "Return a JSON object with:\n"
-                    '- "answer": Your answer to the question (2-3 sentences)\n'
-                    '- "relevant_timestamps": Array of relevant timestamp strings (e.g., ["5:02", "5:15"])\n'
-                    '- "relevant_frames": Array of frame paths if visual frames are relevant, else empty array\n'
-                    "Return ONLY valid JSON, no markdown."
-                )
-            },
-            {
-                "role": "user",
-                "content": f"Transcript:\n{transcript[:6000]}{visual_context}{chapter_context}\n\nQuestion: {question}"
-            }
-        ],
-        temperature=0.3,
-        max_tokens=500
-    )
 
-    raw = response.choices[0].message.content.strip()
+def _build_batch_messages(
+    questions: list, transcript: str, visual_analysis: list, chapters: list, passages: list = None
+) -> list:
+    numbered = "\n".join(f"{i}. {q}" for i, q in enumerate(questions, 1))
+    context = _context(transcript, visual_analysis, chapters, passages)
+    return [
+        {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": f"{context}\n\nQuestions:\n{numbered}"
+        }
+    ]
+
+
+def _parse_answer(raw: str) -> dict:
     if raw.startswith("```"):
         raw = raw.split("\n", 1)[1].rsplit("```", 1)[0]
 
@@ -59,6 +115,201 @@ def answer_question(question: str, transcript: str, visual_analysis: list, chapt
     }
 
 
+def answer_question(
+    question: str,
+    transcript: str,
+    visual_analysis: list,
+    chapters: list,
+    use_cache: bool = True,
+    passages: list = None
+) -> dict:
+    """Answer a question about a processed video using transcript and visual context.
+
+    When `passages` (from retrieval.search_passages) is given, only those
+    timestamped excerpts are sent instead of the transcript head.
+    """
+    client = get_openai_client()
+
+    return cached_chat_completion(
+        client,
+        model="gpt-4o",
+        messages=_build_messages(question, transcript, visual_analysis, chapters, passages),
+        temperature=0.3,
+        max_tokens=500,
+        use_cache=use_cache,
+        parse=_parse_answer
+    )
+
+
+async def answer_question_async(
+    question: str,
+    transcript: str,
+    visual_analysis: list,
+    chapters: list,
+    use_cache: bool = True,
+    passages: list = None,
+    metrics: dict = None
+) -> dict:
+    """Async variant of answer_question for use from async routes.
+
+    `metrics` counts upstream calls as in cached_chat_completion_async.
+    """
+    client = get_async_openai_client()
+
+    return await cached_chat_completion_async(
+        client,
+        model="gpt-4o",
+        messages=_build_messages(question, transcript, visual_analysis, chapters, passages),
+        temperature=0.3,
+        max_tokens=500,
+        use_cache=use_cache,
+        parse=_parse_answer,
+        metrics=metrics
+    )
+
+
+def _parse_batch(raw: str, count: int) -> list:
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[1].rsplit("```", 1)[0]
+
+    data = json.loads(raw)
+    answers = data.get("answers") if isinstance(data, dict) else data
+    by_number = {}
+    for position, item in enumerate(answers if isinstance(answers, list) else [], 1):
+        if not isinstance(item, dict) or not isinstance(item.get("answer"), str) or not item["answer"].strip():
+            continue
+        try:
+            number = int(item.get("question", position))
+        except (TypeError, ValueError):
+            number = position
+        by_number.setdefault(number, item)
+
+    return [
+        {
+            "answer": by_number[i]["answer"],
+            "relevant_timestamps": by_number[i].get("relevant_timestamps", []),
+            "relevant_frames": by_number[i].get("relevant_frames", [])
+        } if i in by_number else None
+        for i in range(1, count + 1)
+    ]
+
+
+async def answer_questions_async(
+    questions: list,
+    transcript: str,
+    visual_analysis: list,
+    chapters: list,
+    use_cache: bool = True,
+    passages: list = None,
+    metrics: dict = None
+) -> list:
+    """Answer several questions against one shared context in a single call.
+
+    Returns one result per question, in order, each shaped like answer_question's.
+    Questions the model skipped, or all of them if its reply is not valid JSON,
+    are asked again one by one. `metrics` counts upstream calls as in
+    cached_chat_completion_async.
+    """
+    if len(questions) == 1:
+        return [await answer_question_async(
+            questions[0], transcript, visual_analysis, chapters, use_cache, passages, metrics
+        )]
+
+    client = get_async_openai_client()
+
+    try:
+        results = await cached_chat_completion_async(
+            client,
+            model="gpt-4o",
+            messages=_build_batch_messages(questions, transcript, visual_analysis, chapters, passages),
+            temperature=0.3,
+            max_tokens=BATCH_TOKENS_PER_QUESTION * len(questions) + 200,
+            use_cache=use_cache,
+            parse=lambda raw: _parse_batch(raw, len(questions)),
+            metrics=metrics
+        )
+    except ValueError as e:
+        logger.warning(f"Unreadable batch answer for {len(questions)} questions, asking each separately: {e}")
+        results = [None] * len(questions)
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    retried = await asyncio.gather(*[
+        answer_question_async(questions[i], transcript, visual_analysis, chapters, use_cache, passages, metrics)
+        for i in missing
+    ])
+    for i, result in zip(missing, retried):
+        results[i] = result
+    return results
+
+
+def merge_passages(passage_lists: list) -> list:
+    """Union of several retrieved passage lists, deduplicated, in timeline order."""
+    merged = {}
+    for passages in passage_lists:
+        for p in passages:
+            merged.setdefault((p["kind"], p["start"], p["text"]), p)
+    return sorted(merged.values(), key=lambda p: (p["start"], p["kind"]))
+
+
+def plan_batches(passage_lists: list, max_passages: int, max_questions: int) -> list:
+    """Group question indices so each group's merged passages stay within max_passages.
+
+    Questions are taken in order; a question joins the current group while
+    the union of passages fits, otherwise it starts a new group.
+    """
+    groups = []
+    current = []
+    union = set()
+    for i, passages in enumerate(passage_lists):
+        keys = {(p["kind"], p["start"], p["text"]) for p in passages}
+        if current and (len(union | keys) > max_passages or len(current) >= max_questions):
+            groups.append(current)
+            current = []
+            union = set()
+        current.append(i)
+        union |= keys
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def stream_answer(
+    question: str,
+    transcript: str,
+    visual_analysis: list,
+    chapters: list,
+    use_cache: bool = True,
+    passages: list = None
+):
+    """Stream an answer: yields ("delta", text) as tokens arrive, then ("done", result).
+
+    The final result has the same shape as answer_question's.
+    """
+    client = get_async_openai_client()
+    chunks = stream_chat_completion_async(
+        client,
+        model="gpt-4o",
+        messages=_build_messages(question, transcript, visual_analysis, chapters, passages, stream=True),
+        temperature=0.3,
+        max_tokens=500,
+        use_cache=use_cache
+    )
+
+    parts = []
+    async for kind, text in split_metadata(chunks):
+        if kind == "text":
+            parts.append(text)
+            yield "delta", text
+        else:
+            metadata = parse_metadata(text)
+
+    yield "done", {
+        "answer": "".join(parts).strip(),
+        "relevant_timestamps": metadata.get("relevant_timestamps", []),
+        "relevant_frames": metadata.get("relevant_frames", [])
+    }
+
+
 def _seconds_to_timestamp(seconds: float) -> str:
     m = int(seconds // 60)
     s = int(seconds % 60)
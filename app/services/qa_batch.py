@@ -0,0 +1,74 @@
+# app/services/qa_batch.py
+import json
+import asyncio
+from app.config import QA_CACHE_ENABLED, QA_BATCH_MAX_QUESTIONS, QA_BATCH_MAX_PASSAGES
+from app.services.answer_cache import question_key, lookup_answer, remember_answer
+from app.services.qa import answer_questions_async, merge_passages, plan_batches
+from app.services.retrieval import retrieve_for_job
+
+
+async def answer_batch(db_path, job: dict, questions: list, use_cache: bool = True) -> dict:
+    """Answer many questions about one completed job with as few model calls as possible.
+
+    Repeated questions (after normalization) are answered once and cached
+    answers are reused. The rest are grouped so that each group's merged
+    retrieved passages fit in one prompt; groups run in parallel. Jobs without
+    timestamped segments share the transcript context instead.
+
+    Returns {"answers": [...] in request order, "model_calls": int}, where
+    model_calls counts only requests that actually reached the provider.
+    """
+    use_answer_cache = use_cache and QA_CACHE_ENABLED
+    unique = {}
+    for question in questions:
+        unique.setdefault(question_key(question), question)
+
+    results = {}
+    pending = []
+    for key, question in unique.items():
+        cached = await asyncio.to_thread(lookup_answer, db_path, job["id"], question) if use_answer_cache else None
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending.append(key)
+
+    metrics = {"upstream_calls": 0}
+    if pending:
+        pending_questions = [unique[key] for key in pending]
+        # One thread for all lookups so a job indexed lazily is only indexed once
+        passage_lists = await asyncio.to_thread(
+            lambda: [retrieve_for_job(db_path, job, q) for q in pending_questions]
+        )
+        if passage_lists[0] is None:
+            groups = [
+                list(range(start, min(start + QA_BATCH_MAX_QUESTIONS, len(pending))))
+                for start in range(0, len(pending), QA_BATCH_MAX_QUESTIONS)
+            ]
+        else:
+            groups = plan_batches(passage_lists, QA_BATCH_MAX_PASSAGES, QA_BATCH_MAX_QUESTIONS)
+
+        visual_analysis = json.loads(job["visual_analysis"] or "[]")
+        chapters = json.loads(job["chapters"] or "[]")
+        group_answers = await asyncio.gather(*[
+            answer_questions_async(
+                [pending_questions[i] for i in group],
+                transcript=job["transcript_text"],
+                visual_analysis=visual_analysis,
+                chapters=chapters,
+                use_cache=use_cache,
+                passages=None if passage_lists[0] is None else merge_passages([passage_lists[i] for i in group]),
+                metrics=metrics
+            )
+            for group in groups
+        ])
+
+        for group, answers in zip(groups, group_answers):
+            for i, answer in zip(group, answers):
+                results[pending[i]] = answer
+                if use_answer_cache and answer["answer"]:
+                    await asyncio.to_thread(remember_answer, db_path, job["id"], pending_questions[i], answer)
+
+    return {
+        "answers": [dict(question=q, **results[question_key(q)]) for q in questions],
+        "model_calls": metrics["upstream_calls"],
+    }
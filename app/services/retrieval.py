@@ -0,0 +1,218 @@
+# app/services/retrieval.py
+import re
+import json
+import math
+from collections import Counter
+from app.database import get_connection
+from app.services.embeddings import store_job_embeddings, rank_job_passages
+from app.config import RETRIEVAL_WINDOW_SECONDS, RETRIEVAL_WINDOW_CHARS, RETRIEVAL_TOP_K, RETRIEVAL_EMBEDDINGS
+from app.logging_config import setup_logging
+
+logger = setup_logging("retrieval")
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+# Reciprocal rank fusion constant for combining BM25 and embedding rankings
+RRF_K = 60
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "do", "does", "for", "from",
+    "how", "i", "in", "is", "it", "of", "on", "or", "so", "that", "the", "this", "to",
+    "was", "what", "when", "where", "which", "who", "why", "with", "you",
+}
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def build_passages(segments: list, visual_analysis: list) -> list:
+    """Split a job into retrievable passages.
+
+    Consecutive transcript segments are grouped into windows of at most
+    RETRIEVAL_WINDOW_SECONDS and RETRIEVAL_WINDOW_CHARS; each visual
+    description is its own passage. Passages are ordered by start time.
+    """
+    passages = []
+    window = []
+    for seg in segments:
+        if window:
+            duration = seg["end"] - window[0]["start"]
+            chars = sum(len(s["text"]) for s in window) + len(seg["text"])
+            if duration > RETRIEVAL_WINDOW_SECONDS or chars > RETRIEVAL_WINDOW_CHARS:
+                passages.append(_transcript_passage(window))
+                window = []
+        window.append(seg)
+    if window:
+        passages.append(_transcript_passage(window))
+
+    for frame in visual_analysis:
+        if not frame.get("description") or frame["description"] == "Analysis failed":
+            continue
+        passages.append({
+            "kind": "visual",
+            "start": float(frame.get("timestamp", 0)),
+            "end": float(frame.get("timestamp", 0)),
+            "text": frame["description"],
+            "frame_path": frame.get("frame_path", ""),
+        })
+
+    return sorted(passages, key=lambda p: (p["start"], p["kind"]))
+
+
+def _transcript_passage(window: list) -> dict:
+    return {
+        "kind": "transcript",
+        "start": float(window[0]["start"]),
+        "end": float(window[-1]["end"]),
+        "text": " ".join(s["text"].strip() for s in window),
+        "frame_path": "",
+    }
+
+
+def index_job(db_path, job_id: str, segments: list, visual_analysis: list) -> int:
+    """(Re)build the retrieval index for a job. Returns the number of passages."""
+    passages = build_passages(segments, visual_analysis)
+    rows = []
+    for i, p in enumerate(passages):
+        terms = tokenize(p["text"])
+        rows.append((job_id, i, p["kind"], p["start"], p["end"], p["text"], p["frame_path"],
+                     json.dumps(Counter(terms)), len(terms)))
+
+    conn = get_connection(db_path)
+    try:
+        conn.execute("DELETE FROM job_passages WHERE job_id = ?", (job_id,))
+        conn.executemany(
+            """INSERT INTO job_passages (job_id, position, kind, start_time, end_time, text, frame_path, terms, length)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            rows
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    if RETRIEVAL_EMBEDDINGS and passages:
+        store_job_embeddings(db_path, job_id, [p["text"] for p in passages])
+    return len(passages)
+
+
+def build_job_embeddings(db_path, job: dict) -> int:
+    """Embed a job straight from its transcript_segments and visual_analysis columns.
+
+    Rows follow build_passages, so they line up with the job's job_passages.
+    Returns the number of rows stored.
+    """
+    passages = build_passages(
+        json.loads(job["transcript_segments"] or "[]"),
+        json.loads(job["visual_analysis"] or "[]")
+    )
+    if passages:
+        store_job_embeddings(db_path, job["id"], [p["text"] for p in passages])
+    return len(passages)
+
+
+def _load_passages(db_path, job_id: str) -> list:
+    conn = get_connection(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT * FROM job_passages WHERE job_id = ? ORDER BY position", (job_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def bm25_scores(query_terms: list, passages: list) -> list:
+    """BM25 score of every passage for the query terms."""
+    if not passages:
+        return []
+    term_counts = [json.loads(p["terms"]) for p in passages]
+    avg_length = sum(p["length"] for p in passages) / len(passages) or 1
+    doc_freq = Counter(term for counts in term_counts for term in counts)
+
+    scores = []
+    for p, counts in zip(passages, term_counts):
+        score = 0.0
+        for term in set(query_terms):
+            tf = counts.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(passages) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * p["length"] / avg_length))
+        scores.append(score)
+    return scores
+
+
+def _fuse(rankings: list) -> dict:
+    fused = Counter()
+    for ranking in rankings:
+        for rank, index in enumerate(ranking):
+            fused[index] += 1 / (RRF_K + rank + 1)
+    return fused
+
+
+def search_passages(db_path, job_id: str, question: str, k: int = None) -> list:
+    """Return the top-k passages of a job for a question, in timeline order.
+
+    Passages are ranked by BM25; when embeddings are enabled and stored for
+    the job, the BM25 and embedding rankings are merged by reciprocal rank fusion.
+    """
+    k = k or RETRIEVAL_TOP_K
+    passages = _load_passages(db_path, job_id)
+    if not passages:
+        return []
+
+    scores = bm25_scores(tokenize(question), passages)
+    bm25_ranking = [i for i in sorted(range(len(passages)), key=lambda i: -scores[i]) if scores[i] > 0]
+    rankings = [bm25_ranking]
+
+    if RETRIEVAL_EMBEDDINGS:
+        try:
+            dense_ranking = rank_job_passages(db_path, job_id, question, expected_rows=len(passages))
+            if dense_ranking:
+                rankings.append(dense_ranking)
+        except Exception as e:
+            logger.warning(f"Embedding retrieval failed for {job_id}, using BM25 only: {e}")
+
+    fused = _fuse(rankings)
+    top = [i for i, _ in fused.most_common(k)]
+    if not top:
+        # Nothing matched lexically: fall back to the start of the video
+        top = list(range(min(k, len(passages))))
+
+    return [
+        {
+            "kind": passages[i]["kind"],
+            "start": passages[i]["start_time"],
+            "end": passages[i]["end_time"],
+            "text": passages[i]["text"],
+            "frame_path": passages[i]["frame_path"],
+        }
+        for i in sorted(top, key=lambda i: passages[i]["start_time"])
+    ]
+
+
+def retrieve_for_job(db_path, job: dict, question: str, k: int = None):
+    """search_passages for a completed job, indexing it first if it predates the index.
+
+    Returns None when the job has no timestamped segments to retrieve from, so
+    callers can fall back to the full transcript.
+    """
+    segments = json.loads(job["transcript_segments"] or "[]")
+    if not segments:
+        return None
+    if not _has_index(db_path, job["id"]):
+        index_job(db_path, job["id"], segments, json.loads(job["visual_analysis"] or "[]"))
+    return search_passages(db_path, job["id"], question, k)
+
+
+def _has_index(db_path, job_id: str) -> bool:
+    conn = get_connection(db_path)
+    try:
+        return conn.execute(
+            "SELECT 1 FROM job_passages WHERE job_id = ? LIMIT 1", (job_id,)
+        ).fetchone() is not None
+    finally:
+        conn.close()
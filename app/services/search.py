@@ -0,0 +1,112 @@
+# app/services/search.py
+import re
+from app.database import get_connection
+
+SNIPPET_TOKENS = 12
+MAX_QUERY_TERMS = 16
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _phrase(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _owner_filter(user_id: str) -> str:
+    return f"user_id : {_phrase(user_id)}"
+
+
+def build_match_query(query: str):
+    """Turn free text into an FTS5 expression: every word must appear in the text column.
+
+    Returns None when the query has no searchable words. Operators typed by the
+    caller are treated as plain words, never as FTS5 syntax.
+    """
+    terms = _TOKEN_RE.findall(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return " AND ".join(f"text : {_phrase(term)}" for term in terms)
+
+
+def add_job_to_search(db_path, job_id: str, user_id: str, segments: list, visual_analysis: list) -> int:
+    """(Re)index a job's transcript segments and frame descriptions. Returns rows written."""
+    rows = [
+        (seg["text"].strip(), user_id or "", job_id, "transcript", float(seg["start"]), "")
+        for seg in segments if seg.get("text", "").strip()
+    ]
+    rows += [
+        (frame["description"], user_id or "", job_id, "visual", float(frame.get("timestamp", 0)),
+         frame.get("frame_path", ""))
+        for frame in visual_analysis
+        if frame.get("description") and frame["description"] != "Analysis failed"
+    ]
+
+    conn = get_connection(db_path)
+    try:
+        _delete_job(conn, job_id)
+        conn.executemany(
+            """INSERT INTO search_index (text, user_id, job_id, kind, start_time, frame_path)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            rows
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def remove_job_from_search(db_path, job_id: str):
+    conn = get_connection(db_path)
+    try:
+        _delete_job(conn, job_id)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _delete_job(conn, job_id: str):
+    # job_id is an indexed column so this is an index lookup, not a table scan
+    conn.execute(
+        "DELETE FROM search_index WHERE rowid IN (SELECT rowid FROM search_index WHERE search_index MATCH ?)",
+        (f"job_id : {_phrase(job_id)}",)
+    )
+
+
+def search_jobs(db_path, user_id: str, query: str, limit: int = 20) -> list:
+    """Rank a user's indexed passages for a query by BM25.
+
+    The owner is part of the MATCH expression, so only that user's rows are
+    ever scored. Returns [{"job_id", "video_title", "kind", "timestamp",
+    "frame_path", "snippet"}], best first; matched words in the snippet are
+    wrapped in [ ].
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+
+    conn = get_connection(db_path)
+    try:
+        rows = conn.execute(
+            f"""SELECT s.job_id, s.kind, s.start_time, s.frame_path,
+                       snippet(search_index, 0, '[', ']', '...', {SNIPPET_TOKENS}) AS snippet,
+                       j.video_title
+                FROM search_index s
+                LEFT JOIN jobs j ON j.id = s.job_id
+                WHERE search_index MATCH ?
+                ORDER BY bm25(search_index, 1.0, 0.0, 0.0)
+                LIMIT ?""",
+            (f"{_owner_filter(user_id)} AND {match}", limit)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {
+            "job_id": row["job_id"],
+            "video_title": row["video_title"] or "",
+            "kind": row["kind"],
+            "timestamp": row["start_time"],
+            "frame_path": row["frame_path"],
+            "snippet": row["snippet"],
+        }
+        for row in rows
+    ]
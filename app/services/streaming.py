@@ -0,0 +1,72 @@
+# app/services/streaming.py
+import json
+from app.logging_config import setup_logging
+
+logger = setup_logging("streaming")
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Streamed completions write free text first, then this marker, then a JSON
+# object with the structured fields.
+METADATA_MARKER = "@@METADATA@@"
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def split_metadata(chunks):
+    """Split a streamed completion at METADATA_MARKER.
+
+    Yields ("text", str) pieces as soon as they are known not to be part of
+    the marker, then a single ("metadata", str) with everything after it.
+    """
+    buffer = ""
+    hold = len(METADATA_MARKER) - 1
+    async for chunk in chunks:
+        buffer += chunk
+        index = buffer.find(METADATA_MARKER)
+        if index >= 0:
+            if buffer[:index]:
+                yield "text", buffer[:index]
+            metadata = buffer[index + len(METADATA_MARKER):]
+            async for rest in chunks:
+                metadata += rest
+            yield "metadata", metadata
+            return
+        if len(buffer) > hold:
+            yield "text", buffer[:-hold]
+            buffer = buffer[-hold:]
+    if buffer:
+        yield "text", buffer
+    yield "metadata", ""
+
+
+def parse_metadata(raw: str) -> dict:
+    """Parse the JSON after the marker; a malformed tail yields {} rather than failing the stream."""
+    raw = raw.strip()
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[-1].rsplit("```", 1)[0]
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def sse_stream(events):
+    """Render ("delta", text) / ("done", result) pairs as SSE.
+
+    Emits `delta` events with {"text"}, a final `done` event with the full
+    result, or an `error` event if generation fails part-way.
+    """
+    try:
+        async for kind, payload in events:
+            if kind == "delta":
+                yield sse_event("delta", {"text": payload})
+            else:
+                yield sse_event("done", payload)
+    except Exception as e:
+        logger.warning(f"Stream failed: {e}")
+        yield sse_event("error", {"detail": str(e)})
@@ -1,17 +1,7 @@
-import openai
-from app.config import OPENAI_API_KEY
-
-def transcribe_audio(audio_path: str) -> dict:
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
-
-    with open(audio_path, "rb") as audio_file:
-        response = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            response_format="verbose_json",
-            timestamp_granularities=["segment"]
-        )
+from app.services.openai_client import get_openai_client
+from app.services.openai_limiter import call_with_retry
 
+def _parse_transcription(response) -> dict:
     segments = []
     if hasattr(response, "segments") and response.segments:
         for seg in response.segments:
@@ -25,3 +15,19 @@ def transcribe_audio(audio_path: str) -> dict:
         "full_text": response.text.strip(),
         "segments": segments
     }
+
+def transcribe_audio(audio_path: str) -> dict:
+    client = get_openai_client()
+
+    def _create():
+        # Reopen on every attempt so a retry uploads the file from the start
+        with open(audio_path, "rb") as audio_file:
+            return client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file,
+                response_format="verbose_json",
+                timestamp_granularities=["segment"]
+            )
+
+    response = call_with_retry(_create, "whisper-1")
+    return _parse_transcription(response)
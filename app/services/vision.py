@@ -1,64 +1,404 @@
 # app/services/vision.py
+import io
+import os
+import json
+import time
 import base64
-import openai
-from app.config import OPENAI_API_KEY
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PIL import Image
+from app.config import (
+    VISION_CONCURRENCY, VISION_FRAME_TIMEOUT_SECONDS, VISION_FRAME_RETRIES, VISION_BATCH_SIZE,
+    VISION_MAX_DIMENSION, VISION_JPEG_QUALITY, VISION_CACHE_ENABLED, VISION_ADAPTIVE_DETAIL,
+    VISION_HIGH_DETAIL_MAX_DIMENSION, VISION_TOKEN_BUDGET, VISION_TEXT_MIN_SCORE, VISION_CACHE_MAX_DISTANCE
+)
+from app.services.openai_client import get_openai_client
+from app.services.llm_cache import cached_chat_completion
+from app.services.openai_limiter import IMAGE_TOKEN_ESTIMATES, DeadlineExceeded, image_tokens
+from app.services.frame_filter import text_score
+from app.services.vision_cache import frame_hash, file_digest, lookup_description, store_description
+from app.logging_config import setup_logging
 
+logger = setup_logging("vision")
 
-def analyze_frame(frame_path: str) -> str:
-    """Send a single frame to GPT-4o Vision and get a description."""
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
+# Transient failures that call_with_retry does not already retry (it handles
+# the OpenAI client's rate-limit, connection and timeout errors itself)
+FRAME_RETRYABLE_ERRORS = (TimeoutError, ConnectionError)
 
-    with open(frame_path, "rb") as f:
-        image_data = base64.b64encode(f.read()).decode("utf-8")
 
-    response = client.chat.completions.create(
+def encode_frame(frame_path: str, max_dimension: int = None) -> str:
+    """Downscale a frame in memory to the vision upload size and return it as base64 JPEG.
+
+    Low-detail requests are downsampled to 512px by the provider anyway, so
+    uploading the full-resolution file only costs bandwidth and latency.
+    """
+    max_dimension = max_dimension or VISION_MAX_DIMENSION
+    with Image.open(frame_path) as img:
+        # Let the JPEG decoder do most of the downscaling via DCT scaling
+        img.draft("RGB", (max_dimension, max_dimension))
+        img = img.convert("RGB")
+        img.thumbnail((max_dimension, max_dimension))
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=VISION_JPEG_QUALITY, optimize=True)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def _image_part(image_data: str, detail: str = "low") -> dict:
+    return {
+        "type": "image_url",
+        "image_url": {
+            "url": f"data:image/jpeg;base64,{image_data}",
+            "detail": detail
+        }
+    }
+
+
+def _max_dimension(detail: str) -> int:
+    return VISION_HIGH_DETAIL_MAX_DIMENSION if detail == "high" else VISION_MAX_DIMENSION
+
+
+def estimate_image_tokens(frame_path: str, detail: str = "low") -> int:
+    """Prompt tokens for a frame as encode_frame would upload it at `detail`."""
+    if detail == "low":
+        return IMAGE_TOKEN_ESTIMATES["low"]
+    try:
+        with Image.open(frame_path) as img:
+            width, height = img.size
+    except OSError:
+        return IMAGE_TOKEN_ESTIMATES[detail]
+    scale = min(1.0, _max_dimension(detail) / max(width, height))
+    return image_tokens(round(width * scale), round(height * scale), detail)
+
+
+def text_scores(frames: list) -> list:
+    """text_score for each frame; frames that cannot be read score 0."""
+    scores = []
+    for frame in frames:
+        try:
+            scores.append(text_score(frame["path"]))
+        except OSError as e:
+            logger.warning(f"Could not score {frame['path']} for text: {e}")
+            scores.append(0.0)
+    return scores
+
+
+def plan_detail(frames: list, token_budget: int = None, scores: list = None) -> list:
+    """Choose "low" or "high" detail per frame.
+
+    Text-heavy frames (slides, code, terminals) are upgraded to high detail,
+    most text-dense first, as far as the job's image-token budget allows;
+    each upgrade is costed from the frame's own tile count. A budget of 0
+    means unlimited. Pass `scores` from text_scores to avoid scoring the
+    frames twice. Frames must still be at full resolution (before
+    compaction), or high detail has nothing extra to show.
+    """
+    details = ["low"] * len(frames)
+    if not VISION_ADAPTIVE_DETAIL:
+        return details
+    token_budget = VISION_TOKEN_BUDGET if token_budget is None else token_budget
+
+    scores = text_scores(frames) if scores is None else scores
+    candidates = sorted(
+        (i for i, score in enumerate(scores) if score >= VISION_TEXT_MIN_SCORE),
+        key=lambda i: -scores[i]
+    )
+
+    low = IMAGE_TOKEN_ESTIMATES["low"]
+    remaining = token_budget - low * len(frames)
+    for i in candidates:
+        extra = estimate_image_tokens(frames[i]["path"], "high") - low
+        if token_budget and extra > remaining:
+            continue
+        details[i] = "high"
+        remaining -= extra
+    return details
+
+
+def _build_messages(image_data: str, detail: str = "low") -> list:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You describe video frames concisely. Focus on what is visually "
+                "shown: text on screen, UI elements, diagrams, code, people, "
+                "actions. One sentence, max 50 words."
+            )
+        },
+        {
+            "role": "user",
+            "content": [
+                _image_part(image_data, detail),
+                {
+                    "type": "text",
+                    "text": "Describe what is shown in this video frame."
+                }
+            ]
+        }
+    ]
+
+
+def _build_batch_messages(frames: list) -> list:
+    content = []
+    for i, frame in enumerate(frames, 1):
+        content.append({"type": "text", "text": f"Frame {i} ({frame['timestamp']:.1f}s):"})
+        detail = frame.get("detail", "low")
+        image_data = frame.get("image_data") or encode_frame(frame["path"], _max_dimension(detail))
+        content.append(_image_part(image_data, detail))
+    content.append({"type": "text", "text": f"Describe each of the {len(frames)} frames above."})
+
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You describe video frames concisely. You will receive several frames from the "
+                "same video, each preceded by a label with its number and timestamp. Focus on what "
+                "is visually shown: text on screen, UI elements, diagrams, code, people, actions. "
+                "Describe each frame on its own in one sentence, max 50 words.\n"
+                'Return a JSON object with "frames": an array of objects with "index" (the frame '
+                'number) and "description", one entry per frame.\n'
+                "Return ONLY valid JSON, no markdown."
+            )
+        },
+        {"role": "user", "content": content}
+    ]
+
+
+def _parse_batch(raw: str, count: int) -> list:
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[1].rsplit("```", 1)[0]
+
+    data = json.loads(raw)
+
+    descriptions = [None] * count
+    for entry in data.get("frames", []):
+        index = entry.get("index")
+        if isinstance(index, int) and 1 <= index <= count and entry.get("description"):
+            descriptions[index - 1] = entry["description"].strip()
+    return descriptions
+
+
+def analyze_frame(
+    frame_path: str, use_cache: bool = True, timeout: float = None, image_data: str = None, detail: str = "low",
+    deadline: float = None
+) -> str:
+    """Send a single frame to GPT-4o Vision and get a description.
+
+    Pass `image_data` to reuse a frame already encoded with encode_frame, and
+    a time.monotonic() `deadline` to bound the call including its retries.
+    """
+    client = get_openai_client()
+    image_data = image_data or encode_frame(frame_path, _max_dimension(detail))
+
+    return cached_chat_completion(
+        client,
         model="gpt-4o",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You describe video frames concisely. Focus on what is visually "
-                    "shown: text on screen, UI elements, diagrams, code, people, "
-                    "actions. One sentence, max 50 words."
-                )
-            },
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_data}",
-                            "detail": "low"
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": "Describe what is shown in this video frame."
-                    }
-                ]
-            }
-        ],
+        messages=_build_messages(image_data, detail),
         max_tokens=100,
-        temperature=0.2
+        temperature=0.2,
+        use_cache=use_cache,
+        timeout=timeout,
+        deadline=deadline
     )
 
-    return response.choices[0].message.content.strip()
 
+def analyze_frame_batch(frames: list, use_cache: bool = True, timeout: float = None, deadline: float = None) -> list:
+    """Describe several frames in one GPT-4o Vision request.
 
-def analyze_frames(frames: list) -> list:
-    """Analyze a list of frames with GPT-4o Vision."""
-    results = []
-    for frame in frames:
+    Returns one description per input frame, in order. Entries the model
+    skipped come back as None so the caller can fall back to per-frame calls.
+    Frames may carry pre-encoded "image_data".
+    """
+    client = get_openai_client()
+
+    return cached_chat_completion(
+        client,
+        model="gpt-4o",
+        messages=_build_batch_messages(frames),
+        max_tokens=100 * len(frames),
+        temperature=0.2,
+        use_cache=use_cache,
+        timeout=timeout,
+        deadline=deadline,
+        parse=lambda raw: _parse_batch(raw, len(frames))
+    )
+
+
+def _describe_frame(frame_path: str, use_cache: bool = True, image_data: str = None, detail: str = "low") -> str:
+    """Analyze one frame within a single VISION_FRAME_TIMEOUT_SECONDS deadline.
+
+    Rate limits and OpenAI connection errors are retried by call_with_retry
+    inside that deadline. Other timeouts and connection errors get up to
+    VISION_FRAME_RETRIES more attempts while time remains; anything else
+    fails the frame at once.
+    """
+    deadline = time.monotonic() + VISION_FRAME_TIMEOUT_SECONDS
+    for attempt in range(VISION_FRAME_RETRIES + 1):
         try:
-            description = analyze_frame(frame["path"])
-        except Exception:
-            description = "Analysis failed"
+            return analyze_frame(
+                frame_path, use_cache=use_cache, image_data=image_data, detail=detail, deadline=deadline
+            )
+        except DeadlineExceeded as e:
+            logger.warning(f"Frame analysis for {frame_path} ran out of time: {e}")
+            break
+        except FRAME_RETRYABLE_ERRORS as e:
+            logger.warning(f"Frame analysis failed for {frame_path} (attempt {attempt + 1}): {e}")
+            if time.monotonic() >= deadline:
+                break
+        except Exception as e:
+            logger.warning(f"Frame analysis failed for {frame_path}: {e}")
+            break
+    return "Analysis failed"
+
+
+def _encode_or_none(frame_path: str, detail: str = "low"):
+    try:
+        return encode_frame(frame_path, _max_dimension(detail))
+    except Exception as e:
+        logger.warning(f"Could not encode {frame_path}: {e}")
+        return None
+
+
+def _cached_description(frame: dict, use_cache: bool = True, scope: str = "") -> tuple:
+    """Return ((perceptual hash, digest), cached description) for a frame; either may be None.
+
+    Text-bearing frames only reuse byte-identical frames: a slide with the
+    same perceptual hash can differ in exactly the words that matter.
+    """
+    if not (use_cache and VISION_CACHE_ENABLED):
+        return None, None
+    try:
+        key = frame_hash(frame["path"]), file_digest(frame["path"])
+        return key, lookup_description(
+            key[0], detail=frame.get("detail", "low"), scope=None if frame.get("has_text") else scope,
+            digest=key[1]
+        )
+    except Exception as e:
+        logger.warning(f"Vision cache lookup failed for {frame['path']}: {e}")
+        return None, None
+
+
+def _store_description(key: tuple, description: str, detail: str = "low", scope: str = ""):
+    try:
+        store_description(key[0], description, detail=detail, scope=scope, digest=key[1])
+    except Exception as e:
+        logger.warning(f"Vision cache store failed: {e}")
+
+
+def _describe_chunk(frames: list, use_cache: bool = True, cache_scope: str = "") -> tuple:
+    """Describe a chunk of frames in one batched request, falling back per frame.
 
+    Frames already described in the perceptual-hash cache skip the API.
+    Returns (descriptions, stats) where stats holds the chunk's upload sizes and cache hits.
+    """
+    descriptions = [None] * len(frames)
+    keys = [None] * len(frames)
+    for i, frame in enumerate(frames):
+        keys[i], descriptions[i] = _cached_description(frame, use_cache, cache_scope)
+    pending = [i for i, description in enumerate(descriptions) if description is None]
+
+    encoded = [
+        dict(frames[i], image_data=_encode_or_none(frames[i]["path"], frames[i].get("detail", "low")))
+        for i in pending
+    ]
+    stats = {
+        "source_bytes": sum(os.path.getsize(f["path"]) for f in encoded if os.path.exists(f["path"])),
+        "payload_bytes": sum(len(f["image_data"]) for f in encoded if f["image_data"]),
+        "cache_hits": len(frames) - len(pending),
+    }
+
+    batch = [None] * len(encoded)
+    if len(encoded) > 1 and all(f["image_data"] for f in encoded):
+        try:
+            batch = analyze_frame_batch(
+                encoded, use_cache=use_cache, deadline=time.monotonic() + VISION_FRAME_TIMEOUT_SECONDS * len(encoded)
+            )
+        except Exception as e:
+            logger.warning(f"Batched analysis of {len(encoded)} frames failed, falling back per frame: {e}")
+
+    for i, frame, description in zip(pending, encoded, batch):
+        if not description:
+            description = _describe_frame(
+                frame["path"], use_cache, frame["image_data"], frame.get("detail", "low")
+            )
+        descriptions[i] = description
+        if keys[i] is not None and description != "Analysis failed":
+            _store_description(keys[i], description, frame.get("detail", "low"), cache_scope)
+
+    return descriptions, stats
+
+
+def analyze_frames(
+    frames: list,
+    on_progress=None,
+    concurrency: int = None,
+    batch_size: int = None,
+    use_cache: bool = True,
+    metrics: dict = None,
+    token_budget: int = None,
+    cache_scope: str = ""
+) -> list:
+    """Analyze a list of frames with GPT-4o Vision, up to `concurrency` requests at a time.
+
+    With `batch_size` > 1, frames are packed that many per request. Text-heavy frames
+    are sent at high detail within `token_budget` (see plan_detail). `on_progress(done, total)`
+    is called from the calling thread as frames finish. If `metrics` is given it is filled
+    with the frame count, on-disk vs uploaded image bytes, perceptual-hash cache hits and
+    the detail split with its estimated image tokens. `cache_scope` (a user or job id)
+    lets near-duplicate frames reuse descriptions cached under the same scope.
+    Results are ordered by timestamp.
+    """
+    if not frames:
+        return []
+
+    near_matches = bool(cache_scope) and use_cache and VISION_CACHE_ENABLED and VISION_CACHE_MAX_DISTANCE > 0
+    scores = text_scores(frames) if VISION_ADAPTIVE_DETAIL or near_matches else [0.0] * len(frames)
+    details = plan_detail(frames, token_budget, scores)
+    frames = [
+        dict(frame, detail=detail, has_text=score >= VISION_TEXT_MIN_SCORE)
+        for frame, detail, score in zip(frames, details, scores)
+    ]
+
+    batch_size = max(1, batch_size or VISION_BATCH_SIZE)
+    chunks = [list(range(i, min(i + batch_size, len(frames)))) for i in range(0, len(frames), batch_size)]
+    workers = min(concurrency or VISION_CONCURRENCY, len(chunks))
+
+    descriptions = {}
+    done = 0
+    source_bytes = 0
+    payload_bytes = 0
+    cache_hits = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_describe_chunk, [frames[i] for i in chunk], use_cache, cache_scope): chunk
+            for chunk in chunks
+        }
+        for future in as_completed(futures):
+            chunk = futures[future]
+            chunk_descriptions, chunk_stats = future.result()
+            for i, description in zip(chunk, chunk_descriptions):
+                descriptions[i] = description
+            source_bytes += chunk_stats["source_bytes"]
+            payload_bytes += chunk_stats["payload_bytes"]
+            cache_hits += chunk_stats["cache_hits"]
+            done += len(chunk)
+            if on_progress is not None:
+                on_progress(done, len(frames))
+
+    if metrics is not None:
+        metrics.update({
+            "frames_analyzed": len(frames),
+            "source_bytes": source_bytes,
+            "payload_bytes": payload_bytes,
+            "cache_hits": cache_hits,
+            "high_detail_frames": details.count("high"),
+            "estimated_image_tokens": sum(estimate_image_tokens(f["path"], f["detail"]) for f in frames),
+        })
+
+    results = []
+    for i, frame in enumerate(frames):
         results.append({
             "timestamp": frame["timestamp"],
             "frame_path": frame["path"],
-            "description": description
+            "description": descriptions[i]
         })
 
-    return results
+    return sorted(results, key=lambda r: r["timestamp"])
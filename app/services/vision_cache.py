@@ -0,0 +1,139 @@
+# app/services/vision_cache.py
+import os
+import time
+import hashlib
+import imagehash
+from PIL import Image
+from app.config import VISION_CACHE_PATH, VISION_CACHE_MAX_DISTANCE
+from app.database import get_connection
+
+# 64-bit hashes are split into 4 bands of 16 bits. Two hashes within Hamming
+# distance 3 must agree exactly on at least one band (pigeonhole), so an
+# indexed equality lookup per band finds every near neighbour without a scan.
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+MAX_SUPPORTED_DISTANCE = BANDS - 1
+
+_initialized_paths = set()
+
+
+def _connect(db_path=None):
+    path = db_path or VISION_CACHE_PATH
+    if path not in _initialized_paths:
+        os.makedirs(os.path.dirname(path) if os.path.dirname(path) else ".", exist_ok=True)
+    conn = get_connection(path)
+    if path not in _initialized_paths:
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(vision_cache)")}
+        if columns and "digest" not in columns:
+            # Older entries were keyed by perceptual hash alone and cannot be
+            # told apart per user; it is only a cache, so start over
+            conn.execute("DROP TABLE vision_cache")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS vision_cache (
+                hash TEXT NOT NULL,
+                detail TEXT NOT NULL DEFAULT 'low',
+                scope TEXT NOT NULL DEFAULT '',
+                digest TEXT NOT NULL DEFAULT '',
+                b0 INTEGER NOT NULL,
+                b1 INTEGER NOT NULL,
+                b2 INTEGER NOT NULL,
+                b3 INTEGER NOT NULL,
+                description TEXT NOT NULL,
+                hits INTEGER DEFAULT 0,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (hash, detail, scope)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_vision_cache_digest ON vision_cache(digest)")
+        for band in range(BANDS):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_vision_cache_b{band} ON vision_cache(b{band})")
+        conn.commit()
+        _initialized_paths.add(path)
+    return conn
+
+
+def _bands(hash_value: int) -> list:
+    return [(hash_value >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+
+
+def frame_hash(frame_path: str) -> int:
+    """64-bit perceptual hash (pHash) of a frame."""
+    with Image.open(frame_path) as img:
+        return int(str(imagehash.phash(img)), 16)
+
+
+def file_digest(frame_path: str) -> str:
+    """SHA-256 of a frame file, for matches that must be byte-identical."""
+    with open(frame_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def lookup_description(
+    hash_value: int, detail: str = "low", max_distance: int = None, scope: str = None, digest: str = None,
+    db_path=None
+):
+    """Return the stored description for a frame, or None.
+
+    Entries with the same content `digest` are shared by everyone. Perceptual
+    hash matches, exact or within max_distance, are only taken from entries
+    stored under the same `scope` (a user or job): two slides with the same
+    layout hash alike whatever their figures say. Without a scope only the
+    digest is used, and high-detail lookups only take exact hash matches.
+    """
+    max_distance = min(VISION_CACHE_MAX_DISTANCE if max_distance is None else max_distance,
+                       MAX_SUPPORTED_DISTANCE)
+    if detail == "high":
+        max_distance = 0
+    conn = _connect(db_path)
+    try:
+        best = None
+        if digest:
+            best = conn.execute(
+                "SELECT rowid, description FROM vision_cache WHERE detail = ? AND digest = ? LIMIT 1",
+                (detail, digest)
+            ).fetchone()
+        if best is None and scope:
+            rows = conn.execute(
+                """SELECT rowid, hash, description FROM vision_cache
+                   WHERE detail = ? AND scope = ? AND (b0 = ? OR b1 = ? OR b2 = ? OR b3 = ?)""",
+                (detail, scope, *_bands(hash_value))
+            ).fetchall()
+            best_distance = max_distance + 1
+            for row in rows:
+                distance = bin(int(row["hash"], 16) ^ hash_value).count("1")
+                if distance < best_distance:
+                    best, best_distance = row, distance
+
+        if best is None:
+            return None
+        conn.execute("UPDATE vision_cache SET hits = hits + 1 WHERE rowid = ?", (best["rowid"],))
+        conn.commit()
+        return best["description"]
+    finally:
+        conn.close()
+
+
+def store_description(
+    hash_value: int, description: str, detail: str = "low", scope: str = "", digest: str = "", db_path=None
+):
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            """INSERT OR REPLACE INTO vision_cache
+                   (hash, detail, scope, digest, b0, b1, b2, b3, description, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (f"{hash_value:016x}", detail, scope or "", digest or "", *_bands(hash_value), description, time.time())
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_vision_cache_stats(db_path=None) -> dict:
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT COUNT(*) AS entries, COALESCE(SUM(hits), 0) AS hits FROM vision_cache").fetchone()
+    finally:
+        conn.close()
+    return {"entries": row["entries"], "hits": row["hits"]}
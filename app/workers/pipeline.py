@@ -1,14 +1,30 @@
 # app/workers/pipeline.py
 import os
 import json
+import time
+from contextlib import contextmanager
 from app.models import get_job, update_job_status
 from app.services.downloader import download_video
 from app.services.audio import extract_audio
 from app.services.transcriber import transcribe_audio
 from app.services.summarizer import summarize_transcript
-from app.services.frames import extract_frames, deduplicate_frames
+from app.services.frames import (
+    extract_frames, extract_unique_frames, deduplicate_frames,
+    choose_keyframes_only, KEYFRAME_ACCURACY_NOTE
+)
+from app.services.frame_budget import plan_frame_budget, select_frames
+from app.services.frame_filter import filter_informative
+from app.services.frame_storage import compact_frames, remove_unused_frames, job_storage_bytes
 from app.services.vision import analyze_frames
-from app.config import TEMP_DIR, FRAMES_DIR
+from app.services.retrieval import index_job
+from app.services.search import add_job_to_search, remove_job_from_search
+from app.services.answer_cache import invalidate_job_answers
+from app.services.embeddings import clear_job_embeddings
+from app.services.blog_jobs import invalidate_job_blogs
+from app.logging_config import setup_logging
+from app.config import TEMP_DIR, FRAMES_DIR, FRAME_EXTRACTION_MODE, FRAME_STORAGE_FORMAT
+
+logger = setup_logging("pipeline")
 
 
 def process_video(job_id: str, db_path: str = None):
@@ -21,12 +37,19 @@ def process_video(job_id: str, db_path: str = None):
             return
 
         options = json.loads(job["options"]) if isinstance(job["options"], str) else job["options"]
+        # Answers, articles, embeddings and search entries from a previous run of this job no longer apply
+        invalidate_job_answers(db, job_id)
+        clear_job_embeddings(db, job_id)
+        remove_job_from_search(db, job_id)
+        invalidate_job_blogs(db, job_id)
         temp_dir = os.path.join(TEMP_DIR, job_id)
         os.makedirs(temp_dir, exist_ok=True)
+        metrics = {"stage_seconds": {}}
 
         # Step 1: Download video
         update_job_status(db, job_id, status="processing", progress=10, step="Downloading video...")
-        video_info = download_video(job["url"], temp_dir)
+        with _timed(metrics, "download"):
+            video_info = download_video(job["url"], temp_dir)
 
         update_job_status(
             db, job_id, progress=20, step="Extracting audio...",
@@ -36,11 +59,13 @@ def process_video(job_id: str, db_path: str = None):
         )
 
         # Step 2: Extract audio
-        audio_path = extract_audio(video_info["file_path"], temp_dir)
+        with _timed(metrics, "audio"):
+            audio_path = extract_audio(video_info["file_path"], temp_dir)
         update_job_status(db, job_id, progress=30, step="Transcribing audio...")
 
         # Step 3: Transcribe
-        transcript = transcribe_audio(audio_path)
+        with _timed(metrics, "transcribe"):
+            transcript = transcribe_audio(audio_path)
         update_job_status(
             db, job_id, progress=50, step="Generating summary...",
             transcript_text=transcript["full_text"],
@@ -48,7 +73,8 @@ def process_video(job_id: str, db_path: str = None):
         )
 
         # Step 4: Summarize
-        summary = summarize_transcript(transcript["full_text"])
+        with _timed(metrics, "summarize"):
+            summary = summarize_transcript(transcript["full_text"])
 
         # Step 5: Generate SRT subtitles
         srt = generate_srt(transcript["segments"])
@@ -59,24 +85,92 @@ def process_video(job_id: str, db_path: str = None):
             update_job_status(db, job_id, progress=60, step="Extracting frames...")
 
             frames_dir = os.path.join(FRAMES_DIR, job_id)
-            raw_frames = extract_frames(video_info["file_path"], frames_dir, interval=5)
-
-            update_job_status(db, job_id, progress=70, step="Deduplicating frames...")
-            unique_frames = deduplicate_frames(raw_frames, threshold=5)
-
-            # Build frame list with timestamps (frame index * interval seconds)
-            frame_list = []
-            for i, path in enumerate(unique_frames):
-                # Estimate timestamp from frame filename (frame_NNNN.jpg)
-                basename = os.path.basename(path)
-                frame_num = int(basename.replace("frame_", "").replace(".jpg", ""))
-                timestamp = (frame_num - 1) * 5  # 0-indexed, 5s interval
-                frame_list.append({"path": path, "timestamp": float(timestamp)})
-
+            budget = plan_frame_budget(
+                video_info["duration"], options.get("plan"), options.get("max_frames")
+            )
+            sampling = {
+                "interval": budget["interval"],
+                "mode": options.get("frame_sampling"),
+                "max_frames": budget["extract_limit"],
+                "duration": video_info["duration"],
+                "keyframes_only": choose_keyframes_only(
+                    video_info["duration"], options.get("keyframes_only")
+                ),
+            }
+            metrics["frames"] = {"keyframes_only": sampling["keyframes_only"]}
+            if sampling["keyframes_only"]:
+                metrics["frames"]["accuracy_note"] = KEYFRAME_ACCURACY_NOTE
+            if (options.get("frame_extraction") or FRAME_EXTRACTION_MODE) == "pipe":
+                # Hashing and dedup happen inside extraction; only survivors hit disk
+                with _timed(metrics, "extract_frames"):
+                    frame_list = extract_unique_frames(
+                        video_info["file_path"], frames_dir, threshold=5,
+                        metrics=metrics["frames"], **sampling
+                    )
+            else:
+                with _timed(metrics, "extract_frames"):
+                    raw_frames = extract_frames(video_info["file_path"], frames_dir, **sampling)
+
+                update_job_status(db, job_id, progress=70, step="Deduplicating frames...")
+                with _timed(metrics, "deduplicate_frames"):
+                    unique_frames = deduplicate_frames([f["path"] for f in raw_frames], threshold=5)
+
+                # Keep the decoder timestamps of the frames that survived deduplication
+                timestamps = {f["path"]: f["timestamp"] for f in raw_frames}
+                frame_list = [{"path": path, "timestamp": timestamps[path]} for path in unique_frames]
+                metrics["frames"].update(extracted=len(raw_frames), unique=len(frame_list))
+
+            with _timed(metrics, "filter_frames"):
+                frame_list = filter_informative(frame_list, metrics=metrics["frames"])
+            frame_list = select_frames(frame_list, budget["max_frames"])
+            metrics["frame_budget"] = dict(budget, used=len(frame_list))
+
+            # Vision reads the full-resolution extracted frames, so high-detail
+            # uploads have real detail; compaction runs once analysis is done
             update_job_status(db, job_id, progress=80, step="Analyzing frames with AI...")
-            visual_analysis = analyze_frames(frame_list)
 
-        # Step 7: Mark complete
+            def report_frame_progress(done, total):
+                update_job_status(
+                    db, job_id, progress=80 + int(15 * done / total),
+                    step=f"Analyzing frames with AI ({done}/{total})..."
+                )
+
+            metrics["vision"] = {}
+            with _timed(metrics, "vision"):
+                visual_analysis = analyze_frames(
+                    frame_list, on_progress=report_frame_progress, metrics=metrics["vision"],
+                    cache_scope=f"user:{job['user_id']}" if job["user_id"] else f"job:{job_id}"
+                )
+
+            if FRAME_STORAGE_FORMAT == "webp":
+                metrics["storage"] = {}
+                with _timed(metrics, "compact_frames"):
+                    compacted = compact_frames(frame_list, frames_dir, metrics=metrics["storage"])
+                stored = {frame["path"]: entry for frame, entry in zip(frame_list, compacted)}
+                for item in visual_analysis:
+                    entry = stored.get(item["frame_path"])
+                    if entry is not None:
+                        item["frame_path"] = entry["path"]
+                        if entry.get("thumbnail"):
+                            item["thumbnail_path"] = entry["thumbnail"]
+            else:
+                removed = remove_unused_frames(frames_dir, [frame["path"] for frame in frame_list])
+                metrics["storage"] = {
+                    "format": "jpeg", "removed_frames": removed, "total_bytes": job_storage_bytes(frames_dir)
+                }
+
+        # Step 7: Index transcript windows and frame descriptions for /ask and
+        # cross-video search. Indexing must not fail the job.
+        try:
+            index_job(db, job_id, transcript["segments"], visual_analysis)
+        except Exception as e:
+            logger.warning(f"Retrieval indexing failed for {job_id}: {e}")
+        try:
+            add_job_to_search(db, job_id, job["user_id"], transcript["segments"], visual_analysis)
+        except Exception as e:
+            logger.warning(f"Search indexing failed for {job_id}: {e}")
+
+        # Step 8: Mark complete
         update_job_status(
             db, job_id,
             status="completed",
@@ -86,7 +180,8 @@ def process_video(job_id: str, db_path: str = None):
             summary_detailed=summary["detailed"],
             chapters=json.dumps(summary["chapters"]),
             subtitles_srt=srt,
-            visual_analysis=json.dumps(visual_analysis)
+            visual_analysis=json.dumps(visual_analysis),
+            stage_metrics=json.dumps(metrics)
         )
 
     except Exception as e:
@@ -101,6 +196,15 @@ def process_video(job_id: str, db_path: str = None):
         _cleanup_temp(temp_dir if 'temp_dir' in dir() else None)
 
 
+@contextmanager
+def _timed(metrics: dict, stage: str):
+    started = time.time()
+    try:
+        yield
+    finally:
+        metrics["stage_seconds"][stage] = round(time.time() - started, 2)
+
+
 def generate_srt(segments: list) -> str:
     lines = []
     for i, seg in enumerate(segments, 1):
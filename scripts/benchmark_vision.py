@@ -0,0 +1,54 @@
+# scripts/benchmark_vision.py
+import sys
+import os
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vision import analyze_frames
+from app.services.llm_cache import get_cache_stats
+from app.config import VISION_BATCH_SIZE
+from app.logging_config import setup_logging
+
+logger = setup_logging("benchmark_vision")
+
+
+def _run(frames, batch_size):
+    # Bypass the response cache so every run pays for real API calls
+    before = get_cache_stats()
+    started = time.time()
+    analyze_frames(frames, batch_size=batch_size, use_cache=False)
+    elapsed = time.time() - started
+    after = get_cache_stats()
+    return {
+        "batch_size": batch_size,
+        "frames": len(frames),
+        "calls": after["upstream_calls"] - before["upstream_calls"],
+        "tokens": after["upstream_tokens"] - before["upstream_tokens"],
+        "seconds": round(elapsed, 2),
+    }
+
+
+def run_benchmark(frames_dir, batch_size=None, limit=20, interval=5):
+    """Compare per-frame and batched vision analysis over the frames in frames_dir."""
+    files = sorted(f for f in os.listdir(frames_dir) if f.lower().endswith((".jpg", ".jpeg", ".png", ".webp")))
+    frames = [
+        {"path": os.path.join(frames_dir, f), "timestamp": float(i * interval)}
+        for i, f in enumerate(files[:limit])
+    ]
+    k = batch_size or max(VISION_BATCH_SIZE, 4)
+
+    results = [_run(frames, 1), _run(frames, k)]
+    for r in results:
+        logger.info(f"batch_size={r['batch_size']}: {r['frames']} frames, {r['calls']} calls, "
+                    f"{r['tokens']} tokens, {r['seconds']}s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-frame vs batched vision requests")
+    parser.add_argument("frames_dir")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    run_benchmark(args.frames_dir, batch_size=args.batch_size, limit=args.limit)
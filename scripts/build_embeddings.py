@@ -0,0 +1,49 @@
+# scripts/build_embeddings.py
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import DATABASE_URL
+from app.database import get_connection
+from app.services.embeddings import model_name
+from app.services.retrieval import build_job_embeddings
+from app.logging_config import setup_logging
+
+logger = setup_logging("build_embeddings_script")
+
+
+def run_build_embeddings(db_path=None, rebuild=False):
+    """Embed completed jobs that have no matrix for the current model yet."""
+    db = db_path or DATABASE_URL
+
+    conn = get_connection(db)
+    try:
+        query = "SELECT id, transcript_segments, visual_analysis FROM jobs WHERE status = 'completed'"
+        params = []
+        if not rebuild:
+            query += " AND id NOT IN (SELECT job_id FROM job_embeddings WHERE model = ?)"
+            params.append(model_name())
+        jobs = [dict(row) for row in conn.execute(query, params).fetchall()]
+    finally:
+        conn.close()
+
+    embedded = 0
+    passages = 0
+    failed = 0
+    for job in jobs:
+        try:
+            count = build_job_embeddings(db, job)
+        except Exception as e:
+            logger.warning(f"Embedding failed for {job['id']}: {e}")
+            failed += 1
+            continue
+        if count:
+            embedded += 1
+            passages += count
+
+    logger.info(f"Embeddings ({model_name()}): {embedded} jobs, {passages} passages, {failed} failed")
+    return {"jobs": embedded, "passages": passages, "failed": failed}
+
+
+if __name__ == "__main__":
+    run_build_embeddings(rebuild="--rebuild" in sys.argv)
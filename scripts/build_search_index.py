@@ -0,0 +1,44 @@
+# scripts/build_search_index.py
+import sys
+import os
+import json
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import DATABASE_URL
+from app.database import get_connection
+from app.services.search import add_job_to_search
+from app.logging_config import setup_logging
+
+logger = setup_logging("build_search_index_script")
+
+
+def run_build_search_index(db_path=None):
+    """Index completed jobs that finished before search indexing existed."""
+    db = db_path or DATABASE_URL
+
+    conn = get_connection(db)
+    try:
+        indexed = {row[0] for row in conn.execute("SELECT DISTINCT job_id FROM search_index")}
+        jobs = [
+            dict(row) for row in conn.execute(
+                "SELECT id, user_id, transcript_segments, visual_analysis FROM jobs WHERE status = 'completed'"
+            ).fetchall()
+            if row["id"] not in indexed
+        ]
+    finally:
+        conn.close()
+
+    rows = 0
+    for job in jobs:
+        rows += add_job_to_search(
+            db, job["id"], job["user_id"],
+            json.loads(job["transcript_segments"] or "[]"),
+            json.loads(job["visual_analysis"] or "[]")
+        )
+
+    logger.info(f"Search index: {len(jobs)} jobs, {rows} rows added")
+    return {"jobs": len(jobs), "rows": rows}
+
+
+if __name__ == "__main__":
+    run_build_search_index()
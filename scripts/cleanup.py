@@ -5,6 +5,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.config import TEMP_DIR, FRAMES_DIR
 from app.services.cleanup import cleanup_temp_files, cleanup_old_frames
+from app.services.llm_cache import purge_expired
 from app.logging_config import setup_logging
 
 logger = setup_logging("cleanup_script")
@@ -16,11 +17,13 @@ def run_cleanup(temp_dir=None, frames_dir=None):
 
     temp_result = cleanup_temp_files(t_dir, max_age_seconds=3600)
     frames_result = cleanup_old_frames(f_dir, max_age_days=30)
+    llm_cache_result = purge_expired()
 
     logger.info(f"Cleanup: {temp_result['deleted']} temp files, "
-                f"{frames_result['deleted_dirs']} frame dirs removed")
+                f"{frames_result['deleted_dirs']} frame dirs ({frames_result.get('freed_bytes', 0)} bytes), "
+                f"{llm_cache_result['deleted']} expired LLM cache entries removed")
 
-    return {"temp": temp_result, "frames": frames_result}
+    return {"temp": temp_result, "frames": frames_result, "llm_cache": llm_cache_result}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,13 @@
+# tests/conftest.py
+import pytest
+from unittest.mock import patch
+
+
+@pytest.fixture(autouse=True)
+def isolated_llm_state(tmp_path):
+    """Point the persistent LLM caches, rate limiter and frame storage at per-test paths."""
+    with patch("app.services.llm_cache.LLM_CACHE_PATH", str(tmp_path / "llm_cache.db")), \
+         patch("app.services.openai_limiter.OPENAI_LIMITER_PATH", str(tmp_path / "openai_limiter.db")), \
+         patch("app.services.vision_cache.VISION_CACHE_PATH", str(tmp_path / "vision_cache.db")), \
+         patch("app.workers.pipeline.FRAMES_DIR", str(tmp_path / "frames")):
+        yield
@@ -0,0 +1,115 @@
+# tests/test_answer_cache.py
+import os
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.database import init_db
+from app.models import create_job
+from app.services.answer_cache import (
+    normalize_question, get_cached_answer, store_answer, invalidate_job_answers, cached_answer
+)
+
+TEST_DB = "./data/test_answer_cache.db"
+ANSWER = {"answer": "He ran docker pull nginx.", "relevant_timestamps": ["5:02"], "relevant_frames": []}
+
+
+@pytest.fixture(autouse=True)
+def setup_teardown():
+    os.makedirs("./data", exist_ok=True)
+    init_db(TEST_DB)
+    yield
+    if os.path.exists(TEST_DB):
+        os.remove(TEST_DB)
+
+
+def _counting_compute(answer=ANSWER, delay=0.0):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return answer
+
+    return compute, calls
+
+
+def test_normalize_question_ignores_case_punctuation_and_spacing():
+    assert normalize_question("  What command   was RUN?! ") == "what command was run"
+    assert normalize_question("What command was run") == normalize_question("what command, was run?")
+
+
+def test_normalized_variants_hit_the_same_entry():
+    store_answer(TEST_DB, "job_1", "What command was run?", ANSWER)
+
+    assert get_cached_answer(TEST_DB, "job_1", "what command WAS run") == ANSWER
+    assert get_cached_answer(TEST_DB, "job_2", "What command was run?") is None
+    assert get_cached_answer(TEST_DB, "job_1", "Which port is used?") is None
+
+
+def test_similar_questions_match_when_similarity_enabled():
+    with patch("app.services.answer_cache.QA_CACHE_SIMILARITY", 0.6), \
+         patch("app.services.embeddings.EMBEDDING_BACKEND", "local"):
+        store_answer(TEST_DB, "job_1", "which docker command was run in the terminal", ANSWER)
+        assert get_cached_answer(TEST_DB, "job_1", "which docker command was run in terminal") == ANSWER
+        assert get_cached_answer(TEST_DB, "job_1", "who is the presenter") is None
+
+
+def test_invalidate_job_answers():
+    store_answer(TEST_DB, "job_1", "Q1", ANSWER)
+    store_answer(TEST_DB, "job_1", "Q2", ANSWER)
+    store_answer(TEST_DB, "job_2", "Q1", ANSWER)
+
+    assert invalidate_job_answers(TEST_DB, "job_1") == 2
+    assert get_cached_answer(TEST_DB, "job_1", "Q1") is None
+    assert get_cached_answer(TEST_DB, "job_2", "Q1") == ANSWER
+
+
+def test_concurrent_identical_questions_share_one_call():
+    compute, calls = _counting_compute(delay=0.05)
+
+    async def ask_many():
+        return await asyncio.gather(*[
+            cached_answer(TEST_DB, "job_1", question, compute)
+            for question in ["What was run?", "what was run", "WHAT WAS RUN?"]
+        ])
+
+    assert asyncio.run(ask_many()) == [ANSWER] * 3
+    assert len(calls) == 1
+
+    asyncio.run(cached_answer(TEST_DB, "job_1", "What was run?", compute))
+    assert len(calls) == 1
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def ask_twice():
+        return await asyncio.gather(
+            cached_answer(TEST_DB, "job_1", "Q", failing),
+            cached_answer(TEST_DB, "job_1", "Q", failing),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(ask_twice())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert get_cached_answer(TEST_DB, "job_1", "Q") is None
+
+
+def test_use_cache_false_always_computes():
+    compute, calls = _counting_compute()
+    asyncio.run(cached_answer(TEST_DB, "job_1", "Q", compute))
+    asyncio.run(cached_answer(TEST_DB, "job_1", "Q", compute, use_cache=False))
+    assert len(calls) == 2
+
+
+@patch("app.workers.pipeline.download_video", side_effect=RuntimeError("gone"))
+def test_reprocessing_invalidates_cached_answers(mock_download):
+    from app.workers.pipeline import process_video
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={})
+    store_answer(TEST_DB, job_id, "Q", ANSWER)
+
+    process_video(job_id, TEST_DB)
+
+    assert get_cached_answer(TEST_DB, job_id, "Q") is None
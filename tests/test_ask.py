@@ -33,7 +33,7 @@ def test_ask_returns_answer():
     )
 
     with patch("app.routers.ask.DATABASE_URL", TEST_DB):
-        with patch("app.routers.ask.answer_question") as mock_qa:
+        with patch("app.routers.ask.answer_question_async") as mock_qa:
             mock_qa.return_value = {
                 "answer": "He ran docker pull nginx.",
                 "relevant_timestamps": ["5:02"],
@@ -71,3 +71,100 @@ def test_ask_job_not_completed():
             headers=AUTH_HEADER
         )
     assert response.status_code == 400
+
+
+def test_ask_sends_retrieved_passages():
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={})
+    update_job_status(
+        TEST_DB, job_id,
+        status="completed",
+        transcript_text="Intro. Later we deploy with Kubernetes.",
+        transcript_segments=json.dumps([
+            {"start": 0.0, "end": 5.0, "text": "Intro."},
+            {"start": 900.0, "end": 910.0, "text": "Later we deploy with Kubernetes."},
+        ])
+    )
+
+    with patch("app.routers.ask.DATABASE_URL", TEST_DB):
+        with patch("app.routers.ask.answer_question_async") as mock_qa:
+            mock_qa.return_value = {"answer": "At 15:00.", "relevant_timestamps": ["15:00"], "relevant_frames": []}
+            response = client.post(
+                "/api/v1/ask",
+                json={"job_id": job_id, "question": "When is Kubernetes used?"},
+                headers=AUTH_HEADER
+            )
+
+    assert response.status_code == 200
+    passages = mock_qa.call_args.kwargs["passages"]
+    assert passages[0]["start"] == 900.0
+
+
+def test_repeated_question_is_answered_from_cache():
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={})
+    update_job_status(TEST_DB, job_id, status="completed", transcript_text="He ran docker pull nginx")
+
+    with patch("app.routers.ask.DATABASE_URL", TEST_DB):
+        with patch("app.routers.ask.answer_question_async") as mock_qa:
+            mock_qa.return_value = {"answer": "docker pull nginx", "relevant_timestamps": [], "relevant_frames": []}
+            first = client.post("/api/v1/ask", json={"job_id": job_id, "question": "What command was run?"},
+                                headers=AUTH_HEADER)
+            second = client.post("/api/v1/ask", json={"job_id": job_id, "question": "what command was run"},
+                                 headers=AUTH_HEADER)
+
+    assert first.json() == second.json()
+    mock_qa.assert_called_once()
+
+
+def _sse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_ask_stream_emits_deltas_then_final_event_and_caches():
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={})
+    update_job_status(TEST_DB, job_id, status="completed", transcript_text="He ran docker pull nginx")
+    done = {"answer": "He ran docker pull nginx.", "relevant_timestamps": ["5:02"], "relevant_frames": []}
+
+    async def fake_stream(**kwargs):
+        yield "delta", "He ran "
+        yield "delta", "docker pull nginx."
+        yield "done", done
+
+    with patch("app.routers.ask.DATABASE_URL", TEST_DB), \
+         patch("app.routers.ask.stream_answer", side_effect=fake_stream) as mock_stream:
+        body = {"job_id": job_id, "question": "What was run?", "stream": True}
+        first = client.post("/api/v1/ask", json=body, headers=AUTH_HEADER)
+        second = client.post("/api/v1/ask", json=body, headers=AUTH_HEADER)
+
+    assert first.headers["content-type"].startswith("text/event-stream")
+    assert _sse_events(first.text) == [
+        ("delta", {"text": "He ran "}), ("delta", {"text": "docker pull nginx."}), ("done", done)
+    ]
+    assert _sse_events(second.text) == [("delta", {"text": done["answer"]}), ("done", done)]
+    assert mock_stream.call_count == 1
+
+
+def test_ask_batch_endpoint():
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={})
+    update_job_status(TEST_DB, job_id, status="completed", transcript_text="He ran docker pull nginx")
+
+    with patch("app.routers.ask.DATABASE_URL", TEST_DB), \
+         patch("app.routers.ask.answer_batch") as mock_batch:
+        mock_batch.return_value = {"answers": [{"question": "Q", "answer": "A"}], "model_calls": 1}
+        response = client.post(
+            "/api/v1/ask/batch", json={"job_id": job_id, "questions": ["Q"]}, headers=AUTH_HEADER
+        )
+        too_many = client.post(
+            "/api/v1/ask/batch", json={"job_id": job_id, "questions": ["Q"] * 21}, headers=AUTH_HEADER
+        )
+        missing = client.post(
+            "/api/v1/ask/batch", json={"job_id": "nope", "questions": ["Q"]}, headers=AUTH_HEADER
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {"job_id": job_id, "answers": [{"question": "Q", "answer": "A"}], "model_calls": 1}
+    assert too_many.status_code == 422
+    assert missing.status_code == 404
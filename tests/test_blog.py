@@ -7,6 +7,7 @@ from fastapi.testclient import TestClient
 from app.main import app
 from app.database import init_db
 from app.models import create_job, update_job_status
+from app.services.blog_jobs import create_blog_post
 
 TEST_DB = "./data/test_blog.db"
 AUTH_HEADER = {"Authorization": "Bearer test-key-123"}
@@ -35,7 +36,7 @@ def test_blog_returns_article():
     )
 
     with patch("app.routers.blog.DATABASE_URL", TEST_DB):
-        with patch("app.routers.blog.generate_blog") as mock_blog:
+        with patch("app.routers.blog.generate_blog_async") as mock_blog:
             mock_blog.return_value = {
                 "title": "Docker Guide",
                 "content_markdown": "# Docker Guide\n\nContent here.",
@@ -74,3 +75,112 @@ def test_blog_job_not_completed():
             headers=AUTH_HEADER
         )
     assert response.status_code == 400
+
+
+def test_blog_stream_emits_markdown_deltas():
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={})
+    update_job_status(TEST_DB, job_id, status="completed", transcript_text="Docker tutorial")
+    done = {"title": "Docker Guide", "content_markdown": "## Intro\n\nDocker.", "image_suggestions": []}
+
+    async def fake_stream(**kwargs):
+        yield "delta", "## Intro\n\n"
+        yield "delta", "Docker."
+        yield "done", done
+
+    with patch("app.routers.blog.DATABASE_URL", TEST_DB), \
+         patch("app.services.blog_jobs.stream_blog", side_effect=fake_stream) as mock_stream:
+        response = client.post(
+            "/api/v1/to-blog", json={"job_id": job_id, "stream": True}, headers=AUTH_HEADER
+        )
+        replay = client.post(
+            "/api/v1/to-blog", json={"job_id": job_id, "stream": True}, headers=AUTH_HEADER
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith('event: delta\ndata: {"text": "## Intro\\n\\n"}\n\n')
+    final = json.loads(response.text.strip().rsplit("data: ", 1)[1])
+    assert final == dict(done, blog_id=final["blog_id"])
+    assert replay.text.startswith('event: delta\ndata: {"text": "## Intro\\n\\nDocker."}\n\n')
+    mock_stream.assert_called_once()
+
+
+ARTICLE = {"title": "Docker Guide", "content_markdown": "## Intro\n\nDocker.", "image_suggestions": []}
+
+
+def _completed_job():
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={})
+    update_job_status(TEST_DB, job_id, status="completed", transcript_text="Docker tutorial")
+    return job_id
+
+
+def test_blog_repeat_request_is_served_from_store():
+    job_id = _completed_job()
+
+    with patch("app.routers.blog.DATABASE_URL", TEST_DB), \
+         patch("app.routers.blog.generate_blog_async", return_value=ARTICLE) as mock_blog:
+        first = client.post("/api/v1/to-blog", json={"job_id": job_id, "style": "tutorial"}, headers=AUTH_HEADER)
+        second = client.post("/api/v1/to-blog", json={"job_id": job_id, "style": "tutorial"}, headers=AUTH_HEADER)
+        other_style = client.post("/api/v1/to-blog", json={"job_id": job_id, "style": "listicle"}, headers=AUTH_HEADER)
+        fresh = client.post(
+            "/api/v1/to-blog", json={"job_id": job_id, "style": "tutorial", "use_cache": False}, headers=AUTH_HEADER
+        )
+
+    assert first.json() == second.json()
+    assert second.json()["title"] == "Docker Guide"
+    assert other_style.json()["blog_id"] != first.json()["blog_id"]
+    assert fresh.json()["blog_id"] == first.json()["blog_id"]
+    assert mock_blog.call_count == 3
+
+
+def test_blog_background_job_can_be_polled():
+    job_id = _completed_job()
+
+    with patch("app.routers.blog.DATABASE_URL", TEST_DB), \
+         patch("app.services.blog_jobs.generate_blog_async", return_value=ARTICLE):
+        queued = client.post(
+            "/api/v1/to-blog", json={"job_id": job_id, "background": True, "include_images": False},
+            headers=AUTH_HEADER
+        )
+        blog_id = queued.json()["blog_id"]
+        status = client.get(f"/api/v1/to-blog/{blog_id}", headers=AUTH_HEADER)
+
+    assert queued.json()["status"] == "processing"
+    assert status.json() == {
+        "blog_id": blog_id, "job_id": job_id, "style": "article", "include_images": False,
+        "status": "completed", **ARTICLE
+    }
+
+
+def test_blog_background_request_does_not_requeue_running_post():
+    job_id = _completed_job()
+    blog_id, _ = create_blog_post(TEST_DB, job_id, "article", False)
+
+    with patch("app.routers.blog.DATABASE_URL", TEST_DB), \
+         patch("app.routers.blog.run_blog_job") as mock_run:
+        response = client.post(
+            "/api/v1/to-blog", json={"job_id": job_id, "background": True, "include_images": False},
+            headers=AUTH_HEADER
+        )
+
+    assert response.json() == {
+        "blog_id": blog_id, "status": "processing", "message": "Blog generation in progress"
+    }
+    mock_run.assert_not_called()
+
+
+def test_blog_status_reports_interrupted_generation():
+    job_id = _completed_job()
+    blog_id, _ = create_blog_post(TEST_DB, job_id, "article", False)
+
+    with patch("app.routers.blog.DATABASE_URL", TEST_DB), \
+         patch("app.services.blog_jobs.BLOG_JOB_STALE_SECONDS", -1):
+        status = client.get(f"/api/v1/to-blog/{blog_id}", headers=AUTH_HEADER)
+
+    assert status.json()["status"] == "failed"
+    assert "interrupted" in status.json()["error"]
+
+
+def test_blog_status_unknown_id():
+    with patch("app.routers.blog.DATABASE_URL", TEST_DB):
+        assert client.get("/api/v1/to-blog/blog_missing", headers=AUTH_HEADER).status_code == 404
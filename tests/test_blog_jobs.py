@@ -0,0 +1,118 @@
+# tests/test_blog_jobs.py
+import os
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.database import init_db, get_connection
+from app.models import create_job, update_job_status
+from app.services.blog_jobs import (
+    create_blog_post, find_blog_post, get_blog_post, run_blog_job, save_blog, invalidate_job_blogs,
+    update_blog_post, is_stale
+)
+
+TEST_DB = "./data/test_blog_jobs.db"
+ARTICLE = {"title": "Docker Guide", "content_markdown": "Body", "image_suggestions": [{"timestamp": 5.0}]}
+
+
+@pytest.fixture(autouse=True)
+def setup_teardown():
+    os.makedirs("./data", exist_ok=True)
+    init_db(TEST_DB)
+    yield
+    if os.path.exists(TEST_DB):
+        os.remove(TEST_DB)
+
+
+def _completed_job():
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={})
+    update_job_status(
+        TEST_DB, job_id, status="completed", transcript_text="Docker tutorial",
+        visual_analysis='[{"timestamp": 5.0, "description": "Terminal"}]'
+    )
+    return job_id
+
+
+def test_create_blog_post_reuses_row_per_variant():
+    first, first_queued = create_blog_post(TEST_DB, "job_1", "article", True)
+    again, again_queued = create_blog_post(TEST_DB, "job_1", "article", True)
+    other, _ = create_blog_post(TEST_DB, "job_1", "article", False)
+
+    assert first == again
+    assert other != first
+    assert first_queued and not again_queued
+    assert find_blog_post(TEST_DB, "job_1", "article", True)["status"] == "pending"
+
+
+def test_create_blog_post_requeues_only_finished_attempts():
+    blog_id, _ = create_blog_post(TEST_DB, "job_1", "article", True)
+    update_blog_post(TEST_DB, blog_id, "processing")
+    assert create_blog_post(TEST_DB, "job_1", "article", True) == (blog_id, False)
+    assert get_blog_post(TEST_DB, blog_id)["status"] == "processing"
+
+    update_blog_post(TEST_DB, blog_id, "failed", error_message="model down")
+    assert create_blog_post(TEST_DB, "job_1", "article", True) == (blog_id, True)
+    post = get_blog_post(TEST_DB, blog_id)
+    assert post["status"] == "pending"
+    assert post["error_message"] == ""
+
+
+def _age_post(blog_id, seconds):
+    conn = get_connection(TEST_DB)
+    try:
+        conn.execute(
+            "UPDATE blog_posts SET updated_at = datetime('now', ?) WHERE id = ?", (f"-{seconds} seconds", blog_id)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_create_blog_post_requeues_interrupted_attempts():
+    blog_id, _ = create_blog_post(TEST_DB, "job_1", "article", True)
+    update_blog_post(TEST_DB, blog_id, "processing")
+    _age_post(blog_id, 60)
+
+    with patch("app.services.blog_jobs.BLOG_JOB_STALE_SECONDS", 300):
+        assert create_blog_post(TEST_DB, "job_1", "article", True) == (blog_id, False)
+        _age_post(blog_id, 600)
+        assert is_stale(get_blog_post(TEST_DB, blog_id))
+        assert create_blog_post(TEST_DB, "job_1", "article", True) == (blog_id, True)
+        post = get_blog_post(TEST_DB, blog_id)
+
+    assert post["status"] == "pending"
+    assert not is_stale(post)
+
+
+def test_run_blog_job_stores_article():
+    job_id = _completed_job()
+    blog_id, _ = create_blog_post(TEST_DB, job_id, "tutorial", False)
+
+    with patch("app.services.blog_jobs.generate_blog_async", return_value=ARTICLE) as mock_blog:
+        asyncio.run(run_blog_job(blog_id, TEST_DB))
+
+    post = get_blog_post(TEST_DB, blog_id)
+    assert post["status"] == "completed"
+    assert post["title"] == "Docker Guide"
+    assert mock_blog.call_args.kwargs["style"] == "tutorial"
+    assert mock_blog.call_args.kwargs["visual_analysis"] == []
+
+
+def test_run_blog_job_records_failure():
+    job_id = _completed_job()
+    blog_id, _ = create_blog_post(TEST_DB, job_id, "article", True)
+
+    with patch("app.services.blog_jobs.generate_blog_async", side_effect=RuntimeError("model down")):
+        asyncio.run(run_blog_job(blog_id, TEST_DB))
+
+    post = get_blog_post(TEST_DB, blog_id)
+    assert post["status"] == "failed"
+    assert post["error_message"] == "model down"
+
+
+def test_invalidate_job_blogs():
+    save_blog(TEST_DB, "job_1", "article", True, ARTICLE)
+    save_blog(TEST_DB, "job_2", "article", True, ARTICLE)
+
+    assert invalidate_job_blogs(TEST_DB, "job_1") == 1
+    assert find_blog_post(TEST_DB, "job_1", "article", True) is None
+    assert find_blog_post(TEST_DB, "job_2", "article", True)["status"] == "completed"
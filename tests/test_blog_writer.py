@@ -1,13 +1,15 @@
 # tests/test_blog_writer.py
+import json
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
-from app.services.blog_writer import generate_blog
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.services.blog_writer import generate_blog, generate_blog_async
 
 
-@patch("app.services.blog_writer.openai.OpenAI")
-def test_generate_blog_returns_markdown(mock_openai_class):
+@patch("app.services.blog_writer.get_openai_client")
+def test_generate_blog_returns_markdown(mock_get_client):
     mock_client = MagicMock()
-    mock_openai_class.return_value = mock_client
+    mock_get_client.return_value = mock_client
 
     mock_message = MagicMock()
     mock_message.content = '{"title": "Docker Tutorial: A Complete Guide", "content_markdown": "# Docker Tutorial\\n\\n## Introduction\\n\\nThis tutorial covers Docker basics.", "image_suggestions": [{"timestamp": 5.0, "caption": "Docker architecture", "insert_after": "## Architecture"}]}'
@@ -33,10 +35,10 @@ def test_generate_blog_returns_markdown(mock_openai_class):
     assert len(result["image_suggestions"]) == 1
 
 
-@patch("app.services.blog_writer.openai.OpenAI")
-def test_generate_blog_handles_no_visuals(mock_openai_class):
+@patch("app.services.blog_writer.get_openai_client")
+def test_generate_blog_handles_no_visuals(mock_get_client):
     mock_client = MagicMock()
-    mock_openai_class.return_value = mock_client
+    mock_get_client.return_value = mock_client
 
     mock_message = MagicMock()
     mock_message.content = '{"title": "Test Blog", "content_markdown": "# Test\\n\\nContent.", "image_suggestions": []}'
@@ -59,3 +61,248 @@ def test_generate_blog_handles_no_visuals(mock_openai_class):
 
     assert result["title"] == "Test Blog"
     assert result["image_suggestions"] == []
+
+
+@patch("app.services.blog_writer.get_async_openai_client")
+def test_generate_blog_async_returns_markdown(mock_get_client):
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+
+    mock_message = MagicMock()
+    mock_message.content = '{"title": "Async Blog", "content_markdown": "# Async\\n\\nContent.", "image_suggestions": []}'
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock(message=mock_message)]
+
+    mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+    result = asyncio.run(generate_blog_async(
+        transcript="Simple transcript.",
+        summary="A simple video.",
+        chapters=[],
+        visual_analysis=[],
+        style="article"
+    ))
+
+    assert result["title"] == "Async Blog"
+    mock_client.chat.completions.create.assert_awaited_once()
+
+
+@patch("app.services.blog_writer.get_async_openai_client")
+def test_stream_blog_streams_markdown_and_ends_with_metadata(mock_get_client):
+    from app.services.blog_writer import stream_blog
+
+    async def chunks():
+        for text in ["## Setup\n\nInstall ", "Docker.", "\n@@METADATA@@\n",
+                     '{"title": "Docker Guide", "image_suggestions": [{"timestamp": 5.0}]}']:
+            yield MagicMock(choices=[MagicMock(delta=MagicMock(content=text))], usage=None)
+
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+    mock_client.chat.completions.create = AsyncMock(return_value=chunks())
+
+    async def collect():
+        return [event async for event in stream_blog(
+            transcript="Install Docker", summary="Docker", chapters=[], visual_analysis=[]
+        )]
+
+    events = asyncio.run(collect())
+
+    assert [kind for kind, _ in events][-1] == "done"
+    assert events[-1][1] == {
+        "title": "Docker Guide",
+        "content_markdown": "## Setup\n\nInstall Docker.",
+        "image_suggestions": [{"timestamp": 5.0}],
+    }
+
+
+def test_chapter_ranges_parse_timestamps_and_fill_gaps():
+    from app.services.blog_writer import _chapter_ranges
+    chapters = [
+        {"start": "0:00", "end": "5:00", "title": "Intro"},
+        {"start": "5:00", "end": "", "title": "Setup"},
+        {"start": "1:02:30", "end": "bad", "title": "Wrap-up"},
+    ]
+
+    assert _chapter_ranges(chapters) == [(0.0, 300.0), (300.0, 3750.0), (3750.0, float("inf"))]
+    assert _chapter_ranges([{"start": "soon", "title": "?"}]) == []
+
+
+LONG_SEGMENTS = [
+    {"start": 10.0, "end": 20.0, "text": "Install Docker on Ubuntu. " * 200},
+    {"start": 400.0, "end": 420.0, "text": "Deploy the cluster with kubectl. " * 200},
+]
+LONG_CHAPTERS = [
+    {"start": "0:00", "end": "5:00", "title": "Install"},
+    {"start": "5:00", "end": "10:00", "title": "Deploy"},
+]
+
+
+def _sectioned_client(started):
+    outline = {
+        "title": "From Zero to Cluster", "introduction": "Intro paragraph.",
+        "sections": [
+            {"chapter": 1, "heading": "Installing Docker", "points": ["apt"]},
+            {"chapter": 2, "heading": "Deploying", "points": ["kubectl"]},
+            {"chapter": 9, "heading": "Invalid", "points": []},
+        ],
+    }
+
+    async def create(**kwargs):
+        system = kwargs["messages"][0]["content"]
+        user = kwargs["messages"][1]["content"]
+        if "plan blog articles" in system:
+            content = json.dumps(outline)
+        elif "Section: Installing Docker" in user:
+            # Only finishes once the second section has started: the calls must overlap
+            await asyncio.wait_for(started.wait(), timeout=1)
+            assert "kubectl" not in user
+            content = json.dumps({"content_markdown": "Use apt.", "image_suggestions": [{"timestamp": 12.0, "caption": "apt"}]})
+        else:
+            started.set()
+            content = json.dumps({"content_markdown": "Run kubectl apply.", "image_suggestions": []})
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=create)
+    return client
+
+
+@patch("app.services.blog_writer.get_async_openai_client")
+def test_long_videos_use_outline_then_concurrent_sections(mock_get_client):
+    async def run():
+        mock_get_client.return_value = _sectioned_client(asyncio.Event())
+        return await generate_blog_async(
+            transcript="x" * 9000, summary="Docker to Kubernetes", chapters=LONG_CHAPTERS,
+            visual_analysis=[], segments=LONG_SEGMENTS
+        )
+
+    result = asyncio.run(run())
+
+    assert result["title"] == "From Zero to Cluster"
+    assert result["content_markdown"] == (
+        "Intro paragraph.\n\n## Installing Docker\n\nUse apt.\n\n## Deploying\n\nRun kubectl apply."
+    )
+    assert result["image_suggestions"] == [{"timestamp": 12.0, "caption": "apt", "insert_after": "## Installing Docker"}]
+    assert mock_get_client.return_value.chat.completions.create.await_count == 3
+
+
+@patch("app.services.blog_writer.get_async_openai_client")
+def test_stream_blog_streams_sections_in_order(mock_get_client):
+    from app.services.blog_writer import stream_blog
+
+    async def run():
+        mock_get_client.return_value = _sectioned_client(asyncio.Event())
+        return [event async for event in stream_blog(
+            transcript="x" * 9000, summary="s", chapters=LONG_CHAPTERS, visual_analysis=[], segments=LONG_SEGMENTS
+        )]
+
+    events = asyncio.run(run())
+
+    assert [text for kind, text in events if kind == "delta"] == [
+        "Intro paragraph.", "\n\n## Installing Docker\n\nUse apt.", "\n\n## Deploying\n\nRun kubectl apply."
+    ]
+    assert events[-1][1]["content_markdown"].endswith("Run kubectl apply.")
+
+
+@patch("app.services.blog_writer.get_async_openai_client")
+def test_short_videos_keep_single_call(mock_get_client):
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+    mock_client.chat.completions.create = AsyncMock(return_value=MagicMock(choices=[MagicMock(message=MagicMock(
+        content='{"title": "Short", "content_markdown": "Body", "image_suggestions": []}'
+    ))]))
+
+    result = asyncio.run(generate_blog_async(
+        transcript="short talk", summary="s", chapters=LONG_CHAPTERS, visual_analysis=[], segments=LONG_SEGMENTS
+    ))
+
+    assert result["title"] == "Short"
+    mock_client.chat.completions.create.assert_awaited_once()
+
+
+def test_section_ranges_cover_every_segment():
+    from app.services.blog_writer import _section_ranges
+    chapters = [
+        {"start": "0:30", "end": "1:00", "title": "Intro"},
+        {"start": "2:00", "end": "3:00", "title": "Aside"},
+        {"start": "5:00", "end": "6:00", "title": "Main"},
+    ]
+    segments = [{"start": t, "text": "x"} for t in (0.0, 90.0, 150.0, 400.0)]
+
+    # Chapter 2 is skipped by the outline, so it folds into chapter 1's section
+    ranges = _section_ranges([{"chapter": 1}, {"chapter": 3}], chapters, segments)
+
+    assert ranges == [(0.0, 300.0), (300.0, float("inf"))]
+    assert _section_ranges([{"chapter": 3}, {"chapter": 1}], chapters, segments) == []
+    # Nothing is said during chapter 3
+    assert _section_ranges([{"chapter": 1}, {"chapter": 3}], chapters, segments[:3]) == []
+
+
+@patch("app.services.blog_writer.get_async_openai_client")
+def test_failed_section_falls_back_to_single_call(mock_get_client):
+    outline = {"title": "Outlined", "sections": [
+        {"chapter": 1, "heading": "Installing Docker"}, {"chapter": 2, "heading": "Deploying"}
+    ]}
+
+    async def create(**kwargs):
+        system = kwargs["messages"][0]["content"]
+        if "plan blog articles" in system:
+            content = json.dumps(outline)
+        elif "one section" in system:
+            content = '{"content_markdown": "trunc'
+        else:
+            content = '{"title": "Single", "content_markdown": "Whole article", "image_suggestions": []}'
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(side_effect=create)
+    mock_get_client.return_value = mock_client
+
+    result = asyncio.run(generate_blog_async(
+        transcript="x" * 9000, summary="s", chapters=LONG_CHAPTERS, visual_analysis=[], segments=LONG_SEGMENTS
+    ))
+
+    assert result == {"title": "Single", "content_markdown": "Whole article", "image_suggestions": []}
+
+
+def test_split_range_keeps_parts_under_limit_and_contiguous():
+    from app.services.blog_writer import _split_range
+    segments = [{"start": float(t), "text": "y" * 39} for t in range(0, 100, 10)]
+
+    parts = _split_range((0.0, float("inf")), segments, max_chars=100)
+
+    assert parts == [(0.0, 20.0), (20.0, 40.0), (40.0, 60.0), (60.0, 80.0), (80.0, float("inf"))]
+    assert _split_range((0.0, 50.0), segments, max_chars=1000) == [(0.0, 50.0)]
+
+
+@patch("app.services.blog_writer.BLOG_SECTION_MAX_CHARS", 3000)
+@patch("app.services.blog_writer.get_async_openai_client")
+def test_long_sections_are_written_in_parts(mock_get_client):
+    outline = {"title": "T", "sections": [{"chapter": 1, "heading": "Everything"}]}
+    segments = [{"start": float(t), "end": float(t + 60), "text": f"Part{t} " + "words " * 400} for t in (0, 60, 120)]
+    prompts = []
+
+    async def create(**kwargs):
+        user = kwargs["messages"][1]["content"]
+        if "plan blog articles" in kwargs["messages"][0]["content"]:
+            content = json.dumps(outline)
+        else:
+            prompts.append(user)
+            content = json.dumps({"content_markdown": user.split("Transcript for this part:\n")[1][:6]})
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(side_effect=create)
+    mock_get_client.return_value = mock_client
+
+    result = asyncio.run(generate_blog_async(
+        transcript="x" * 9000, summary="s", chapters=[{"start": "0:00", "title": "All"}], visual_analysis=[],
+        segments=segments
+    ))
+
+    assert len(prompts) == 3
+    assert sorted(prompt.split("\n")[1][:20] for prompt in prompts) == [
+        "This is part 1 of 3 ", "This is part 2 of 3 ", "This is part 3 of 3 "
+    ]
+    assert result["content_markdown"] == "## Everything\n\nPart0\n\nPart60\n\nPart12"
@@ -76,3 +76,26 @@ def test_cleanup_old_frames_keeps_recent_dirs():
 def test_cleanup_temp_handles_missing_dir():
     result = cleanup_temp_files("./data/nonexistent_dir", max_age_seconds=3600)
     assert result["deleted"] == 0
+
+
+def test_cleanup_old_frames_handles_tiered_layout():
+    old_job_dir = os.path.join(FRAMES_DIR, "job_tiered_old")
+    recent_job_dir = os.path.join(FRAMES_DIR, "job_tiered_recent")
+    old_time = time.time() - (31 * 86400)
+    for job_dir in (old_job_dir, recent_job_dir):
+        for tier in ("analysis", "thumbs", "sprites"):
+            os.makedirs(os.path.join(job_dir, tier), exist_ok=True)
+            with open(os.path.join(job_dir, tier, "frame_0001.webp"), "w") as f:
+                f.write("x" * 100)
+        for root, dirs, files in os.walk(job_dir):
+            for name in dirs + files:
+                os.utime(os.path.join(root, name), (old_time, old_time))
+        os.utime(job_dir, (old_time, old_time))
+    # Sprites regenerated recently: the job directory's own mtime does not change
+    os.utime(os.path.join(recent_job_dir, "sprites", "frame_0001.webp"))
+
+    result = cleanup_old_frames(FRAMES_DIR, max_age_days=30)
+
+    assert result == {"deleted_dirs": 1, "freed_bytes": 300}
+    assert not os.path.exists(old_job_dir)
+    assert os.path.exists(recent_job_dir)
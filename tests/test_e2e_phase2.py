@@ -55,7 +55,11 @@ def test_full_phase2_flow(
         "detailed": "This tutorial covers Docker containers and images for beginners.",
         "chapters": [{"start": "0:00", "end": "5:00", "title": "Introduction"}, {"start": "5:00", "end": "10:00", "title": "Containers"}]
     }
-    mock_extract_frames.return_value = ["/tmp/frames/frame_0001.jpg", "/tmp/frames/frame_0002.jpg", "/tmp/frames/frame_0003.jpg"]
+    mock_extract_frames.return_value = [
+        {"path": "/tmp/frames/frame_0001.jpg", "timestamp": 0.0},
+        {"path": "/tmp/frames/frame_0002.jpg", "timestamp": 5.005},
+        {"path": "/tmp/frames/frame_0003.jpg", "timestamp": 10.01},
+    ]
     mock_dedup.return_value = ["/tmp/frames/frame_0001.jpg", "/tmp/frames/frame_0003.jpg"]
     mock_analyze_frames.return_value = [
         {"timestamp": 0.0, "frame_path": "/tmp/frames/frame_0001.jpg", "description": "Title slide: Docker Tutorial"},
@@ -84,7 +88,7 @@ def test_full_phase2_flow(
     assert "Title slide" in data["visual_analysis"][0]["description"]
 
     # Step 4: Ask a question
-    with patch("app.routers.ask.answer_question") as mock_qa:
+    with patch("app.routers.ask.answer_question_async") as mock_qa:
         mock_qa.return_value = {
             "answer": "The docker run command was shown at 0:10.",
             "relevant_timestamps": ["0:10"],
@@ -99,7 +103,7 @@ def test_full_phase2_flow(
     assert "docker run" in response.json()["answer"]
 
     # Step 5: Generate blog
-    with patch("app.routers.blog.generate_blog") as mock_blog:
+    with patch("app.routers.blog.generate_blog_async") as mock_blog:
         mock_blog.return_value = {
             "title": "Docker Tutorial: Getting Started with Containers",
             "content_markdown": "# Docker Tutorial\n\n## Introduction\n\nLearn Docker basics.",
@@ -0,0 +1,99 @@
+# tests/test_embeddings.py
+import os
+import json
+import pytest
+import numpy as np
+from unittest.mock import patch
+from app.database import init_db, get_connection
+from app.services.embeddings import (
+    embed_texts, store_job_embeddings, top_k, rank_job_passages, model_name,
+    clear_job_embeddings
+)
+from app.services.retrieval import build_job_embeddings
+
+TEST_DB = "./data/test_embeddings.db"
+
+
+@pytest.fixture(autouse=True)
+def setup_teardown():
+    os.makedirs("./data", exist_ok=True)
+    init_db(TEST_DB)
+    with patch("app.services.embeddings.EMBEDDING_BACKEND", "local"):
+        yield
+    if os.path.exists(TEST_DB):
+        os.remove(TEST_DB)
+
+
+def test_local_backend_is_deterministic_and_normalized():
+    first = embed_texts(["Install Docker on Ubuntu", "Deploy with Kubernetes"])
+    second = embed_texts(["Install Docker on Ubuntu", "Deploy with Kubernetes"])
+
+    assert first.dtype == np.float32
+    assert np.array_equal(first, second)
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+    assert model_name().startswith("local-hash-")
+
+
+def test_store_job_embeddings_uses_float16_blob():
+    store_job_embeddings(TEST_DB, "job_1", ["one passage", "another passage"])
+
+    conn = get_connection(TEST_DB)
+    row = conn.execute("SELECT * FROM job_embeddings WHERE job_id = 'job_1'").fetchone()
+    conn.close()
+    assert row["dtype"] == "float16"
+    assert len(row["matrix"]) == 2 * row["dim"] * 2
+
+
+def test_top_k_returns_best_rows_in_order():
+    matrix = np.array([[1.0, 0.0], [0.0, 1.0], [0.6, 0.8], [0.8, 0.6]], dtype=np.float16)
+
+    best, scores = top_k(matrix, np.array([1.0, 0.0], dtype=np.float32), 2)
+
+    assert list(best) == [0, 3]
+    assert scores[0] >= scores[1]
+    assert len(top_k(matrix, np.array([1.0, 0.0]), 10)[0]) == 4
+
+
+def test_rank_job_passages_prefers_shared_vocabulary():
+    store_job_embeddings(TEST_DB, "job_1", [
+        "welcome to the channel",
+        "kubernetes schedules pods across nodes",
+        "thanks for watching",
+    ])
+
+    assert rank_job_passages(TEST_DB, "job_1", "how does kubernetes schedule pods")[0] == 1
+    assert rank_job_passages(TEST_DB, "job_missing", "anything") == []
+
+
+def test_rank_job_passages_ignores_other_models():
+    store_job_embeddings(TEST_DB, "job_a", ["install docker on ubuntu"])
+    with patch("app.services.embeddings.EMBEDDING_LOCAL_DIM", 64):
+        assert rank_job_passages(TEST_DB, "job_a", "install docker") == []
+
+
+def test_build_job_embeddings_from_job_columns():
+    job = {
+        "id": "job_1",
+        "transcript_segments": json.dumps([{"start": 0.0, "end": 4.0, "text": "Install Docker first."}]),
+        "visual_analysis": json.dumps([{"timestamp": 2.0, "frame_path": "f.webp", "description": "A terminal"}]),
+    }
+
+    assert build_job_embeddings(TEST_DB, job) == 2
+    assert rank_job_passages(TEST_DB, "job_1", "terminal")[0] == 1
+
+
+def test_clear_job_embeddings_drops_only_that_job():
+    store_job_embeddings(TEST_DB, "job_1", ["docker install"])
+    store_job_embeddings(TEST_DB, "job_2", ["kubernetes pods"])
+
+    assert clear_job_embeddings(TEST_DB, "job_1") == 1
+
+    assert rank_job_passages(TEST_DB, "job_1", "docker") == []
+    assert rank_job_passages(TEST_DB, "job_2", "pods") == [0]
+
+
+def test_rank_job_passages_rejects_mismatched_matrix():
+    store_job_embeddings(TEST_DB, "job_1", ["docker install", "kubernetes pods"])
+
+    with pytest.raises(ValueError):
+        rank_job_passages(TEST_DB, "job_1", "docker", expected_rows=3)
@@ -1,4 +1,5 @@
 import os
+import json
 import pytest
 from unittest.mock import patch
 from fastapi.testclient import TestClient
@@ -34,6 +35,18 @@ def test_analyze_returns_job_id(client):
     assert "job_id" in data
     assert data["status"] == "processing"
 
+@patch("app.routers.analyze.DATABASE_URL", TEST_DB)
+def test_analyze_records_plan_for_frame_budget(client):
+    from app.models import get_job
+    with patch("app.routers.analyze.process_video"):
+        response = client.post(
+            "/api/v1/analyze",
+            json={"url": "https://youtube.com/watch?v=test", "options": {"visual_analysis": True, "plan": "free"}},
+            headers=AUTH
+        )
+    options = json.loads(get_job(TEST_DB, response.json()["job_id"])["options"])
+    assert options == {"visual_analysis": True, "plan": "business"}
+
 def test_analyze_missing_url(client):
     response = client.post("/api/v1/analyze", json={}, headers=AUTH)
     assert response.status_code == 422
@@ -81,3 +94,59 @@ def test_result_includes_visual_analysis(client):
     assert "visual_analysis" in data
     assert len(data["visual_analysis"]) == 1
     assert data["visual_analysis"][0]["description"] == "A terminal"
+
+def _completed_result_job():
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={})
+    update_job_status(
+        TEST_DB, job_id, status="completed",
+        video_title="Docker 101", transcript_text="Hello",
+        transcript_segments='[{"start": 0.0, "end": 1.0, "text": "Hello"}]',
+        summary_short="Short.", summary_detailed="Detailed.",
+        subtitles_srt="1\n00:00:00,000 --> 00:00:01,000\nHello\n",
+        stage_metrics='{"stage_seconds": {}}'
+    )
+    return job_id
+
+@patch("app.routers.results.DATABASE_URL", TEST_DB)
+def test_result_fields_projection(client):
+    job_id = _completed_result_job()
+
+    response = client.get(f"/api/v1/result/{job_id}", params={"fields": "summary,video.title"}, headers=AUTH)
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "job_id": job_id, "status": "completed",
+        "video": {"title": "Docker 101"},
+        "summary": {"short": "Short.", "detailed": "Detailed."},
+    }
+
+@patch("app.routers.results.DATABASE_URL", TEST_DB)
+def test_result_exclude_and_unknown_fields(client):
+    job_id = _completed_result_job()
+
+    trimmed = client.get(
+        f"/api/v1/result/{job_id}", params={"exclude": "transcript.segments,subtitles_srt,visual_analysis"},
+        headers=AUTH
+    ).json()
+    full = client.get(f"/api/v1/result/{job_id}", headers=AUTH).json()
+    unknown = client.get(f"/api/v1/result/{job_id}", params={"fields": "summary,password"}, headers=AUTH)
+
+    assert trimmed["transcript"] == {"full_text": "Hello"}
+    assert "subtitles_srt" not in trimmed and "visual_analysis" not in trimmed
+    assert trimmed["metrics"] == {"stage_seconds": {}}
+    assert list(full) == [
+        "job_id", "status", "video", "transcript", "summary", "chapters", "subtitles_srt", "visual_analysis", "metrics"
+    ]
+    assert unknown.status_code == 400
+
+def test_result_projection_selects_only_needed_columns():
+    from fastapi import HTTPException
+    from app.routers.results import select_fields, get_result, STATUS_COLUMNS
+    with patch("app.routers.results.get_job_columns", return_value=None) as mock_get:
+        with pytest.raises(HTTPException):
+            get_result("job_x", fields="summary.short")
+
+    assert mock_get.call_args.args[2] == STATUS_COLUMNS + ["summary_short"]
+    assert select_fields(exclude="transcript,video") == [
+        "summary.short", "summary.detailed", "chapters", "subtitles_srt", "visual_analysis", "metrics"
+    ]
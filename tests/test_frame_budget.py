@@ -0,0 +1,42 @@
+# tests/test_frame_budget.py
+from app.services.frame_budget import plan_frame_budget, select_frames
+
+
+def test_short_video_keeps_base_interval():
+    budget = plan_frame_budget(300, "free")
+
+    assert budget == {"plan": "free", "max_frames": 60, "interval": 5, "extract_limit": 120}
+
+
+def test_long_video_stretches_interval():
+    # 4 hours at 5s would be 2,880 frames; pro allows 300 analyzed, 600 extracted
+    budget = plan_frame_budget(4 * 3600, "pro")
+
+    assert budget["max_frames"] == 300
+    assert budget["interval"] == 24
+    assert 4 * 3600 / budget["interval"] <= budget["extract_limit"]
+
+
+def test_request_max_frames_lowers_plan_cap():
+    assert plan_frame_budget(600, "business", max_frames=20)["max_frames"] == 20
+    assert plan_frame_budget(600, "free", max_frames=5000)["max_frames"] == 60
+
+
+def test_unknown_plan_falls_back_to_free():
+    assert plan_frame_budget(600, None)["plan"] == "free"
+    assert plan_frame_budget(600, "enterprise")["max_frames"] == 60
+
+
+def test_select_frames_spreads_across_video():
+    frames = [{"path": f"f{i}.jpg", "timestamp": float(i * 10)} for i in range(100)]
+
+    selected = select_frames(frames, 5)
+
+    assert [f["timestamp"] for f in selected] == [0.0, 250.0, 500.0, 740.0, 990.0]
+
+
+def test_select_frames_under_budget_unchanged():
+    frames = [{"path": "a.jpg", "timestamp": 0.0}, {"path": "b.jpg", "timestamp": 5.0}]
+
+    assert select_frames(frames, 10) == frames
+    assert select_frames(frames, 1) == [frames[1]]
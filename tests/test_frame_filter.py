@@ -0,0 +1,109 @@
+# tests/test_frame_filter.py
+import pytest
+import numpy as np
+from unittest.mock import patch
+from PIL import Image, ImageDraw, ImageFilter
+from app.services.frame_filter import score_frame, classify_scores, filter_informative, text_score
+
+
+def _save(img, path):
+    img.save(path, quality=85)
+    return str(path)
+
+
+@pytest.fixture
+def frames(tmp_path):
+    rng = np.random.default_rng(0)
+    code = Image.new("RGB", (1280, 720), "white")
+    draw = ImageDraw.Draw(code)
+    for i in range(20):
+        draw.text((50, 30 + i * 30), "def scale(x): return x * 2  # helper " * 2, fill="black")
+    photo = Image.fromarray((rng.random((720, 1280, 3)) * 255).astype(np.uint8)).filter(ImageFilter.GaussianBlur(3))
+    return {
+        "black": _save(Image.new("RGB", (1280, 720), "black"), tmp_path / "black.jpg"),
+        "solid": _save(Image.new("RGB", (1280, 720), (30, 90, 200)), tmp_path / "solid.jpg"),
+        "fade": _save(Image.blend(Image.new("RGB", (1280, 720), "black"), code, 0.05), tmp_path / "fade.jpg"),
+        "blurred": _save(code.filter(ImageFilter.GaussianBlur(12)), tmp_path / "blurred.jpg"),
+        "code": _save(code, tmp_path / "code.jpg"),
+        "photo": _save(photo, tmp_path / "photo.jpg"),
+    }
+
+
+@pytest.fixture
+def scenes(tmp_path):
+    rng = np.random.default_rng(1)
+    sky = np.linspace(0, 1, 720)[:, None, None] * np.array([120, 60, -100]) + np.array([90, 140, 220])
+    scene = Image.fromarray(np.broadcast_to(sky, (720, 1280, 3)).astype(np.uint8))
+    draw = ImageDraw.Draw(scene)
+    draw.rectangle([0, 480, 1280, 720], fill=(60, 110, 40))
+    for _ in range(40):
+        x, y, r = rng.integers(0, 1280), rng.integers(300, 700), rng.integers(10, 80)
+        draw.ellipse([x - r, y - r, x + r, y + r], fill=tuple(int(v) for v in rng.integers(0, 255, 3)))
+    grain = rng.normal(0, 12, (720, 1280, 3))
+    scene = Image.fromarray(np.clip(np.asarray(scene, dtype=np.float32) + grain, 0, 255).astype(np.uint8))
+    gradient = np.tile(np.linspace(0, 40, 1280), (720, 1)).astype(np.uint8)
+    return {
+        "scene": _save(scene, tmp_path / "scene.jpg"),
+        "night": _save(Image.blend(Image.new("RGB", (1280, 720), "black"), scene, 0.2), tmp_path / "night.jpg"),
+        "blur_20": _save(scene.filter(ImageFilter.GaussianBlur(20)), tmp_path / "blur_20.jpg"),
+        "blur_60": _save(scene.filter(ImageFilter.GaussianBlur(60)), tmp_path / "blur_60.jpg"),
+        "dark_gradient": _save(Image.fromarray(gradient).convert("RGB"), tmp_path / "dark_gradient.jpg"),
+    }
+
+
+def test_score_frame_black_is_flat(frames):
+    scores = score_frame(frames["black"])
+
+    assert scores["variance"] < 1
+    assert scores["edge_density"] == 0
+    assert scores["entropy"] < 0.5
+
+
+def test_classify_scores(frames):
+    reasons = {name: classify_scores(score_frame(path)) for name, path in frames.items()}
+
+    assert reasons == {
+        "black": "blank", "solid": "blank", "fade": "blank",
+        "blurred": "low_detail", "code": None, "photo": None,
+    }
+
+
+def test_classify_scores_natural_scenes(scenes):
+    reasons = {name: classify_scores(score_frame(path)) for name, path in scenes.items()}
+
+    # Blur and dark gradients keep a wide tonal range, so entropy alone would keep them
+    assert score_frame(scenes["blur_60"])["entropy"] > 5
+    assert reasons == {
+        "scene": None, "night": None, "blur_20": "low_detail", "blur_60": "low_detail", "dark_gradient": "blank",
+    }
+
+
+def test_filter_informative_records_skips(frames, tmp_path):
+    entries = [{"path": path, "timestamp": float(i)} for i, path in enumerate(frames.values())]
+    entries.append({"path": str(tmp_path / "missing.jpg"), "timestamp": 99.0})
+    metrics = {}
+
+    kept = filter_informative(entries, metrics=metrics)
+
+    assert [f["path"] for f in kept] == [frames["code"], frames["photo"], str(tmp_path / "missing.jpg")]
+    assert metrics == {"skipped_blank": 3, "skipped_low_detail": 1}
+
+
+def test_filter_informative_thresholds_configurable(frames):
+    entries = [{"path": frames["photo"], "timestamp": 0.0}]
+
+    with patch("app.services.frame_filter.FRAME_FILTER_MIN_ENTROPY", 8.5):
+        assert filter_informative(entries) == []
+
+
+def test_filter_informative_disabled(frames):
+    entries = [{"path": frames["black"], "timestamp": 0.0}]
+
+    with patch("app.services.frame_filter.FRAME_FILTER_ENABLED", False):
+        assert filter_informative(entries) == entries
+
+
+def test_text_score_separates_text_from_scenes(frames):
+    assert text_score(frames["code"]) >= 0.03
+    assert text_score(frames["photo"]) == 0.0
+    assert text_score(frames["black"]) == 0.0
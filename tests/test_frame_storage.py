@@ -0,0 +1,89 @@
+# tests/test_frame_storage.py
+import os
+import json
+import pytest
+from unittest.mock import patch
+from PIL import Image
+from app.services.frame_storage import compact_frames, build_sprite_sheets, job_storage_bytes
+
+
+@pytest.fixture
+def extracted(tmp_path):
+    job_dir = tmp_path / "job_abc"
+    job_dir.mkdir()
+    frames = []
+    for i, color in enumerate(["red", "green", "blue"], 1):
+        path = job_dir / f"frame_{i:04d}.jpg"
+        Image.new("RGB", (1920, 1080), color).save(path, quality=95)
+        frames.append({"path": str(path), "timestamp": (i - 1) * 5.0})
+    return str(job_dir), frames
+
+
+def test_compact_frames_writes_webp_tiers(extracted):
+    job_dir, frames = extracted
+    metrics = {}
+
+    result = compact_frames(frames, job_dir, metrics=metrics)
+
+    assert [f["timestamp"] for f in result] == [0.0, 5.0, 10.0]
+    for frame in result:
+        assert frame["path"].endswith(".webp") and "/analysis/" in frame["path"]
+        with Image.open(frame["path"]) as img:
+            assert img.format == "WEBP" and max(img.size) == 768
+        with Image.open(frame["thumbnail"]) as thumb:
+            assert thumb.width == 160
+    assert not any(f.endswith(".jpg") for f in os.listdir(job_dir))
+    assert metrics["format"] == "webp"
+    assert metrics["total_bytes"] == job_storage_bytes(job_dir)
+    assert metrics["total_bytes"] == (
+        metrics["analysis_bytes"] + metrics["thumbnail_bytes"] + metrics["sprite_bytes"]
+    )
+
+
+def test_compact_frames_deletes_dropped_frames(extracted):
+    job_dir, frames = extracted
+
+    # Only the middle frame survived dedup, filtering and selection
+    compact_frames(frames[1:2], job_dir)
+
+    remaining = sorted(
+        os.path.relpath(os.path.join(root, name), job_dir)
+        for root, _, files in os.walk(job_dir) for name in files
+    )
+    assert remaining == [
+        "analysis/frame_0001.webp", "sprites/index.json", "sprites/sprite_001.webp", "thumbs/frame_0001.webp"
+    ]
+
+
+def test_compact_frames_writes_sprite_index(extracted):
+    job_dir, frames = extracted
+
+    compact_frames(frames, job_dir)
+
+    with open(os.path.join(job_dir, "sprites", "index.json")) as f:
+        index = json.load(f)
+    assert index["sheets"] == ["sprite_001.webp"]
+    assert [(e["timestamp"], e["x"], e["y"]) for e in index["frames"]] == [(0.0, 0, 0), (5.0, 160, 0), (10.0, 320, 0)]
+    with Image.open(os.path.join(job_dir, "sprites", "sprite_001.webp")) as sheet:
+        assert sheet.size == (3 * index["tile_width"], index["tile_height"])
+
+
+def test_compact_frames_passes_through_unreadable(extracted, tmp_path):
+    job_dir, frames = extracted
+    missing = {"path": str(tmp_path / "missing.jpg"), "timestamp": 15.0}
+
+    result = compact_frames(frames + [missing], job_dir)
+
+    assert result[-1] == missing
+    assert len(result) == 4
+
+
+def test_build_sprite_sheets_pages(tmp_path):
+    thumbs = [Image.new("RGB", (160, 90), "white") for _ in range(5)]
+
+    with patch("app.services.frame_storage.FRAME_SPRITE_COLUMNS", 2), \
+         patch("app.services.frame_storage.FRAME_SPRITE_ROWS", 1):
+        index = build_sprite_sheets(thumbs, [float(i) for i in range(5)], str(tmp_path))
+
+    assert index["sheets"] == ["sprite_001.webp", "sprite_002.webp", "sprite_003.webp"]
+    assert index["frames"][3] == {"timestamp": 3.0, "sheet": "sprite_002.webp", "x": 160, "y": 0}
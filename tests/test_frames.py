@@ -1,8 +1,21 @@
 # tests/test_frames.py
 import os
 import pytest
-from unittest.mock import patch, MagicMock, call
-from app.services.frames import extract_frames, deduplicate_frames
+from concurrent.futures import ProcessPoolExecutor
+import imagehash
+from unittest.mock import patch, MagicMock
+from PIL import Image
+import numpy as np
+from app.services.frames import (
+    extract_frames, extract_unique_frames, deduplicate_frames, compute_hashes, choose_keyframes_only
+)
+
+
+SHOWINFO_STDERR = """
+[Parsed_showinfo_1 @ 0x5581] n:   0 pts:      0 pts_time:0       duration:1001 fmt:yuv420p
+[Parsed_showinfo_1 @ 0x5581] n:   1 pts: 153153 pts_time:5.005   duration:1001 fmt:yuv420p
+[Parsed_showinfo_1 @ 0x5581] n:   2 pts: 306306 pts_time:10.01   duration:1001 fmt:yuv420p
+"""
 
 
 @patch("app.services.frames.subprocess.run")
@@ -14,49 +27,261 @@ def test_extract_frames_calls_ffmpeg(mock_listdir, mock_run):
     result = extract_frames("/tmp/video.mp4", "/tmp/frames", interval=5)
 
     assert result == [
-        "/tmp/frames/frame_0001.jpg",
-        "/tmp/frames/frame_0002.jpg",
-        "/tmp/frames/frame_0003.jpg",
+        {"path": "/tmp/frames/frame_0001.jpg", "timestamp": 0.0},
+        {"path": "/tmp/frames/frame_0002.jpg", "timestamp": 5.0},
+        {"path": "/tmp/frames/frame_0003.jpg", "timestamp": 10.0},
     ]
     mock_run.assert_called_once()
     cmd = mock_run.call_args[0][0]
     assert "ffmpeg" in cmd[0]
     assert "/tmp/video.mp4" in cmd
+    video_filter = cmd[cmd.index("-vf") + 1]
+    assert "gte(t-prev_selected_t,5)" in video_filter
+    assert "showinfo" in video_filter
+    assert "scale='min(1280,iw)':-2" in video_filter
+    assert cmd[cmd.index("-frames:v") + 1] == "300"
+
+
+@patch("app.services.frames.subprocess.run")
+@patch("app.services.frames.os.listdir")
+def test_extract_frames_uses_decoder_timestamps(mock_listdir, mock_run):
+    mock_listdir.return_value = ["frame_0001.jpg", "frame_0002.jpg", "frame_0003.jpg"]
+    mock_run.return_value = MagicMock(stderr=SHOWINFO_STDERR)
+
+    result = extract_frames("/tmp/video.mp4", "/tmp/frames", interval=5)
+
+    assert [f["timestamp"] for f in result] == [0.0, 5.005, 10.01]
+
+
+@patch("app.services.frames.subprocess.run")
+@patch("app.services.frames.os.listdir")
+def test_extract_frames_scene_mode(mock_listdir, mock_run):
+    mock_listdir.return_value = ["frame_0001.jpg"]
+    mock_run.return_value = MagicMock(stderr=SHOWINFO_STDERR)
+
+    extract_frames(
+        "/tmp/video.mp4", "/tmp/frames", mode="scene",
+        scene_threshold=0.4, min_gap=3, max_frames=50
+    )
+
+    cmd = mock_run.call_args[0][0]
+    video_filter = cmd[cmd.index("-vf") + 1]
+    assert "gt(scene,0.4)*gte(t-prev_selected_t,3)" in video_filter
+    assert cmd[cmd.index("-frames:v") + 1] == "50"
+    assert cmd[cmd.index("-vsync") + 1] == "vfr"
+
+
+@patch("app.services.frames.subprocess.run")
+@patch("app.services.frames.os.listdir")
+def test_extract_frames_spreads_long_video_over_its_duration(mock_listdir, mock_run):
+    mock_listdir.return_value = []
+    mock_run.return_value = MagicMock(stderr="")
+
+    # A 4-hour video with a 600-frame cap: one sample per 24s at most reaches the end
+    extract_frames("/tmp/video.mp4", "/tmp/frames", mode="scene", min_gap=2, max_frames=600, duration=4 * 3600)
+    scene_filter = mock_run.call_args[0][0][mock_run.call_args[0][0].index("-vf") + 1]
+    extract_frames("/tmp/video.mp4", "/tmp/frames", interval=5, duration=3600)
+    interval_filter = mock_run.call_args[0][0][mock_run.call_args[0][0].index("-vf") + 1]
+
+    assert "gte(t-prev_selected_t,24.0)" in scene_filter
+    assert "gte(t-prev_selected_t,12.0)" in interval_filter
+
+
+@patch("app.services.frames.subprocess.run")
+@patch("app.services.frames.os.listdir")
+def test_extract_frames_keyframes_only(mock_listdir, mock_run):
+    mock_listdir.return_value = []
+    mock_run.return_value = None
+
+    extract_frames("/tmp/video.mp4", "/tmp/frames", keyframes_only=True)
+
+    cmd = mock_run.call_args[0][0]
+    assert cmd[cmd.index("-skip_frame") + 1] == "nokey"
+    assert cmd.index("-skip_frame") < cmd.index("-i")
+
+
+def test_choose_keyframes_only():
+    assert choose_keyframes_only(7200) is True
+    assert choose_keyframes_only(600) is False
+    assert choose_keyframes_only(0) is False
+    assert choose_keyframes_only(7200, requested=False) is False
+    assert choose_keyframes_only(600, requested=True) is True
+
+
+def test_extract_frames_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        extract_frames("/tmp/video.mp4", "/tmp/frames", mode="random")
+
+
+def _save_pattern(path, blocks):
+    """Save a 1280x720 JPEG made of a 4x4 grid of black/white blocks."""
+    img = Image.new("L", (1280, 720), 0)
+    for index, on in enumerate(blocks):
+        if on:
+            x, y = index % 4 * 320, index // 4 * 180
+            img.paste(255, (x, y, x + 320, y + 180))
+    img.convert("RGB").save(path, quality=90)
+    return str(path)
+
+
+@pytest.fixture
+def slides(tmp_path):
+    a = [1, 0] * 8
+    b = [1, 1, 0, 0] * 4
+    return {
+        "a": _save_pattern(tmp_path / "a.jpg", a),
+        "a_again": _save_pattern(tmp_path / "a_again.jpg", a),
+        "b": _save_pattern(tmp_path / "b.jpg", b),
+        "b_again": _save_pattern(tmp_path / "b_again.jpg", b),
+    }
+
+
+def test_compute_hashes_matches_reference_average_hash(slides):
+    paths = [slides["a"], slides["b"]]
+
+    hashes = compute_hashes(paths)
 
+    for path, value in zip(paths, hashes):
+        reference = int(str(imagehash.average_hash(Image.open(path))), 16)
+        assert bin(value ^ reference).count("1") <= 2
 
-@patch("app.services.frames.imagehash.average_hash")
-@patch("app.services.frames.Image.open")
-def test_deduplicate_frames_removes_similar(mock_open, mock_hash):
-    hash_a = MagicMock()
-    hash_b = MagicMock()
-    hash_c = MagicMock()
 
-    hash_a.__sub__ = MagicMock(return_value=0)
-    hash_b.__sub__ = MagicMock(return_value=0)
-    hash_c.__sub__ = MagicMock(return_value=20)
+def test_compute_hashes_parallel_matches_serial(slides):
+    paths = list(slides.values()) * 3
 
-    mock_hash.side_effect = [hash_a, hash_b, hash_c]
+    with patch("app.services.frames.FRAME_HASH_PARALLEL_MIN", 2):
+        parallel = compute_hashes(paths, workers=2)
 
-    hash_a.__sub__ = MagicMock(side_effect=lambda other: 0 if other is hash_b else 20)
+    assert parallel == compute_hashes(paths, workers=1)
+
+
+def test_compute_hashes_pool_does_not_fork(slides):
+    paths = list(slides.values()) * 3
+
+    with patch("app.services.frames.FRAME_HASH_PARALLEL_MIN", 2), \
+         patch("app.services.frames.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool:
+        compute_hashes(paths, workers=2)
+
+    assert pool.call_args.kwargs["mp_context"].get_start_method() in ("forkserver", "spawn")
+
+
+def test_deduplicate_frames_removes_similar(slides):
+    frames = [slides["a"], slides["a_again"], slides["b"]]
 
-    frames = ["/tmp/frame1.jpg", "/tmp/frame2.jpg", "/tmp/frame3.jpg"]
     result = deduplicate_frames(frames, threshold=5)
 
-    assert len(result) == 2
-    assert "/tmp/frame1.jpg" in result
-    assert "/tmp/frame3.jpg" in result
+    assert result == [slides["a"], slides["b"]]
+
+
+def test_deduplicate_frames_catches_returning_scenes(slides):
+    frames = [slides["a"], slides["b"], slides["a_again"], slides["b_again"]]
+
+    result = deduplicate_frames(frames, threshold=5)
 
+    assert result == [slides["a"], slides["b"]]
 
-@patch("app.services.frames.imagehash.average_hash")
-@patch("app.services.frames.Image.open")
-def test_deduplicate_frames_keeps_all_when_different(mock_open, mock_hash):
-    hash_a = MagicMock()
-    hash_b = MagicMock()
 
-    mock_hash.side_effect = [hash_a, hash_b]
-    hash_a.__sub__ = MagicMock(return_value=15)
+def test_deduplicate_frames_keeps_all_when_different(slides):
+    frames = [slides["a"], slides["b"]]
 
-    frames = ["/tmp/frame1.jpg", "/tmp/frame2.jpg"]
     result = deduplicate_frames(frames, threshold=5)
 
     assert len(result) == 2
+
+
+def test_deduplicate_frames_empty():
+    assert deduplicate_frames([]) == []
+
+
+def _raw_thumb(pattern):
+    """A 32x32 gray rawvideo frame from a 4x4 on/off grid."""
+    grid = np.array(pattern, dtype=np.uint8).reshape(4, 4) * 255
+    return np.kron(grid, np.ones((8, 8), dtype=np.uint8)).tobytes()
+
+
+def _fake_encode(missing=()):
+    """A seek-and-encode ffmpeg stand-in; seeks to timestamps in `missing` yield no frame."""
+    def run(cmd, **kwargs):
+        if cmd[cmd.index("-ss") + 1] not in missing:
+            with open(cmd[-1], "wb") as f:
+                f.write(b"jpeg")
+        return MagicMock(stderr=b"")
+    return run
+
+
+def _two_passes(sample, encode):
+    return lambda cmd, **kwargs: sample if "rawvideo" in cmd else encode(cmd, **kwargs)
+
+
+def _seeks(mock_run):
+    return sorted(c[0][0][c[0][0].index("-ss") + 1] for c in mock_run.call_args_list if "-ss" in c[0][0])
+
+
+@patch("app.services.frames.subprocess.run")
+def test_extract_unique_frames_encodes_only_survivors(mock_run, tmp_path):
+    a, b = [1, 0] * 8, [1, 1, 0, 0] * 4
+    mock_run.side_effect = _two_passes(
+        MagicMock(stdout=_raw_thumb(a) + _raw_thumb(b) + _raw_thumb(a), stderr=SHOWINFO_STDERR.encode()),
+        _fake_encode()
+    )
+    output_dir = str(tmp_path / "frames")
+    metrics = {}
+
+    result = extract_unique_frames("/tmp/video.mp4", output_dir, interval=5, metrics=metrics)
+
+    assert result == [
+        {"path": f"{output_dir}/frame_0001.jpg", "timestamp": 0.0},
+        {"path": f"{output_dir}/frame_0002.jpg", "timestamp": 5.005},
+    ]
+    assert metrics == {"extracted": 3, "unique": 2}
+    assert sorted(os.listdir(output_dir)) == ["frame_0001.jpg", "frame_0002.jpg"]
+
+    sample_cmd = mock_run.call_args_list[0][0][0]
+    assert sample_cmd[sample_cmd.index("-f") + 1] == "rawvideo"
+    assert "format=gray" in sample_cmd[sample_cmd.index("-vf") + 1]
+    # Each survivor is encoded by an input seek to half a frame before it, one frame each
+    assert mock_run.call_count == 3
+    assert _seeks(mock_run) == ["0.000000", "4.988333"]
+    for call in mock_run.call_args_list[1:]:
+        cmd = call[0][0]
+        assert cmd.index("-ss") < cmd.index("-i")
+        assert cmd[cmd.index("-frames:v") + 1] == "1"
+
+
+@patch("app.services.frames.subprocess.run")
+def test_extract_unique_frames_seeks_to_exact_pts(mock_run, tmp_path):
+    # ffmpeg < 7.0 prints pts_time to six significant digits; the integer pts is exact
+    sample_stderr = "\n".join([
+        "[Parsed_showinfo_1 @ 0x5581] config in time_base: 1/30000, frame_rate: 30000/1001",
+        "[Parsed_showinfo_1 @ 0x5581] n:   0 pts: 37036999 pts_time:1234.57 duration:1001",
+        "[Parsed_showinfo_1 @ 0x5581] n:   1 pts: 37187150 pts_time:1239.57 duration:1001",
+        "[Parsed_showinfo_1 @ 0x5581] n:   2 pts: 37337300 pts_time:1244.58 duration:1001",
+    ])
+    a, b, c = [1, 0] * 8, [1, 1, 0, 0] * 4, [1] * 8 + [0] * 8
+    # The seek to the second survivor yields no frame
+    mock_run.side_effect = _two_passes(
+        MagicMock(stdout=_raw_thumb(a) + _raw_thumb(b) + _raw_thumb(c), stderr=sample_stderr.encode()),
+        _fake_encode(missing={"1239.554983"})
+    )
+    output_dir = tmp_path / "frames"
+    output_dir.mkdir()
+    (output_dir / "frame_0002.jpg").write_bytes(b"stale")
+
+    result = extract_unique_frames("/tmp/video.mp4", str(output_dir), interval=5, keyframes_only=True)
+
+    assert result == [
+        {"path": f"{output_dir}/frame_0001.jpg", "timestamp": 1234.567},
+        {"path": f"{output_dir}/frame_0003.jpg", "timestamp": 1244.577},
+    ]
+    assert _seeks(mock_run) == ["1234.549950", "1239.554983", "1244.559983"]
+    assert all("nokey" in call[0][0] for call in mock_run.call_args_list)
+    assert sorted(os.listdir(output_dir)) == ["frame_0001.jpg", "frame_0002.jpg", "frame_0003.jpg"]
+    assert (output_dir / "frame_0002.jpg").read_bytes() == b"stale"
+
+
+@patch("app.services.frames.subprocess.run")
+def test_extract_unique_frames_no_frames(mock_run):
+    mock_run.return_value = MagicMock(stdout=b"", stderr=b"")
+
+    assert extract_unique_frames("/tmp/video.mp4", "/tmp/frames") == []
+    mock_run.assert_called_once()
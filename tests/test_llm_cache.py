@@ -0,0 +1,117 @@
+# tests/test_llm_cache.py
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from app.services.llm_cache import (
+    make_cache_key, cached_chat_completion, get_cache_stats, store_response,
+    get_cached_response, purge_expired
+)
+
+MESSAGES = [{"role": "user", "content": "Summarize this"}]
+
+
+def _mock_client(content="cached answer", total_tokens=120):
+    mock_client = MagicMock()
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock(message=MagicMock(content=content))]
+    mock_response.usage.total_tokens = total_tokens
+    mock_client.chat.completions.create.return_value = mock_response
+    return mock_client
+
+
+def test_cache_key_depends_on_model_messages_and_params():
+    key = make_cache_key("gpt-4o", MESSAGES, {"temperature": 0.3})
+    assert key == make_cache_key("gpt-4o", MESSAGES, {"temperature": 0.3})
+    assert key != make_cache_key("gpt-4o-mini", MESSAGES, {"temperature": 0.3})
+    assert key != make_cache_key("gpt-4o", MESSAGES, {"temperature": 0.4})
+
+
+def test_second_identical_call_is_served_from_cache():
+    client = _mock_client()
+
+    first = cached_chat_completion(client, model="gpt-4o", messages=MESSAGES, temperature=0.3)
+    second = cached_chat_completion(client, model="gpt-4o", messages=MESSAGES, temperature=0.3)
+
+    assert first == second == "cached answer"
+    client.chat.completions.create.assert_called_once()
+    stats = get_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["tokens_saved"] == 120
+
+
+def test_use_cache_false_bypasses_cache():
+    client = _mock_client()
+
+    cached_chat_completion(client, model="gpt-4o", messages=MESSAGES)
+    cached_chat_completion(client, model="gpt-4o", messages=MESSAGES, use_cache=False)
+
+    assert client.chat.completions.create.call_count == 2
+
+
+def test_expired_entries_are_misses():
+    store_response("key1", "gpt-4o", "old", 10)
+    with patch("app.services.llm_cache.LLM_CACHE_TTL_SECONDS", 60):
+        with patch("app.services.llm_cache.time.time", return_value=time.time() + 120):
+            assert get_cached_response("key1") is None
+            store_response("key2", "gpt-4o", "old", 10)
+        with patch("app.services.llm_cache.time.time", return_value=time.time() + 240):
+            assert purge_expired()["deleted"] == 1
+
+
+def test_eviction_keeps_cache_within_max_entries():
+    with patch("app.services.llm_cache.LLM_CACHE_MAX_ENTRIES", 2):
+        store_response("a", "gpt-4o", "A", 1)
+        store_response("b", "gpt-4o", "B", 1)
+        store_response("c", "gpt-4o", "C", 1)
+
+    assert get_cache_stats()["entries"] == 2
+
+
+def test_streamed_completion_is_cached_for_replay():
+    import asyncio
+    from unittest.mock import AsyncMock
+    from app.services.llm_cache import stream_chat_completion_async
+
+    async def chunks():
+        for text in ["Hello ", "world"]:
+            yield MagicMock(choices=[MagicMock(delta=MagicMock(content=text))], usage=None)
+        yield MagicMock(choices=[], usage=MagicMock(total_tokens=42))
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=lambda **kwargs: chunks())
+
+    async def collect():
+        return [c async for c in stream_chat_completion_async(client, "gpt-4o", MESSAGES, temperature=0.3)]
+
+    assert asyncio.run(collect()) == ["Hello ", "world"]
+    assert asyncio.run(collect()) == ["Hello world"]
+    client.chat.completions.create.assert_awaited_once()
+    assert get_cache_stats()["tokens_saved"] == 42
+    assert cached_chat_completion(client, model="gpt-4o", messages=MESSAGES, temperature=0.3) == "Hello world"
+
+
+def test_response_is_cached_only_after_it_parses():
+    import json
+    client = _mock_client(content="not json")
+
+    with pytest.raises(ValueError):
+        cached_chat_completion(client, model="gpt-4o", messages=MESSAGES, parse=json.loads)
+    assert get_cache_stats()["entries"] == 0
+    assert get_cache_stats()["upstream_calls"] == 1
+
+    client.chat.completions.create.return_value.choices[0].message.content = '{"ok": true}'
+    assert cached_chat_completion(client, model="gpt-4o", messages=MESSAGES, parse=json.loads) == {"ok": True}
+    assert cached_chat_completion(client, model="gpt-4o", messages=MESSAGES, parse=json.loads) == {"ok": True}
+    assert client.chat.completions.create.call_count == 2
+
+
+def test_unparseable_cache_entry_is_dropped_and_refetched():
+    import json
+    key = make_cache_key("gpt-4o", MESSAGES, {})
+    store_response(key, "gpt-4o", '{"truncated', 10)
+    client = _mock_client(content='{"ok": true}')
+
+    assert cached_chat_completion(client, model="gpt-4o", messages=MESSAGES, parse=json.loads) == {"ok": True}
+    client.chat.completions.create.assert_called_once()
+    assert get_cached_response(key)["content"] == '{"ok": true}'
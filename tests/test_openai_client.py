@@ -0,0 +1,56 @@
+# tests/test_openai_client.py
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.services import openai_client
+from app.services.openai_client import (
+    get_openai_client, get_async_openai_client, close_openai_clients, close_async_openai_client
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    close_openai_clients()
+    yield
+    close_openai_clients()
+
+
+def test_sync_client_is_shared_across_calls():
+    with patch("app.services.openai_client.OPENAI_API_KEY", "sk-test"):
+        first = get_openai_client()
+        second = get_openai_client()
+
+    assert first is second
+
+
+def test_sync_client_uses_configured_timeout_and_pool():
+    with patch("app.services.openai_client.OPENAI_API_KEY", "sk-test"), \
+         patch("app.services.openai_client.OPENAI_TIMEOUT_SECONDS", 42.0), \
+         patch("app.services.openai_client.OPENAI_MAX_CONNECTIONS", 7):
+        client = get_openai_client()
+        limits = openai_client._limits()
+
+    assert client.timeout.read == 42.0
+    assert limits.max_connections == 7
+
+
+def test_close_releases_sync_client():
+    with patch("app.services.openai_client.OPENAI_API_KEY", "sk-test"):
+        first = get_openai_client()
+        close_openai_clients()
+        second = get_openai_client()
+
+    assert first is not second
+
+
+def test_async_client_is_shared_within_event_loop():
+    async def fetch_twice():
+        first = get_async_openai_client()
+        second = get_async_openai_client()
+        await close_async_openai_client()
+        return first, second
+
+    with patch("app.services.openai_client.OPENAI_API_KEY", "sk-test"):
+        first, second = asyncio.run(fetch_twice())
+
+    assert first is second
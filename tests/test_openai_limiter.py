@@ -0,0 +1,92 @@
+# tests/test_openai_limiter.py
+import time
+import httpx
+import openai
+import pytest
+from unittest.mock import patch, MagicMock
+from app.services.openai_limiter import (
+    estimate_tokens, acquire, record_rate_limited, call_with_retry, retry_delay, image_tokens
+)
+
+SMALL_LIMITS = {"gpt-4o": {"rpm": 60, "tpm": 600}}
+
+
+def _rate_limit_error(retry_after="3"):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def test_estimate_tokens_counts_text_images_and_completion():
+    messages = [
+        {"role": "system", "content": "x" * 400},
+        {"role": "user", "content": [
+            {"type": "image_url", "image_url": {"url": "data:...", "detail": "low"}},
+            {"type": "text", "text": "y" * 40},
+        ]},
+    ]
+    assert estimate_tokens(messages, max_tokens=100) == 100 + 10 + 85 + 100
+
+
+def test_image_tokens_follow_tile_count():
+    assert image_tokens(1920, 1080, "low") == 85
+    assert image_tokens(512, 512) == 85 + 170
+    # 1024x576 stays as is: 2x2 tiles
+    assert image_tokens(1024, 576) == 85 + 170 * 4
+    # 2048x4096 -> 1024x2048 -> 768x1536: 2x3 tiles
+    assert image_tokens(2048, 4096) == 85 + 170 * 6
+
+
+@patch("app.services.openai_limiter.OPENAI_LIMIT_HEADROOM", 1.0)
+@patch("app.services.openai_limiter.MODEL_LIMITS", SMALL_LIMITS)
+def test_acquire_waits_once_token_budget_is_spent():
+    assert acquire("gpt-4o", tokens=500) == 0
+    wait = acquire("gpt-4o", tokens=500)
+    # 400 tokens of debt refilled at 10 tokens/second
+    assert wait == pytest.approx(40, abs=1)
+
+
+@patch("app.services.openai_limiter.OPENAI_LIMIT_HEADROOM", 1.0)
+@patch("app.services.openai_limiter.MODEL_LIMITS", SMALL_LIMITS)
+def test_rate_limit_throttles_future_acquires():
+    assert acquire("gpt-4o", tokens=400) == 0
+    record_rate_limited("gpt-4o")
+    # Capacity halves to 300 tokens/min, so 50 tokens of debt refill at 5 tokens/second
+    assert acquire("gpt-4o", tokens=250) == pytest.approx(10, abs=1)
+
+
+def test_retry_delay_honours_retry_after():
+    with patch("app.services.openai_limiter.random.uniform", return_value=0):
+        assert retry_delay(_rate_limit_error("3"), attempt=0) == 3.0
+
+
+@patch("app.services.openai_limiter.time.sleep")
+def test_call_with_retry_retries_rate_limits(mock_sleep):
+    fn = MagicMock(side_effect=[_rate_limit_error("2"), "ok"])
+
+    result = call_with_retry(fn, "gpt-4o", estimated_tokens=10)
+
+    assert result == "ok"
+    assert fn.call_count == 2
+    assert mock_sleep.call_args[0][0] >= 2.0
+
+
+@patch("app.services.openai_limiter.time.sleep")
+def test_call_with_retry_does_not_retry_past_deadline(mock_sleep):
+    fn = MagicMock(side_effect=_rate_limit_error("30"))
+
+    with pytest.raises(openai.RateLimitError):
+        call_with_retry(fn, "gpt-4o", deadline=time.monotonic() + 5)
+
+    fn.assert_called_once()
+    mock_sleep.assert_not_called()
+
+
+@patch("app.services.openai_limiter.time.sleep")
+def test_call_with_retry_does_not_retry_other_errors(mock_sleep):
+    fn = MagicMock(side_effect=ValueError("bad json"))
+
+    with pytest.raises(ValueError):
+        call_with_retry(fn, "gpt-4o")
+
+    assert fn.call_count == 1
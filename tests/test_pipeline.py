@@ -1,4 +1,5 @@
 import os
+import json
 import pytest
 from unittest.mock import patch, MagicMock
 from app.database import init_db
@@ -59,6 +60,23 @@ def test_pipeline_handles_download_failure(mock_cleanup, mock_download):
     assert job["status"] == "failed"
     assert "Download failed" in job["error_message"]
 
+
+@patch("app.workers.pipeline.download_video")
+@patch("app.workers.pipeline._cleanup_temp")
+def test_pipeline_rerun_drops_previous_embeddings_and_search_entries(mock_cleanup, mock_download):
+    from app.services.embeddings import store_job_embeddings, rank_job_passages
+    from app.services.search import add_job_to_search, search_jobs
+    mock_download.side_effect = Exception("Download failed")
+    job_id = create_job(TEST_DB, url="https://invalid.com", options={})
+    add_job_to_search(TEST_DB, job_id, "user_a", [{"start": 0.0, "end": 5.0, "text": "old passage"}], [])
+    with patch("app.services.embeddings.EMBEDDING_BACKEND", "local"):
+        store_job_embeddings(TEST_DB, job_id, ["old passage", "another old passage"])
+
+        process_video(job_id, TEST_DB)
+
+        assert rank_job_passages(TEST_DB, job_id, "old passage") == []
+    assert search_jobs(TEST_DB, "user_a", "passage") == []
+
 def test_generate_srt():
     segments = [
         {"start": 0.0, "end": 5.2, "text": "Hello world"},
@@ -94,15 +112,164 @@ def test_pipeline_with_visual_analysis(
         "short": "A greeting.", "detailed": "The video contains a greeting.",
         "chapters": [{"start": "0:00", "end": "0:05", "title": "Greeting"}]
     }
-    mock_extract_frames.return_value = ["/tmp/frames/frame_0001.jpg", "/tmp/frames/frame_0002.jpg"]
-    mock_dedup.return_value = ["/tmp/frames/frame_0001.jpg"]
+    mock_extract_frames.return_value = [
+        {"path": "/tmp/frames/frame_0001.jpg", "timestamp": 0.0},
+        {"path": "/tmp/frames/frame_0002.jpg", "timestamp": 5.005},
+    ]
+    mock_dedup.return_value = ["/tmp/frames/frame_0002.jpg"]
     mock_analyze_frames.return_value = [
         {"timestamp": 5.0, "frame_path": "/tmp/frames/frame_0001.jpg", "description": "A terminal window"}
     ]
 
-    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={"visual_analysis": True})
+    job_id = create_job(
+        TEST_DB, url="https://youtube.com/watch?v=test", options={"visual_analysis": True}, user_id="user_1"
+    )
     process_video(job_id, TEST_DB)
 
     job = get_job(TEST_DB, job_id)
     assert job["status"] == "completed"
     assert "terminal window" in job["visual_analysis"]
+    from app.services.retrieval import search_passages
+    assert search_passages(TEST_DB, job_id, "terminal")[0]["kind"] == "visual"
+    from app.services.search import search_jobs
+    assert [r["timestamp"] for r in search_jobs(TEST_DB, "user_1", "hello")] == [0.0]
+    metrics = json.loads(job["stage_metrics"])
+    assert "vision" in metrics["stage_seconds"]
+    assert "vision" in metrics
+    assert metrics["frames"] == {
+        "keyframes_only": False, "extracted": 2, "unique": 1, "skipped_blank": 0, "skipped_low_detail": 0
+    }
+    assert metrics["storage"]["format"] == "webp"
+    assert metrics["frame_budget"] == {
+        "plan": "free", "max_frames": 60, "interval": 5, "extract_limit": 120, "used": 1
+    }
+    assert mock_extract_frames.call_args.kwargs["max_frames"] == 120
+    assert mock_extract_frames.call_args.kwargs["duration"] == 120
+    frame_list = mock_analyze_frames.call_args[0][0]
+    assert frame_list == [{"path": "/tmp/frames/frame_0002.jpg", "timestamp": 5.005}]
+
+@patch("app.workers.pipeline.analyze_frames")
+@patch("app.workers.pipeline.deduplicate_frames")
+@patch("app.workers.pipeline.extract_unique_frames")
+@patch("app.workers.pipeline.summarize_transcript")
+@patch("app.workers.pipeline.transcribe_audio")
+@patch("app.workers.pipeline.extract_audio")
+@patch("app.workers.pipeline.download_video")
+def test_pipeline_pipe_frame_extraction(
+    mock_download, mock_audio, mock_transcribe, mock_summarize,
+    mock_extract_unique, mock_dedup, mock_analyze_frames
+):
+    mock_download.return_value = {
+        "title": "Test Video", "duration": 120,
+        "source": "youtube", "file_path": "/tmp/test.mp4"
+    }
+    mock_audio.return_value = "/tmp/test.wav"
+    mock_transcribe.return_value = {"full_text": "Hello", "segments": []}
+    mock_summarize.return_value = {"short": "Hi.", "detailed": "Hi.", "chapters": []}
+
+    def fake_extract(video_path, frames_dir, threshold, metrics, **sampling):
+        metrics.update(extracted=4, unique=1)
+        return [{"path": "/tmp/frames/frame_0001.jpg", "timestamp": 12.5}]
+
+    mock_extract_unique.side_effect = fake_extract
+    mock_analyze_frames.return_value = []
+
+    job_id = create_job(
+        TEST_DB, url="https://youtube.com/watch?v=test",
+        options={"visual_analysis": True, "frame_extraction": "pipe"}
+    )
+    process_video(job_id, TEST_DB)
+
+    job = get_job(TEST_DB, job_id)
+    assert job["status"] == "completed"
+    mock_dedup.assert_not_called()
+    assert mock_analyze_frames.call_args[0][0] == [{"path": "/tmp/frames/frame_0001.jpg", "timestamp": 12.5}]
+    assert json.loads(job["stage_metrics"])["frames"] == {
+        "keyframes_only": False, "extracted": 4, "unique": 1, "skipped_blank": 0, "skipped_low_detail": 0
+    }
+
+
+@patch("app.workers.pipeline.analyze_frames")
+@patch("app.workers.pipeline.deduplicate_frames")
+@patch("app.workers.pipeline.extract_frames")
+@patch("app.workers.pipeline.summarize_transcript")
+@patch("app.workers.pipeline.transcribe_audio")
+@patch("app.workers.pipeline.extract_audio")
+@patch("app.workers.pipeline.download_video")
+def test_pipeline_long_video_uses_keyframes(
+    mock_download, mock_audio, mock_transcribe, mock_summarize,
+    mock_extract_frames, mock_dedup, mock_analyze_frames
+):
+    mock_download.return_value = {
+        "title": "Conference Day", "duration": 4 * 3600,
+        "source": "youtube", "file_path": "/tmp/test.mp4"
+    }
+    mock_audio.return_value = "/tmp/test.wav"
+    mock_transcribe.return_value = {"full_text": "Hello", "segments": []}
+    mock_summarize.return_value = {"short": "Hi.", "detailed": "Hi.", "chapters": []}
+    mock_extract_frames.return_value = []
+    mock_dedup.return_value = []
+    mock_analyze_frames.return_value = []
+
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=long", options={"visual_analysis": True})
+    process_video(job_id, TEST_DB)
+
+    job = get_job(TEST_DB, job_id)
+    assert mock_extract_frames.call_args.kwargs["keyframes_only"] is True
+    frame_metrics = json.loads(job["stage_metrics"])["frames"]
+    assert frame_metrics["keyframes_only"] is True
+    assert "keyframe" in frame_metrics["accuracy_note"]
+
+
+@patch("app.workers.pipeline.analyze_frames")
+@patch("app.workers.pipeline.extract_frames")
+@patch("app.workers.pipeline.summarize_transcript")
+@patch("app.workers.pipeline.transcribe_audio")
+@patch("app.workers.pipeline.extract_audio")
+@patch("app.workers.pipeline.download_video")
+def test_pipeline_analyzes_full_resolution_frames_before_compaction(
+    mock_download, mock_audio, mock_transcribe, mock_summarize, mock_extract_frames, mock_analyze_frames
+):
+    from PIL import Image, ImageDraw
+    import app.workers.pipeline as pipeline
+
+    mock_download.return_value = {
+        "title": "Slides", "duration": 120, "source": "youtube", "file_path": "/tmp/test.mp4"
+    }
+    mock_audio.return_value = "/tmp/test.wav"
+    mock_transcribe.return_value = {"full_text": "Hello", "segments": []}
+    mock_summarize.return_value = {"short": "Hi.", "detailed": "Hi.", "chapters": []}
+
+    def fake_extract(video_path, frames_dir, **sampling):
+        os.makedirs(frames_dir, exist_ok=True)
+        frames = []
+        for i, color in enumerate(["white", "black"], 1):
+            path = os.path.join(frames_dir, f"frame_{i:04d}.jpg")
+            img = Image.new("RGB", (1280, 720), color)
+            ImageDraw.Draw(img).rectangle([100 * i, 100, 600, 500], fill="red")
+            img.save(path)
+            frames.append({"path": path, "timestamp": 5.0 * i})
+        return frames
+
+    seen_sizes = []
+
+    def fake_analyze(frames, **kwargs):
+        for frame in frames:
+            with Image.open(frame["path"]) as img:
+                seen_sizes.append(img.size)
+        return [
+            {"timestamp": f["timestamp"], "frame_path": f["path"], "description": "A slide"} for f in frames
+        ]
+
+    mock_extract_frames.side_effect = fake_extract
+    mock_analyze_frames.side_effect = fake_analyze
+
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=slides", options={"visual_analysis": True})
+    process_video(job_id, TEST_DB)
+
+    job = get_job(TEST_DB, job_id)
+    assert job["status"] == "completed"
+    assert seen_sizes and all(size == (1280, 720) for size in seen_sizes)
+    for item in json.loads(job["visual_analysis"]):
+        assert item["frame_path"].endswith(".webp") and os.path.exists(item["frame_path"])
+        assert item["thumbnail_path"].startswith(os.path.join(pipeline.FRAMES_DIR, job_id))
@@ -1,13 +1,14 @@
 # tests/test_qa.py
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
-from app.services.qa import answer_question
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.services.qa import answer_question, answer_question_async
 
 
-@patch("app.services.qa.openai.OpenAI")
-def test_answer_question_returns_answer(mock_openai_class):
+@patch("app.services.qa.get_openai_client")
+def test_answer_question_returns_answer(mock_get_client):
     mock_client = MagicMock()
-    mock_openai_class.return_value = mock_client
+    mock_get_client.return_value = mock_client
 
     mock_message = MagicMock()
     mock_message.content = '{"answer": "He ran docker pull nginx at 5:02.", "relevant_timestamps": ["5:02"], "relevant_frames": []}'
@@ -31,10 +32,10 @@ def test_answer_question_returns_answer(mock_openai_class):
     assert "5:02" in result["relevant_timestamps"]
 
 
-@patch("app.services.qa.openai.OpenAI")
-def test_answer_question_includes_visual_context(mock_openai_class):
+@patch("app.services.qa.get_openai_client")
+def test_answer_question_includes_visual_context(mock_get_client):
     mock_client = MagicMock()
-    mock_openai_class.return_value = mock_client
+    mock_get_client.return_value = mock_client
 
     mock_message = MagicMock()
     mock_message.content = '{"answer": "A Docker architecture diagram is shown.", "relevant_timestamps": ["1:15"], "relevant_frames": ["/frames/frame_015.jpg"]}'
@@ -55,3 +56,144 @@ def test_answer_question_includes_visual_context(mock_openai_class):
     )
 
     assert "diagram" in result["answer"]
+
+
+@patch("app.services.qa.get_async_openai_client")
+def test_answer_question_async_returns_answer(mock_get_client):
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+
+    mock_message = MagicMock()
+    mock_message.content = '{"answer": "Nginx was pulled.", "relevant_timestamps": ["5:02"], "relevant_frames": []}'
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock(message=mock_message)]
+
+    mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+    result = asyncio.run(answer_question_async(
+        question="What was pulled?",
+        transcript="At 5:02 he ran docker pull nginx",
+        visual_analysis=[],
+        chapters=[]
+    ))
+
+    assert result["answer"] == "Nginx was pulled."
+    mock_client.chat.completions.create.assert_awaited_once()
+
+
+@patch("app.services.qa.get_openai_client")
+def test_answer_question_uses_retrieved_passages(mock_get_client):
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+    mock_client.chat.completions.create.return_value = MagicMock(choices=[MagicMock(message=MagicMock(
+        content='{"answer": "Pods are scheduled by Kubernetes.", "relevant_timestamps": ["10:20"], "relevant_frames": []}'
+    ))])
+    passages = [
+        {"kind": "transcript", "start": 620.0, "end": 645.0, "text": "Kubernetes schedules pods.", "frame_path": ""},
+        {"kind": "visual", "start": 630.0, "end": 630.0, "text": "kubectl output", "frame_path": "/f/1.webp"},
+    ]
+
+    answer_question(
+        question="How are pods scheduled?",
+        transcript="Welcome. " * 2000,
+        visual_analysis=[{"timestamp": 5.0, "description": "Title slide"}],
+        chapters=[],
+        passages=passages
+    )
+
+    prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "[10:20-10:45] Kubernetes schedules pods." in prompt
+    assert "[10:30] On screen (frame: /f/1.webp): kubectl output" in prompt
+    assert "Welcome" not in prompt
+    assert "Title slide" not in prompt
+
+
+def _stream_chunks(texts):
+    async def stream():
+        for text in texts:
+            yield MagicMock(choices=[MagicMock(delta=MagicMock(content=text))], usage=None)
+    return stream()
+
+
+@patch("app.services.qa.get_async_openai_client")
+def test_stream_answer_yields_text_then_structured_fields(mock_get_client):
+    from app.services.qa import stream_answer
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+    mock_client.chat.completions.create = AsyncMock(return_value=_stream_chunks([
+        "He ran ", "docker pull nginx.", "\n@@METADATA@@\n", '{"relevant_timestamps": ["5:02"], "relevant_frames": []}'
+    ]))
+
+    async def collect():
+        return [event async for event in stream_answer(
+            question="What was run?", transcript="docker pull nginx", visual_analysis=[], chapters=[]
+        )]
+
+    events = asyncio.run(collect())
+
+    assert "".join(text for kind, text in events if kind == "delta") == "He ran docker pull nginx.\n"
+    assert events[-1] == ("done", {
+        "answer": "He ran docker pull nginx.", "relevant_timestamps": ["5:02"], "relevant_frames": []
+    })
+    kwargs = mock_client.chat.completions.create.call_args.kwargs
+    assert kwargs["stream"] is True
+    assert "@@METADATA@@" in kwargs["messages"][0]["content"]
+
+
+def test_plan_batches_groups_questions_while_passages_fit():
+    from app.services.qa import plan_batches, merge_passages
+    p = lambda start: {"kind": "transcript", "start": start, "end": start + 10, "text": f"t{start}", "frame_path": ""}
+    passage_lists = [[p(0), p(10)], [p(10), p(20)], [p(100), p(110)], [p(0)]]
+
+    assert plan_batches(passage_lists, max_passages=3, max_questions=10) == [[0, 1], [2, 3]]
+    assert plan_batches(passage_lists, max_passages=10, max_questions=2) == [[0, 1], [2, 3]]
+    assert [x["start"] for x in merge_passages(passage_lists[:2])] == [0, 10, 20]
+
+
+@patch("app.services.qa.get_async_openai_client")
+def test_answer_questions_async_answers_all_in_one_call(mock_get_client):
+    from app.services.qa import answer_questions_async
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+    mock_client.chat.completions.create = AsyncMock(return_value=MagicMock(choices=[MagicMock(message=MagicMock(
+        content='{"answers": [{"question": 2, "answer": "Port 80.", "relevant_timestamps": ["1:00"]},'
+                ' {"question": 1, "answer": "Nginx.", "relevant_timestamps": ["0:10"], "relevant_frames": []},'
+                ' {"question": 3, "answer": "Alice."}]}'
+    ))]))
+
+    results = asyncio.run(answer_questions_async(
+        ["What was pulled?", "Which port?", "Who presents?"],
+        transcript="docker pull nginx on port 80", visual_analysis=[], chapters=[]
+    ))
+
+    assert [r["answer"] for r in results] == ["Nginx.", "Port 80.", "Alice."]
+    assert results[1] == {"answer": "Port 80.", "relevant_timestamps": ["1:00"], "relevant_frames": []}
+    mock_client.chat.completions.create.assert_awaited_once()
+    content = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "1. What was pulled?\n2. Which port?\n3. Who presents?" in content
+
+
+@patch("app.services.qa.get_async_openai_client")
+def test_answer_questions_async_reasks_skipped_questions(mock_get_client):
+    from app.services.qa import answer_questions_async
+    replies = [
+        # A bare list instead of {"answers": ...}, with junk and a skipped question
+        '[{"question": 1, "answer": "Nginx."}, "oops", {"question": 2, "answer": ""}]',
+        '{"answer": "Port 80.", "relevant_timestamps": [], "relevant_frames": []}',
+    ]
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+    mock_client.chat.completions.create = AsyncMock(side_effect=[
+        MagicMock(choices=[MagicMock(message=MagicMock(content=reply))]) for reply in replies
+    ])
+    metrics = {"upstream_calls": 0}
+
+    results = asyncio.run(answer_questions_async(
+        ["What was pulled?", "Which port?"], transcript="t", visual_analysis=[], chapters=[], metrics=metrics
+    ))
+
+    assert [r["answer"] for r in results] == ["Nginx.", "Port 80."]
+    assert metrics["upstream_calls"] == 2
+    second_prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "Which port?" in second_prompt and "What was pulled?" not in second_prompt
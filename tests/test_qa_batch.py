@@ -0,0 +1,114 @@
+# tests/test_qa_batch.py
+import os
+import json
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.database import init_db
+from app.models import create_job, update_job_status, get_job
+from app.services.answer_cache import store_answer, get_cached_answer
+from app.services.qa_batch import answer_batch
+
+TEST_DB = "./data/test_qa_batch.db"
+
+SEGMENTS = [
+    {"start": 0.0, "end": 20.0, "text": "We install Docker on Ubuntu."},
+    {"start": 300.0, "end": 320.0, "text": "Kubernetes schedules pods on nodes."},
+]
+
+
+@pytest.fixture(autouse=True)
+def setup_teardown():
+    os.makedirs("./data", exist_ok=True)
+    init_db(TEST_DB)
+    yield
+    if os.path.exists(TEST_DB):
+        os.remove(TEST_DB)
+
+
+def _job(segments=SEGMENTS):
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=test", options={})
+    update_job_status(
+        TEST_DB, job_id, status="completed", transcript_text="Docker and Kubernetes",
+        transcript_segments=json.dumps(segments)
+    )
+    return get_job(TEST_DB, job_id)
+
+
+def _fake_answers(calls):
+    async def fake(questions, **kwargs):
+        calls.append((questions, kwargs["passages"]))
+        kwargs["metrics"]["upstream_calls"] += 1
+        return [{"answer": f"A: {q}", "relevant_timestamps": [], "relevant_frames": []} for q in questions]
+    return fake
+
+
+def test_batch_answers_in_request_order_with_shared_call():
+    job = _job()
+    calls = []
+    with patch("app.services.qa_batch.answer_questions_async", side_effect=_fake_answers(calls)):
+        result = asyncio.run(answer_batch(TEST_DB, job, ["How to install Docker?", "What schedules pods?"]))
+
+    assert [a["question"] for a in result["answers"]] == ["How to install Docker?", "What schedules pods?"]
+    assert result["answers"][1]["answer"] == "A: What schedules pods?"
+    assert result["model_calls"] == 1
+    assert len(calls[0][1]) == 2
+
+
+def test_batch_splits_groups_when_passages_do_not_fit():
+    job = _job()
+    calls = []
+    with patch("app.services.qa_batch.answer_questions_async", side_effect=_fake_answers(calls)), \
+         patch("app.services.qa_batch.QA_BATCH_MAX_PASSAGES", 1):
+        result = asyncio.run(answer_batch(TEST_DB, job, ["install docker", "schedules pods"]))
+
+    assert result["model_calls"] == 2
+    assert [len(passages) for _, passages in calls] == [1, 1]
+
+
+def test_batch_reuses_cache_and_deduplicates_questions():
+    job = _job()
+    store_answer(TEST_DB, job["id"], "How to install Docker?", {
+        "answer": "cached", "relevant_timestamps": [], "relevant_frames": []
+    })
+    calls = []
+    with patch("app.services.qa_batch.answer_questions_async", side_effect=_fake_answers(calls)):
+        result = asyncio.run(answer_batch(
+            TEST_DB, job, ["how to install docker", "What schedules pods?", "what schedules pods"]
+        ))
+
+    assert [a["answer"] for a in result["answers"]] == ["cached", "A: What schedules pods?", "A: What schedules pods?"]
+    assert calls[0][0] == ["What schedules pods?"]
+    assert get_cached_answer(TEST_DB, job["id"], "What schedules pods")["answer"] == "A: What schedules pods?"
+
+
+def test_batch_without_segments_shares_transcript_context():
+    job = _job(segments=[])
+    calls = []
+    with patch("app.services.qa_batch.answer_questions_async", side_effect=_fake_answers(calls)), \
+         patch("app.services.qa_batch.QA_BATCH_MAX_QUESTIONS", 2):
+        result = asyncio.run(answer_batch(TEST_DB, job, ["Q1", "Q2", "Q3"], use_cache=False))
+
+    assert result["model_calls"] == 2
+    assert [q for q, _ in calls] == [["Q1", "Q2"], ["Q3"]]
+    assert all(passages is None for _, passages in calls)
+
+
+def test_batch_counts_only_upstream_calls():
+    from unittest.mock import MagicMock, AsyncMock
+    job = _job()
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=MagicMock(choices=[MagicMock(message=MagicMock(
+        content='{"answers": [{"question": 1, "answer": "With apt."}, {"question": 2, "answer": "The scheduler."}]}'
+    ))]))
+    questions = ["How to install Docker?", "What schedules pods?"]
+
+    with patch("app.services.qa.get_async_openai_client", return_value=client), \
+         patch("app.services.qa_batch.QA_CACHE_ENABLED", False):
+        first = asyncio.run(answer_batch(TEST_DB, job, questions))
+        second = asyncio.run(answer_batch(TEST_DB, job, questions))
+
+    assert first["model_calls"] == 1
+    # The same prompt is served from the LLM response cache
+    assert second["model_calls"] == 0
+    assert [a["answer"] for a in second["answers"]] == ["With apt.", "The scheduler."]
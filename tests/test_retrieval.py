@@ -0,0 +1,118 @@
+# tests/test_retrieval.py
+import os
+import json
+import pytest
+import numpy as np
+from unittest.mock import patch
+from app.database import init_db
+from app.models import create_job, update_job_status, get_job
+from app.services.retrieval import build_passages, index_job, search_passages, retrieve_for_job
+
+TEST_DB = "./data/test_retrieval.db"
+
+SEGMENTS = [
+    {"start": 0.0, "end": 12.0, "text": "Welcome to this tutorial about containers."},
+    {"start": 12.0, "end": 30.0, "text": "First we install Docker on Ubuntu."},
+    {"start": 31.0, "end": 50.0, "text": "Images are templates for containers."},
+    {"start": 600.0, "end": 620.0, "text": "Now we deploy the cluster with Kubernetes."},
+    {"start": 620.0, "end": 630.0, "text": "Kubernetes schedules pods across nodes."},
+]
+VISUALS = [
+    {"timestamp": 615.0, "frame_path": "/frames/f1.webp", "description": "kubectl get pods output in a terminal"},
+    {"timestamp": 20.0, "frame_path": "/frames/f0.webp", "description": "Analysis failed"},
+]
+
+
+@pytest.fixture(autouse=True)
+def setup_teardown():
+    os.makedirs("./data", exist_ok=True)
+    init_db(TEST_DB)
+    yield
+    if os.path.exists(TEST_DB):
+        os.remove(TEST_DB)
+
+
+def test_build_passages_windows_segments_and_adds_visuals():
+    passages = build_passages(SEGMENTS, VISUALS)
+
+    transcript = [p for p in passages if p["kind"] == "transcript"]
+    assert [(p["start"], p["end"]) for p in transcript] == [(0.0, 30.0), (31.0, 50.0), (600.0, 630.0)]
+    visual = [p for p in passages if p["kind"] == "visual"]
+    assert visual == [{
+        "kind": "visual", "start": 615.0, "end": 615.0,
+        "text": "kubectl get pods output in a terminal", "frame_path": "/frames/f1.webp",
+    }]
+
+
+def test_search_passages_finds_later_part_of_video():
+    with patch("app.services.retrieval.RETRIEVAL_WINDOW_SECONDS", 20):
+        index_job(TEST_DB, "job_1", SEGMENTS, VISUALS)
+
+    results = search_passages(TEST_DB, "job_1", "How are pods scheduled in Kubernetes?", k=2)
+
+    assert len(results) == 2
+    assert all(r["start"] >= 600 for r in results)
+    assert [r["start"] for r in results] == sorted(r["start"] for r in results)
+
+
+def test_search_passages_falls_back_to_start_without_matches():
+    index_job(TEST_DB, "job_1", SEGMENTS, [])
+
+    results = search_passages(TEST_DB, "job_1", "zebra", k=1)
+
+    assert results[0]["start"] == 0.0
+
+
+def test_index_job_replaces_previous_index():
+    index_job(TEST_DB, "job_1", SEGMENTS, VISUALS)
+    index_job(TEST_DB, "job_1", SEGMENTS[:1], [])
+
+    results = search_passages(TEST_DB, "job_1", "Kubernetes")
+
+    assert [r["text"] for r in results] == [SEGMENTS[0]["text"]]
+
+
+def test_retrieve_for_job_indexes_lazily():
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=k8s", options={})
+    update_job_status(
+        TEST_DB, job_id, status="completed",
+        transcript_segments=json.dumps(SEGMENTS), visual_analysis=json.dumps(VISUALS)
+    )
+
+    results = retrieve_for_job(TEST_DB, get_job(TEST_DB, job_id), "kubectl pods", k=1)
+
+    assert results[0]["kind"] == "visual"
+    assert results[0]["frame_path"] == "/frames/f1.webp"
+
+
+def test_retrieve_for_job_without_segments_returns_none():
+    job_id = create_job(TEST_DB, url="https://youtube.com/watch?v=x", options={})
+    update_job_status(TEST_DB, job_id, status="completed", transcript_text="Plain text only")
+
+    assert retrieve_for_job(TEST_DB, get_job(TEST_DB, job_id), "anything") is None
+
+
+def test_search_passages_fuses_embedding_ranking():
+    def fake_embed(texts):
+        # The question and the install passage point the same way; everything else is orthogonal
+        return np.array([[1.0, 0.0] if "install" in t.lower() or "setup" in t.lower() else [0.0, 1.0]
+                         for t in texts], dtype=np.float32)
+
+    with patch("app.services.retrieval.RETRIEVAL_EMBEDDINGS", True), \
+         patch("app.services.embeddings.embed_texts", side_effect=fake_embed):
+        index_job(TEST_DB, "job_1", SEGMENTS, [])
+        results = search_passages(TEST_DB, "job_1", "setup steps", k=1)
+
+    assert "install Docker" in results[0]["text"]
+
+
+def test_search_passages_skips_embeddings_for_other_passages():
+    with patch("app.services.retrieval.RETRIEVAL_EMBEDDINGS", True), \
+         patch("app.services.embeddings.EMBEDDING_BACKEND", "local"):
+        index_job(TEST_DB, "job_1", SEGMENTS, [])
+        # A later index without embeddings leaves a matrix with the old row count
+        with patch("app.services.retrieval.RETRIEVAL_EMBEDDINGS", False):
+            index_job(TEST_DB, "job_1", SEGMENTS[:1], [])
+        results = search_passages(TEST_DB, "job_1", "install Docker", k=3)
+
+    assert len(results) == 1
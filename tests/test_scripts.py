@@ -51,3 +51,98 @@ def test_daily_report_script_runs(mock_send, mock_disk, mock_mem, mock_cpu):
     result = run_daily_report(TEST_DB)
     assert "stats" in result
     assert "report" in result
+
+
+@patch("scripts.benchmark_vision.get_cache_stats")
+@patch("scripts.benchmark_vision.analyze_frames")
+def test_benchmark_vision_compares_per_frame_and_batched(mock_analyze, mock_stats, tmp_path):
+    for i in range(4):
+        (tmp_path / f"frame_{i:04d}.jpg").write_bytes(b"jpeg")
+    mock_stats.side_effect = [
+        {"upstream_calls": 0, "upstream_tokens": 0}, {"upstream_calls": 4, "upstream_tokens": 800},
+        {"upstream_calls": 4, "upstream_tokens": 800}, {"upstream_calls": 5, "upstream_tokens": 1000},
+    ]
+
+    from scripts.benchmark_vision import run_benchmark
+    per_frame, batched = run_benchmark(str(tmp_path), batch_size=4)
+
+    assert per_frame["calls"] == 4 and per_frame["tokens"] == 800
+    assert batched["batch_size"] == 4 and batched["calls"] == 1
+    assert mock_analyze.call_args.kwargs["use_cache"] is False
+
+
+@patch("scripts.benchmark_frames._child_cpu_seconds")
+@patch("scripts.benchmark_frames.extract_frames")
+def test_benchmark_frames_reports_cpu_saved(mock_extract, mock_cpu):
+    mock_extract.side_effect = [
+        [{"path": "a", "timestamp": t} for t in (0.0, 5.0, 3595.0)],
+        [{"path": "a", "timestamp": t} for t in (0.0, 3590.0)],
+    ]
+    mock_cpu.side_effect = [0.0, 40.0, 40.0, 45.0]
+
+    from scripts.benchmark_frames import run_benchmark
+    result = run_benchmark("/tmp/video.mp4")
+
+    assert result["full"]["cpu_seconds"] == 40.0
+    assert result["keyframes_only"]["cpu_seconds"] == 5.0
+    assert result["cpu_seconds_saved"] == 35.0
+    assert [c.kwargs["keyframes_only"] for c in mock_extract.call_args_list] == [False, True]
+    assert all(c.kwargs["max_frames"] >= 10 ** 9 for c in mock_extract.call_args_list)
+    assert (result["full"]["first_timestamp"], result["full"]["last_timestamp"]) == (0.0, 3595.0)
+    assert result["keyframes_only"]["last_timestamp"] == 3590.0
+
+
+@patch("scripts.benchmark_frames._total_cpu_seconds")
+@patch("scripts.benchmark_frames.extract_unique_frames")
+@patch("scripts.benchmark_frames.deduplicate_frames")
+@patch("scripts.benchmark_frames.extract_frames")
+def test_benchmark_frames_compares_files_and_pipe_modes(mock_extract, mock_dedup, mock_unique, mock_cpu):
+    mock_extract.return_value = [{"path": p, "timestamp": 0.0} for p in ("a", "b", "c")]
+    mock_dedup.return_value = ["a", "c"]
+    mock_unique.return_value = [{"path": "a", "timestamp": 0.0}, {"path": "c", "timestamp": 10.0}]
+    mock_cpu.side_effect = [0.0, 12.0, 12.0, 16.0]
+
+    from scripts.benchmark_frames import run_extraction_benchmark
+    result = run_extraction_benchmark("/tmp/video.mp4", keyframes_only=True)
+
+    assert result["files"]["unique_frames"] == result["pipe"]["unique_frames"] == 2
+    assert (result["files"]["cpu_seconds"], result["pipe"]["cpu_seconds"]) == (12.0, 4.0)
+    assert result["cpu_seconds_saved"] == 8.0
+    assert mock_unique.call_args.kwargs["keyframes_only"] is True
+    assert mock_unique.call_args.kwargs["max_frames"] >= 10 ** 9
+
+
+def test_build_embeddings_script_backfills_completed_jobs():
+    import json
+    from app.models import create_job, update_job_status
+    job_id = create_job(TEST_DB, "https://youtube.com/watch?v=emb", {})
+    update_job_status(
+        TEST_DB, job_id, status="completed",
+        transcript_segments=json.dumps([{"start": 0.0, "end": 5.0, "text": "Install the package first."}]),
+        visual_analysis=json.dumps([])
+    )
+    create_job(TEST_DB, "https://youtube.com/watch?v=pending", {})
+
+    from scripts.build_embeddings import run_build_embeddings
+    with patch("app.services.embeddings.EMBEDDING_BACKEND", "local"):
+        first = run_build_embeddings(TEST_DB)
+        second = run_build_embeddings(TEST_DB)
+
+    assert first == {"jobs": 1, "passages": 1, "failed": 0}
+    assert second["jobs"] == 0
+
+
+def test_build_search_index_script_backfills_completed_jobs():
+    import json
+    from app.models import create_job, update_job_status
+    from app.services.search import search_jobs
+    job_id = create_job(TEST_DB, "https://youtube.com/watch?v=fts", {}, user_id="user_1")
+    update_job_status(
+        TEST_DB, job_id, status="completed",
+        transcript_segments=json.dumps([{"start": 3.0, "end": 5.0, "text": "Install the package first."}])
+    )
+
+    from scripts.build_search_index import run_build_search_index
+    assert run_build_search_index(TEST_DB) == {"jobs": 1, "rows": 1}
+    assert run_build_search_index(TEST_DB)["jobs"] == 0
+    assert search_jobs(TEST_DB, "user_1", "install")[0]["timestamp"] == 3.0
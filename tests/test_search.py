@@ -0,0 +1,106 @@
+# tests/test_search.py
+import os
+import json
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.database import init_db
+from app.models import create_job, update_job_status
+from app.services.search import build_match_query, add_job_to_search, remove_job_from_search, search_jobs
+
+TEST_DB = "./data/test_search.db"
+AUTH = {"Authorization": "Bearer test-key-123"}
+
+SEGMENTS = [
+    {"start": 0.0, "end": 8.0, "text": "Welcome back to the channel."},
+    {"start": 8.0, "end": 20.0, "text": "Today we deploy a Kubernetes cluster on bare metal."},
+    {"start": 95.5, "end": 110.0, "text": "Kubernetes schedules pods onto nodes."},
+]
+VISUALS = [
+    {"timestamp": 42.0, "frame_path": "/frames/f1.webp", "description": "Terminal running kubectl get pods"},
+    {"timestamp": 50.0, "frame_path": "/frames/f2.webp", "description": "Analysis failed"},
+]
+
+
+@pytest.fixture(autouse=True)
+def setup_teardown():
+    os.makedirs("./data", exist_ok=True)
+    init_db(TEST_DB)
+    yield
+    if os.path.exists(TEST_DB):
+        os.remove(TEST_DB)
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+    return TestClient(app)
+
+
+def test_build_match_query_treats_operators_as_words():
+    assert build_match_query('deploy OR "pods" -x*') == (
+        'text : "deploy" AND text : "OR" AND text : "pods" AND text : "x"'
+    )
+    assert build_match_query("  ?! ") is None
+
+
+def test_search_returns_timestamps_and_snippets_by_rank():
+    add_job_to_search(TEST_DB, "job_1", "user_a", SEGMENTS, VISUALS)
+
+    results = search_jobs(TEST_DB, "user_a", "kubernetes")
+
+    assert [r["timestamp"] for r in results] == [95.5, 8.0]
+    assert "[Kubernetes]" in results[0]["snippet"]
+    assert results[0]["job_id"] == "job_1"
+
+
+def test_search_covers_visual_descriptions_and_stems():
+    add_job_to_search(TEST_DB, "job_1", "user_a", SEGMENTS, VISUALS)
+
+    results = search_jobs(TEST_DB, "user_a", "running pod")
+
+    assert results == [{
+        "job_id": "job_1", "video_title": "", "kind": "visual", "timestamp": 42.0,
+        "frame_path": "/frames/f1.webp", "snippet": "Terminal [running] kubectl get [pods]",
+    }]
+    assert search_jobs(TEST_DB, "user_a", "analysis failed") == []
+
+
+def test_search_is_scoped_to_user():
+    add_job_to_search(TEST_DB, "job_1", "user_a", SEGMENTS, [])
+    add_job_to_search(TEST_DB, "job_2", "user_b", SEGMENTS, [])
+
+    assert {r["job_id"] for r in search_jobs(TEST_DB, "user_b", "kubernetes")} == {"job_2"}
+    assert search_jobs(TEST_DB, "user_c", "kubernetes") == []
+
+
+def test_reindex_and_remove_replace_job_rows():
+    add_job_to_search(TEST_DB, "job_1", "user_a", SEGMENTS, VISUALS)
+    add_job_to_search(TEST_DB, "job_1", "user_a", SEGMENTS[:1], [])
+
+    assert search_jobs(TEST_DB, "user_a", "kubernetes") == []
+    assert len(search_jobs(TEST_DB, "user_a", "welcome")) == 1
+
+    remove_job_from_search(TEST_DB, "job_1")
+    assert search_jobs(TEST_DB, "user_a", "welcome") == []
+
+
+@patch("app.routers.search.DATABASE_URL", TEST_DB)
+def test_search_endpoint(client):
+    job_id = create_job(TEST_DB, "https://youtube.com/watch?v=k8s", {}, user_id="legacy")
+    update_job_status(TEST_DB, job_id, status="completed", video_title="K8s from scratch")
+    add_job_to_search(TEST_DB, job_id, "legacy", SEGMENTS, VISUALS)
+
+    response = client.get("/api/v1/search", params={"q": "kubernetes cluster"}, headers=AUTH)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 1
+    assert data["results"][0]["job_id"] == job_id
+    assert data["results"][0]["video_title"] == "K8s from scratch"
+    assert data["results"][0]["timestamp"] == 8.0
+
+
+def test_search_endpoint_rejects_empty_query(client):
+    assert client.get("/api/v1/search", params={"q": "***"}, headers=AUTH).status_code == 400
+    assert client.get("/api/v1/search", params={"q": "x"}).status_code == 401
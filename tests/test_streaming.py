@@ -0,0 +1,71 @@
+# tests/test_streaming.py
+import json
+import asyncio
+from app.services.streaming import split_metadata, parse_metadata, sse_stream, sse_event, METADATA_MARKER
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+def _parse_sse(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_split_metadata_handles_marker_split_across_chunks():
+    chunks = ["The answer ", "is nginx.\n@@META", "DATA@@\n{\"relevant", "_timestamps\": [\"5:02\"]}"]
+
+    events = asyncio.run(_collect(split_metadata(_aiter(chunks))))
+
+    text = "".join(t for kind, t in events if kind == "text")
+    assert text == "The answer is nginx.\n"
+    assert events[-1][0] == "metadata"
+    assert parse_metadata(events[-1][1]) == {"relevant_timestamps": ["5:02"]}
+    assert all(METADATA_MARKER not in t for _, t in events)
+
+
+def test_split_metadata_streams_before_marker_arrives():
+    async def first_text():
+        async for kind, text in split_metadata(_aiter(["x" * 50, "never"])):
+            return kind, text
+
+    kind, text = asyncio.run(first_text())
+    assert kind == "text" and text.startswith("x")
+
+
+def test_split_metadata_without_marker_keeps_all_text():
+    events = asyncio.run(_collect(split_metadata(_aiter(["short", " answer"]))))
+    assert "".join(t for kind, t in events if kind == "text") == "short answer"
+    assert events[-1] == ("metadata", "")
+
+
+def test_parse_metadata_tolerates_fences_and_garbage():
+    assert parse_metadata('```json\n{"title": "T"}\n```') == {"title": "T"}
+    assert parse_metadata("not json") == {}
+    assert parse_metadata("[1, 2]") == {}
+
+
+def test_sse_stream_renders_events_and_errors():
+    async def events():
+        yield "delta", "Hello"
+        yield "done", {"answer": "Hello"}
+
+    async def failing():
+        yield "delta", "Hel"
+        raise RuntimeError("upstream closed")
+
+    ok = _parse_sse("".join(asyncio.run(_collect(sse_stream(events())))))
+    failed = _parse_sse("".join(asyncio.run(_collect(sse_stream(failing())))))
+
+    assert ok == [("delta", {"text": "Hello"}), ("done", {"answer": "Hello"})]
+    assert failed == [("delta", {"text": "Hel"}), ("error", {"detail": "upstream closed"})]
+    assert sse_event("done", {}) == "event: done\ndata: {}\n\n"
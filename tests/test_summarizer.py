@@ -2,10 +2,10 @@ import pytest
 from unittest.mock import patch, MagicMock
 from app.services.summarizer import summarize_transcript
 
-@patch("app.services.summarizer.openai.OpenAI")
-def test_summarize_returns_short_and_detailed(mock_openai_class):
+@patch("app.services.summarizer.get_openai_client")
+def test_summarize_returns_short_and_detailed(mock_get_client):
     mock_client = MagicMock()
-    mock_openai_class.return_value = mock_client
+    mock_get_client.return_value = mock_client
 
     mock_message = MagicMock()
     mock_message.content = '{"short": "A tutorial about Docker.", "detailed": "This video covers Docker installation, basic commands, and deployment.", "chapters": [{"start": "0:00", "end": "5:00", "title": "Introduction"}]}'
@@ -23,3 +23,23 @@ def test_summarize_returns_short_and_detailed(mock_openai_class):
     assert result["short"] == "A tutorial about Docker."
     assert "Docker" in result["detailed"]
     assert len(result["chapters"]) == 1
+
+
+@patch("app.services.summarizer.get_openai_client")
+def test_malformed_summary_is_not_cached_and_retry_succeeds(mock_get_client):
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+    truncated = MagicMock(choices=[MagicMock(message=MagicMock(content='{"short": "A tutorial'))])
+    valid = MagicMock(choices=[MagicMock(message=MagicMock(
+        content='{"short": "A tutorial.", "detailed": "More.", "chapters": []}'
+    ))])
+    mock_client.chat.completions.create.side_effect = [truncated, valid]
+
+    with pytest.raises(ValueError):
+        summarize_transcript("Same transcript")
+    result = summarize_transcript("Same transcript")
+
+    assert result["short"] == "A tutorial."
+    assert mock_client.chat.completions.create.call_count == 2
+    assert summarize_transcript("Same transcript") == result
+    assert mock_client.chat.completions.create.call_count == 2
@@ -3,10 +3,10 @@ from unittest.mock import patch, MagicMock, mock_open
 from app.services.transcriber import transcribe_audio
 
 @patch("builtins.open", mock_open(read_data=b"fake audio data"))
-@patch("app.services.transcriber.openai.OpenAI")
-def test_transcribe_returns_segments(mock_openai_class):
+@patch("app.services.transcriber.get_openai_client")
+def test_transcribe_returns_segments(mock_get_client):
     mock_client = MagicMock()
-    mock_openai_class.return_value = mock_client
+    mock_get_client.return_value = mock_client
 
     mock_segment_1 = MagicMock()
     mock_segment_1.start = 0.0
@@ -1,15 +1,40 @@
 # tests/test_vision.py
-import pytest
-from unittest.mock import patch, MagicMock, mock_open
-from app.services.vision import analyze_frame, analyze_frames
 import base64
+import io
+import pytest
+from unittest.mock import patch, MagicMock
+from PIL import Image, ImageDraw
+from app.services.vision import analyze_frame, analyze_frames, analyze_frame_batch, encode_frame, plan_detail
+
+
+@pytest.fixture
+def frame_files(tmp_path):
+    paths = []
+    for i, color in enumerate(["red", "blue"], 1):
+        path = tmp_path / f"frame_{i:04d}.jpg"
+        Image.new("RGB", (1920, 1080), color).save(path, quality=95)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def text_frames(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"slide_{i:04d}.jpg"
+        img = Image.new("RGB", (1280, 720), "white")
+        draw = ImageDraw.Draw(img)
+        for line in range(8 + i * 6):
+            draw.text((40, 20 + line * 30), "docker run -p 8080:80 nginx --name web " * 2, fill="black")
+        img.save(path, quality=90)
+        paths.append(str(path))
+    return paths
 
 
-@patch("builtins.open", mock_open(read_data=b"fake image data"))
-@patch("app.services.vision.openai.OpenAI")
-def test_analyze_frame_returns_description(mock_openai_class):
+@patch("app.services.vision.get_openai_client")
+def test_analyze_frame_returns_description(mock_get_client, frame_files):
     mock_client = MagicMock()
-    mock_openai_class.return_value = mock_client
+    mock_get_client.return_value = mock_client
 
     mock_message = MagicMock()
     mock_message.content = "A terminal window showing Docker commands"
@@ -22,7 +47,7 @@ def test_analyze_frame_returns_description(mock_openai_class):
 
     mock_client.chat.completions.create.return_value = mock_response
 
-    result = analyze_frame("/tmp/frame_0001.jpg")
+    result = analyze_frame(frame_files[0])
 
     assert result == "A terminal window showing Docker commands"
     mock_client.chat.completions.create.assert_called_once()
@@ -30,7 +55,8 @@ def test_analyze_frame_returns_description(mock_openai_class):
 
 @patch("app.services.vision.analyze_frame")
 def test_analyze_frames_processes_all(mock_analyze):
-    mock_analyze.side_effect = ["Description 1", "Description 2"]
+    descriptions = {"/tmp/frame_0001.jpg": "Description 1", "/tmp/frame_0002.jpg": "Description 2"}
+    mock_analyze.side_effect = lambda path, **kwargs: descriptions[path]
 
     frames = [
         {"path": "/tmp/frame_0001.jpg", "timestamp": 5.0},
@@ -48,7 +74,11 @@ def test_analyze_frames_processes_all(mock_analyze):
 
 @patch("app.services.vision.analyze_frame")
 def test_analyze_frames_handles_failure_gracefully(mock_analyze):
-    mock_analyze.side_effect = [Exception("API error"), "Description 2"]
+    def describe(path, **kwargs):
+        if path == "/tmp/frame_0001.jpg":
+            raise Exception("API error")
+        return "Description 2"
+    mock_analyze.side_effect = describe
 
     frames = [
         {"path": "/tmp/frame_0001.jpg", "timestamp": 5.0},
@@ -60,3 +90,207 @@ def test_analyze_frames_handles_failure_gracefully(mock_analyze):
     assert len(result) == 2
     assert result[0]["description"] == "Analysis failed"
     assert result[1]["description"] == "Description 2"
+
+
+@patch("app.services.vision.VISION_FRAME_RETRIES", 1)
+@patch("app.services.vision.analyze_frame")
+def test_analyze_frames_retries_failed_frame(mock_analyze):
+    mock_analyze.side_effect = [TimeoutError("timeout"), "Recovered"]
+
+    result = analyze_frames([{"path": "/tmp/frame_0001.jpg", "timestamp": 5.0}])
+
+    assert result[0]["description"] == "Recovered"
+    # Both attempts share one deadline
+    first, second = (c.kwargs["deadline"] for c in mock_analyze.call_args_list)
+    assert first == second
+
+
+@patch("app.services.vision.VISION_FRAME_RETRIES", 3)
+@patch("app.services.vision.analyze_frame")
+def test_analyze_frames_does_not_retry_permanent_errors(mock_analyze):
+    from app.services.openai_limiter import DeadlineExceeded
+    mock_analyze.side_effect = ValueError("bad request")
+
+    result = analyze_frames([{"path": "/tmp/frame_0001.jpg", "timestamp": 5.0}])
+
+    assert result[0]["description"] == "Analysis failed"
+    mock_analyze.assert_called_once()
+
+    mock_analyze.reset_mock()
+    mock_analyze.side_effect = DeadlineExceeded("rate limited past the deadline")
+    analyze_frames([{"path": "/tmp/frame_0002.jpg", "timestamp": 5.0}])
+    mock_analyze.assert_called_once()
+
+
+@patch("app.services.vision.analyze_frame")
+def test_analyze_frames_orders_by_timestamp_and_reports_progress(mock_analyze):
+    mock_analyze.side_effect = lambda path, **kwargs: f"Frame at {path}"
+    frames = [{"path": f"/tmp/frame_{i:04d}.jpg", "timestamp": float(t)} for i, t in enumerate([30, 10, 20])]
+    progress = []
+
+    result = analyze_frames(frames, on_progress=lambda done, total: progress.append((done, total)), concurrency=3)
+
+    assert [r["timestamp"] for r in result] == [10.0, 20.0, 30.0]
+    assert progress[-1] == (3, 3)
+    assert len(progress) == 3
+
+
+@patch("app.services.vision.get_openai_client")
+def test_analyze_frame_batch_packs_frames_into_one_request(mock_get_client, frame_files):
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+
+    mock_message = MagicMock()
+    mock_message.content = '{"frames": [{"index": 1, "description": "Title slide"}, {"index": 2, "description": "Code editor"}]}'
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock(message=mock_message)]
+    mock_client.chat.completions.create.return_value = mock_response
+
+    frames = [
+        {"path": frame_files[0], "timestamp": 0.0},
+        {"path": frame_files[1], "timestamp": 5.0},
+    ]
+    result = analyze_frame_batch(frames)
+
+    assert result == ["Title slide", "Code editor"]
+    mock_client.chat.completions.create.assert_called_once()
+    content = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert len([part for part in content if part["type"] == "image_url"]) == 2
+
+
+@patch("app.services.vision.analyze_frame")
+@patch("app.services.vision.analyze_frame_batch")
+def test_analyze_frames_batched_falls_back_for_missing_descriptions(mock_batch, mock_analyze, frame_files):
+    mock_batch.return_value = ["Batched description", None]
+    mock_analyze.return_value = "Single description"
+
+    frames = [
+        {"path": frame_files[0], "timestamp": 0.0},
+        {"path": frame_files[1], "timestamp": 5.0},
+    ]
+    result = analyze_frames(frames, batch_size=2)
+
+    assert [r["description"] for r in result] == ["Batched description", "Single description"]
+    mock_batch.assert_called_once()
+    mock_analyze.assert_called_once()
+
+
+def test_encode_frame_downscales_to_vision_size(frame_files):
+    encoded = encode_frame(frame_files[0], max_dimension=512)
+
+    with Image.open(io.BytesIO(base64.b64decode(encoded))) as img:
+        assert max(img.size) == 512
+        assert img.format == "JPEG"
+
+
+@patch("app.services.vision.analyze_frame")
+def test_analyze_frames_reports_payload_metrics(mock_analyze, frame_files):
+    mock_analyze.return_value = "A frame"
+    metrics = {}
+
+    analyze_frames([{"path": frame_files[0], "timestamp": 0.0}], metrics=metrics)
+
+    assert metrics["frames_analyzed"] == 1
+    assert 0 < metrics["payload_bytes"]
+    assert mock_analyze.call_args.kwargs["image_data"]
+
+
+@patch("app.services.vision.analyze_frame")
+def test_analyze_frames_reuses_descriptions_of_repeated_frames(mock_analyze, frame_files):
+    mock_analyze.return_value = "A red screen"
+    first_metrics, second_metrics = {}, {}
+
+    analyze_frames([{"path": frame_files[0], "timestamp": 0.0}], metrics=first_metrics)
+    result = analyze_frames([{"path": frame_files[0], "timestamp": 60.0}], metrics=second_metrics)
+
+    assert result[0]["description"] == "A red screen"
+    mock_analyze.assert_called_once()
+    assert second_metrics["cache_hits"] == 1
+
+
+def test_plan_detail_upgrades_text_heavy_frames(frame_files, text_frames):
+    frames = [{"path": p, "timestamp": 0.0} for p in frame_files + text_frames]
+
+    details = plan_detail(frames, token_budget=0)
+
+    assert details == ["low", "low", "high", "high", "high"]
+
+
+def test_plan_detail_respects_token_budget(frame_files, text_frames):
+    frames = [{"path": p, "timestamp": 0.0} for p in frame_files + text_frames]
+
+    # 5 frames at low detail (85) leave room for exactly one upgrade (+680)
+    details = plan_detail(frames, token_budget=5 * 85 + 700)
+
+    # The densest slide gets the upgrade
+    assert details == ["low", "low", "low", "low", "high"]
+
+
+@patch("app.services.vision.get_openai_client")
+def test_analyze_frame_high_detail_uses_larger_upload(mock_get_client, frame_files):
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content="A slide"))]
+    )
+
+    analyze_frame(frame_files[0], detail="high")
+
+    part = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"][0]
+    assert part["image_url"]["detail"] == "high"
+    encoded = part["image_url"]["url"].split(",", 1)[1]
+    with Image.open(io.BytesIO(base64.b64decode(encoded))) as img:
+        assert max(img.size) == 1024
+
+
+@patch("app.services.vision.analyze_frame")
+def test_analyze_frames_reports_detail_split(mock_analyze, frame_files, text_frames):
+    mock_analyze.return_value = "A frame"
+    metrics = {}
+
+    analyze_frames(
+        [{"path": frame_files[0], "timestamp": 0.0}, {"path": text_frames[0], "timestamp": 5.0}],
+        metrics=metrics, token_budget=0
+    )
+
+    assert metrics["high_detail_frames"] == 1
+    assert metrics["estimated_image_tokens"] == 85 + 765
+    details = {c.args[0]: c.kwargs["detail"] for c in mock_analyze.call_args_list}
+    assert details == {frame_files[0]: "low", text_frames[0]: "high"}
+
+
+@patch("app.services.vision.VISION_ADAPTIVE_DETAIL", False)
+@patch("app.services.vision.VISION_CACHE_MAX_DISTANCE", 3)
+@patch("app.services.vision.lookup_description")
+@patch("app.services.vision.analyze_frame")
+def test_text_frames_only_take_exact_cache_matches(mock_analyze, mock_lookup, frame_files, text_frames):
+    mock_analyze.return_value = "A frame"
+    mock_lookup.return_value = None
+
+    analyze_frames(
+        [{"path": frame_files[0], "timestamp": 0.0}, {"path": text_frames[2], "timestamp": 5.0}],
+        cache_scope="user:1"
+    )
+
+    scopes = sorted(str(c.kwargs["scope"]) for c in mock_lookup.call_args_list)
+    assert scopes == ["None", "user:1"]
+
+
+@patch("app.services.vision.VISION_ADAPTIVE_DETAIL", False)
+@patch("app.services.vision.analyze_frame")
+def test_same_layout_slides_are_described_per_user(mock_analyze, tmp_path):
+    paths = []
+    for name, figures in [("a.jpg", "Q3 revenue: 5M USD, margin 12%"), ("b.jpg", "Q3 revenue: 9M USD, margin 31%")]:
+        img = Image.new("RGB", (1280, 720), "white")
+        draw = ImageDraw.Draw(img)
+        draw.rectangle([0, 0, 1280, 140], fill=(20, 60, 140))
+        draw.text((160, 400), figures, fill="black")
+        img.save(tmp_path / name)
+        paths.append(str(tmp_path / name))
+    mock_analyze.side_effect = ["Revenue 5M, margin 12%", "Revenue 9M, margin 31%"]
+
+    first = analyze_frames([{"path": paths[0], "timestamp": 0.0}], cache_scope="user:1")
+    second = analyze_frames([{"path": paths[1], "timestamp": 0.0}], cache_scope="user:2")
+
+    assert first[0]["description"] == "Revenue 5M, margin 12%"
+    assert second[0]["description"] == "Revenue 9M, margin 31%"
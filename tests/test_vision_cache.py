@@ -0,0 +1,106 @@
+# tests/test_vision_cache.py
+import pytest
+from PIL import Image, ImageDraw
+from app.services.vision_cache import (
+    frame_hash, file_digest, lookup_description, store_description, get_vision_cache_stats
+)
+
+BASE_HASH = 0x0123456789ABCDEF
+
+
+def _flip_bits(value, *bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_lookup_finds_hash_within_tolerance():
+    store_description(BASE_HASH, "Title card", scope="user:1")
+
+    # Three flipped bits spread across different bands
+    near = _flip_bits(BASE_HASH, 1, 20, 40)
+    assert lookup_description(near, max_distance=3, scope="user:1") == "Title card"
+
+
+def test_lookup_misses_beyond_tolerance():
+    store_description(BASE_HASH, "Title card", scope="user:1")
+
+    far = _flip_bits(BASE_HASH, 1, 2, 3, 4)
+    assert lookup_description(far, max_distance=3, scope="user:1") is None
+
+
+def test_lookup_prefers_nearest_match():
+    store_description(BASE_HASH, "Exact", scope="user:1")
+    store_description(_flip_bits(BASE_HASH, 5, 6, 7), "Nearby", scope="user:1")
+
+    assert lookup_description(_flip_bits(BASE_HASH, 5, 6), max_distance=3, scope="user:1") == "Nearby"
+    assert lookup_description(BASE_HASH, max_distance=3, scope="user:1") == "Exact"
+
+
+def test_near_matches_stay_within_scope():
+    store_description(BASE_HASH, "Title card", scope="user:1")
+    near = _flip_bits(BASE_HASH, 1)
+
+    assert lookup_description(near, max_distance=3, scope="user:2") is None
+    assert lookup_description(near, max_distance=3) is None
+    assert lookup_description(BASE_HASH, scope="user:2") is None
+
+
+def test_other_scopes_only_share_identical_content():
+    store_description(BASE_HASH, "Title card", scope="user:1", digest="abc")
+
+    assert lookup_description(BASE_HASH, scope="user:2", digest="def") is None
+    assert lookup_description(BASE_HASH, scope="user:2", digest="abc") == "Title card"
+    assert lookup_description(_flip_bits(BASE_HASH, 1), digest="abc") == "Title card"
+
+
+def _slide(path, figures):
+    img = Image.new("RGB", (1280, 720), "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, 1280, 140], fill=(20, 60, 140))
+    draw.rectangle([120, 260, 1160, 560], outline="black", width=6)
+    draw.text((160, 400), figures, fill="black")
+    img.save(path)
+    return str(path)
+
+
+def test_same_layout_slides_of_different_users_are_not_shared(tmp_path):
+    first = _slide(tmp_path / "a.jpg", "Q3 revenue: 5M USD, margin 12%")
+    second = _slide(tmp_path / "b.jpg", "Q3 revenue: 9M USD, margin 31%")
+    assert frame_hash(first) == frame_hash(second)
+
+    store_description(frame_hash(first), "Revenue 5M, margin 12%", scope="user:1", digest=file_digest(first))
+
+    assert lookup_description(frame_hash(second), scope="user:2", digest=file_digest(second)) is None
+
+
+def test_default_and_high_detail_lookups_are_exact_only():
+    store_description(BASE_HASH, "Low", scope="user:1")
+    store_description(BASE_HASH, "Slide", detail="high", scope="user:1")
+    near = _flip_bits(BASE_HASH, 1)
+
+    assert lookup_description(near, scope="user:1") is None
+    assert lookup_description(near, detail="high", max_distance=3, scope="user:1") is None
+    assert lookup_description(BASE_HASH, detail="high", scope="user:1") == "Slide"
+
+
+def test_lookup_is_scoped_to_detail_level():
+    store_description(BASE_HASH, "Low detail description", detail="low")
+
+    assert lookup_description(BASE_HASH, detail="high") is None
+
+
+def test_frame_hash_matches_for_identical_frames(tmp_path):
+    for name in ["a.jpg", "b.jpg"]:
+        img = Image.new("RGB", (320, 180), "white")
+        ImageDraw.Draw(img).rectangle([40, 40, 200, 120], fill="black")
+        img.save(tmp_path / name)
+
+    assert frame_hash(str(tmp_path / "a.jpg")) == frame_hash(str(tmp_path / "b.jpg"))
+
+
+def test_stats_count_entries_and_hits():
+    store_description(BASE_HASH, "Title card", scope="user:1")
+    lookup_description(BASE_HASH, scope="user:1")
+
+    assert get_vision_cache_stats() == {"entries": 1, "hits": 1}